@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Index d'autocomplétion en mémoire pour les noms de Pokemon
+- Complétion par préfixe : tableau trié de noms normalisés (fold_search_text) + bisect,
+  sur le nom complet et sur le début de chaque mot ("aigu" -> "Salarsen Aigü")
+- Tolérance aux fautes de frappe (distance d'édition 1, transposition comprise) :
+  index de suppressions précalculé sur les préfixes des noms (approche SymSpell)
+- Construit une fois depuis la table pokemon : aucune requête SQLite par recherche
+"""
+
+import time
+from bisect import bisect_left
+
+from database_v2 import fold_search_text
+
+AUTOCOMPLETE_DEFAULT_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+# Fautes de frappe cherchées à partir de 3 caractères, sur les TYPO_PREFIX_LENGTH premiers caractères
+TYPO_MIN_LENGTH = 3
+TYPO_PREFIX_LENGTH = 6
+
+# Ordre des résultats : préfixe du nom, puis préfixe d'un mot, puis faute de frappe
+MATCH_RANKS = {'prefix': 0, 'word': 1, 'typo': 2}
+
+
+def _deletions(text):
+    """Toutes les chaînes obtenues en supprimant un caractère de text."""
+    return {text[:i] + text[i + 1:] for i in range(len(text))}
+
+
+def _within_one_edit(a, b):
+    """Vrai si a et b diffèrent d'au plus une insertion, suppression, substitution ou transposition."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) != len(b):
+        return a[i:] == b[i + 1:]
+    return a[i + 1:] == b[i + 1:] or (a[i + 1:i + 2] == b[i:i + 1] and a[i:i + 1] == b[i + 1:i + 2]
+                                      and a[i + 2:] == b[i + 2:])
+
+
+def _prefix_within_one_edit(query, name):
+    """Vrai si un préfixe de name est à une édition au plus de query."""
+    return any(_within_one_edit(query, name[:length])
+               for length in (len(query) - 1, len(query), len(query) + 1) if length > 0)
+
+
+class AutocompleteIndex:
+    """Index immuable : construit depuis des lignes (id, name, number, generation, sprite_url)."""
+
+    def __init__(self, rows):
+        self.entries = []
+        keys = []
+        self.deletion_index = {}
+
+        for pokemon_id, name, number, generation, sprite_url in rows:
+            folded = fold_search_text(name)
+            entry_index = len(self.entries)
+            self.entries.append({
+                'id': pokemon_id,
+                'name': name,
+                'number': number,
+                'generation': generation,
+                # Même chemin web que /api/sprites (servi par /assets/<path>)
+                'sprite_url': sprite_url.replace('assets/', '').replace('assets\\', '').replace('\\', '/')
+                if sprite_url else None,
+                'folded': folded,
+            })
+
+            # Nom complet, puis début de chaque mot suivant
+            keys.append((folded, 'prefix', entry_index))
+            position = folded.find(' ')
+            while position != -1:
+                keys.append((folded[position + 1:], 'word', entry_index))
+                position = folded.find(' ', position + 1)
+
+            # Préfixes de longueur TYPO_MIN_LENGTH - 1 à TYPO_PREFIX_LENGTH + 1 et leurs suppressions
+            for length in range(TYPO_MIN_LENGTH - 1, min(len(folded), TYPO_PREFIX_LENGTH + 1) + 1):
+                prefix = folded[:length]
+                for key in _deletions(prefix) | {prefix}:
+                    self.deletion_index.setdefault(key, set()).add(entry_index)
+
+        keys.sort()
+        self.keys = [key for key, _, _ in keys]
+        self.key_entries = [(match, entry_index) for _, match, entry_index in keys]
+
+    def complete(self, query, limit=AUTOCOMPLETE_DEFAULT_LIMIT):
+        """Retourne les meilleures complétions [{..., 'match': 'prefix'|'word'|'typo'}]."""
+        folded = fold_search_text(query.strip())
+        if not folded:
+            return []
+
+        matches = {}
+        # Préfixe exact : toutes les clés qui commencent par la requête sont contiguës
+        position = bisect_left(self.keys, folded)
+        while position < len(self.keys) and self.keys[position].startswith(folded):
+            match, entry_index = self.key_entries[position]
+            if entry_index not in matches or MATCH_RANKS[match] < MATCH_RANKS[matches[entry_index]]:
+                matches[entry_index] = match
+            position += 1
+
+        # Faute de frappe : candidats via l'index de suppressions, vérifiés sur la requête entière
+        if len(folded) >= TYPO_MIN_LENGTH:
+            head = folded[:TYPO_PREFIX_LENGTH]
+            candidates = set()
+            for key in _deletions(head) | {head}:
+                candidates |= self.deletion_index.get(key, set())
+            for entry_index in candidates:
+                if entry_index not in matches and _prefix_within_one_edit(folded, self.entries[entry_index]['folded']):
+                    matches[entry_index] = 'typo'
+
+        ranked = sorted(matches.items(), key=lambda item: (
+            MATCH_RANKS[item[1]], len(self.entries[item[0]]['folded']), self.entries[item[0]]['name']))
+        results = []
+        for entry_index, match in ranked[:limit]:
+            entry = dict(self.entries[entry_index])
+            del entry['folded']
+            entry['match'] = match
+            results.append(entry)
+        return results
+
+    @classmethod
+    def from_connection(cls, conn):
+        """Construit l'index depuis la table pokemon."""
+        return cls(conn.execute('SELECT id, name, number, generation, sprite_url FROM pokemon ORDER BY id'))
+
+
+if __name__ == "__main__":
+    import sqlite3
+    import sys
+
+    # python autocomplete_index.py [base.db] -> temps de construction et débit de recherche
+    db_path = sys.argv[1] if len(sys.argv) >= 2 else "pokemon_shasse_v2.db"
+    conn = sqlite3.connect(db_path)
+    start = time.perf_counter()
+    index = AutocompleteIndex.from_connection(conn)
+    build_ms = (time.perf_counter() - start) * 1000
+    conn.close()
+
+    queries = [entry['folded'][:length] for entry in index.entries for length in (2, 4, 7)]
+    start = time.perf_counter()
+    for query in queries:
+        index.complete(query)
+    elapsed = time.perf_counter() - start
+
+    print(f"📊 {len(index.entries)} Pokemon, {len(index.keys)} clés de préfixe, "
+          f"{len(index.deletion_index)} clés de suppression (construction {build_ms:.0f} ms)")
+    print(f"⚡ {len(queries)} recherches : {len(queries) / elapsed:.0f} recherches/s")
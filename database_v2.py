@@ -1,13 +1,254 @@
 import sqlite3
 import os
+import json
+import threading
+from contextlib import contextmanager
+
+from regional_forms_reference import classify_tab
+from odds_model import ODDS_COLUMNS, parse_probability
+
+# ✅ NOUVEAU : Réglages appliqués à chaque connexion
+# WAL : les lecteurs (web_server.py) ne sont jamais bloqués par une écriture du scraper
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),         # Sûr en WAL, un fsync par checkpoint au lieu d'un par commit
+    ('mmap_size', 256 * 1024 * 1024),  # Lectures via mmap (256 Mo)
+    ('cache_size', -64 * 1024),        # Cache de pages de 64 Mo (valeur négative = Ko)
+)
+
+# Attente maximale (secondes) si la base est verrouillée par un autre processus
+SQLITE_BUSY_TIMEOUT = 30
+
+# Tables de dimension mises en cache (clé : name, ou (name, region) pour locations)
+DIMENSION_TABLES = ('games', 'hunt_methods', 'locations')
+
+# ✅ NOUVEAU : Index secondaires (clés étrangères + recherches par nom)
+# Les index UNIQUE servent de contraintes pour INSERT ... ON CONFLICT DO NOTHING RETURNING id
+SCHEMA_INDEXES = (
+    'CREATE UNIQUE INDEX IF NOT EXISTS idx_pokemon_name_generation ON pokemon (name, generation)',
+    'CREATE INDEX IF NOT EXISTS idx_pokemon_name_lower ON pokemon (LOWER(name))',
+    'CREATE INDEX IF NOT EXISTS idx_pokemon_generation ON pokemon (generation, number)',
+    'CREATE INDEX IF NOT EXISTS idx_pokemon_number_name ON pokemon (number, name)',
+    'CREATE INDEX IF NOT EXISTS idx_pokemon_tab ON pokemon (tab, generation, number)',
+    'CREATE UNIQUE INDEX IF NOT EXISTS idx_locations_name_region ON locations (name, region)',
+    'CREATE UNIQUE INDEX IF NOT EXISTS idx_psm_natural_key ON pokemon_specific_methods (pokemon_id, game_id, hunt_method_id, location_id)',
+    'CREATE INDEX IF NOT EXISTS idx_psm_hunt_method ON pokemon_specific_methods (hunt_method_id)',
+    'CREATE INDEX IF NOT EXISTS idx_psm_game ON pokemon_specific_methods (game_id)',
+    'CREATE INDEX IF NOT EXISTS idx_psm_location ON pokemon_specific_methods (location_id)',
+    'CREATE INDEX IF NOT EXISTS idx_pgm_hunt_method ON pokemon_general_methods (hunt_method_id)',
+    'CREATE INDEX IF NOT EXISTS idx_pokemon_games_game ON pokemon_games (game_id)',
+    'CREATE INDEX IF NOT EXISTS idx_method_odds_best ON pokemon_method_odds (pokemon_id, game_id, encounter_rate DESC)',
+    'CREATE INDEX IF NOT EXISTS idx_scrape_jobs_state ON scrape_jobs (generation, state)',
+)
+
+# Index remplacés (supprimés des bases existantes avant création de SCHEMA_INDEXES)
+OBSOLETE_INDEXES = (
+    'idx_psm_pokemon',  # Remplacé par idx_psm_natural_key (mêmes colonnes, UNIQUE)
+)
+
+# ✅ NOUVEAU : Colonnes ajoutées aux bases existantes (table, colonne, type)
+SCHEMA_COLUMN_MIGRATIONS = (
+    ('pokemon', 'tab', 'TEXT'),  # Onglet /api/sprites précalculé (voir classify_tab)
+    ('pokemon', 'page_hash', 'TEXT'),  # Empreinte de la page de détails normalisée (page_fingerprint)
+    ('pokemon', 'details_hash', 'TEXT'),  # Empreinte des données extraites (data_fingerprint)
+)
+
+# ✅ NOUVEAU : Champs de la fiche Pokemon mis à jour quand une nouvelle valeur est connue et diffère
+POKEMON_DIFF_FIELDS = ('number', 'sprite_url', 'is_shiny_lock', 'high_quality_image', 'description',
+                       'page_hash', 'details_hash')
+
+# ✅ NOUVEAU : Recherche plein texte (FTS5 trigram) insensible à la casse et aux accents
+# Mêmes remplacements que sanitize_filename / normalize_pokemon_name_for_url du scraper
+SEARCH_FOLDING = str.maketrans({
+    'é': 'e', 'è': 'e', 'ê': 'e', 'ë': 'e', 'à': 'a', 'â': 'a', 'ä': 'a', 'ç': 'c',
+    'î': 'i', 'ï': 'i', 'ô': 'o', 'ö': 'o', 'ù': 'u', 'û': 'u', 'ü': 'u', 'ÿ': 'y',
+    '♀': 'f', '♂': 'm',
+})
+SEARCH_TRIGRAM_MIN_LENGTH = 3  # En dessous, le tokenizer trigram ne peut pas servir : parcours de la table
+
+def fold_search_text(text):
+    """Forme normalisée (minuscules, sans accents) indexée et recherchée par search_pokemon."""
+    return text.lower().translate(SEARCH_FOLDING)
+
+# ✅ NOUVEAU : Génération d'un jeu d'après son nom (minuscules, sans accents), partagée par le scraper
+# et la correction des bases existantes (le taux shiny de odds_model dépend de games.generation)
+# Ordre important : noms complets avant noms partiels ("rouge feu" avant "rouge", "xd" avant "x")
+GAME_GENERATION_PATTERNS = (
+    # Noms collés ou abrégés des pages pokebip
+    ('rubisomega', 6), ('saphiralpha', 6), ('colosseum', 3), ('xd', 3),
+    ('lp: arceus', 8), ('lp arceus', 8),
+    # 3G - Vérifier AVANT les jeux 1G pour éviter "Rouge" vs "Rouge Feu"
+    ('rouge feu', 3), ('vert feuille', 3), ('rubis omega', 6), ('saphir alpha', 6),
+    ('rubis', 3), ('saphir', 3), ('emeraude', 3),
+    # 1G
+    ('rouge', 1), ('bleu', 1), ('jaune', 1),
+    # 2G
+    ('or', 2), ('argent', 2), ('cristal', 2),
+    # 4G
+    ('diamant etincelant', 8), ('perle scintillante', 8),  # Vérifier avant Diamant/Perle
+    ('diamant et.', 8), ('perle scint.', 8),  # Versions courtes
+    ('diamant', 4), ('perle', 4), ('platine', 4),
+    ('heartgold', 4), ('soulsilver', 4),
+    # 5G
+    ('noir 2', 5), ('blanc 2', 5), ('noir', 5), ('blanc', 5),
+    # 6G
+    ('x', 6), ('y', 6),
+    # 7G
+    ('ultra-soleil', 7), ('ultra-lune', 7), ('ultra soleil', 7), ('ultra lune', 7),
+    ('lg: pikachu', 7), ('lg: evoli', 7), ("let's go", 7),
+    ('soleil', 7), ('lune', 7),
+    # 8G
+    ('legendes pokemon: arceus', 8), ('legendes pokemon arceus', 8), ('lpa', 8),
+    ('epee', 8), ('bouclier', 8),
+    # 9G
+    ('ecarlate', 9), ('violet', 9), ('ev', 9),
+)
+
+# Abréviations courantes (nom complet du jeu uniquement)
+GAME_GENERATION_ABBREVIATIONS = {
+    'rf': 3, 'vf': 3,  # Rouge Feu / Vert Feuille
+    'ro': 6, 'sa': 6,  # Rubis Oméga / Saphir Alpha
+    'hg': 4, 'ss': 4,  # HeartGold / SoulSilver
+    'de': 8, 'pe': 8,  # Diamant Étincelant / Perle Scintillante
+    'n2': 5, 'b2': 5,  # Noir 2 / Blanc 2
+    'us': 7, 'ul': 7,  # Ultra-Soleil / Ultra-Lune
+    'lgp': 7, 'lge': 7,  # Let's Go Pikachu/Évoli
+    'ep': 8, 'bo': 8,  # Épée / Bouclier
+    'ec': 9, 'vi': 9   # Écarlate / Violet
+}
+
+
+def detect_game_generation(game_name):
+    """Génération d'un jeu d'après son nom, ou None si le jeu est inconnu."""
+    if not game_name:
+        return None
+    folded = fold_search_text(game_name)
+    for game_pattern, generation in GAME_GENERATION_PATTERNS:
+        if game_pattern in folded:
+            return generation
+    return GAME_GENERATION_ABBREVIATIONS.get(folded)
+
+# Doublons à fusionner avant de créer un index UNIQUE : (index, table, clé naturelle, références à repointer)
+UNIQUE_KEY_MIGRATIONS = (
+    ('idx_pokemon_name_generation', 'pokemon', ('name', 'generation'),
+     (('pokemon_general_methods', 'pokemon_id'), ('pokemon_specific_methods', 'pokemon_id'), ('pokemon_games', 'pokemon_id'))),
+    ('idx_locations_name_region', 'locations', ('name', 'region'),
+     (('pokemon_specific_methods', 'location_id'),)),
+    ('idx_psm_natural_key', 'pokemon_specific_methods', ('pokemon_id', 'game_id', 'hunt_method_id', 'location_id'),
+     (('pokemon_method_odds', 'psm_id'),)),
+)
+
+# Requêtes critiques (routes web + scraper) et index attendu dans leur EXPLAIN QUERY PLAN
+QUERY_PLAN_CHECKS = (
+    ('/poke/<name> : recherche insensible à la casse',
+     'SELECT id FROM pokemon WHERE LOWER(name) = LOWER(?)', ('pikachu',), 'idx_pokemon_name_lower'),
+    ('insert_pokemon / api details : (name, generation)',
+     'SELECT id FROM pokemon WHERE name = ? AND generation = ?', ('Pikachu', 1), 'idx_pokemon_name_generation'),
+    ('/pokemon : page suivante (curseur number, name, id)',
+     '''SELECT id FROM pokemon WHERE (number, name, id) > (?, ?, ?)
+        ORDER BY number, name, id LIMIT ?''', (25, 'Pikachu', 1, 100), 'idx_pokemon_number_name'),
+    ('/api/sprites : Pokemon par onglet',
+     '''SELECT name FROM pokemon WHERE sprite_url IS NOT NULL AND sprite_url != ''
+        ORDER BY tab, generation, number''', (), 'idx_pokemon_tab'),
+    ('/api/missing : Pokemon par génération',
+     'SELECT name FROM pokemon WHERE generation = ? ORDER BY number', (1,), 'idx_pokemon_generation'),
+    ('insert_location : (name, region)',
+     'SELECT id FROM locations WHERE name = ? AND region = ?', ('Route 1', 'Rouge'), 'idx_locations_name_region'),
+    ('/pokemon : méthodes spécifiques par Pokemon',
+     'SELECT COUNT(*) FROM pokemon_specific_methods WHERE pokemon_id = ?', (1,), 'idx_psm_natural_key'),
+    ('/poke/<name> : jeux distincts du Pokemon',
+     '''SELECT DISTINCT g.name, g.generation FROM games g
+        JOIN pokemon_specific_methods psm ON g.id = psm.game_id WHERE psm.pokemon_id = ?''', (1,), 'idx_psm_natural_key'),
+    ('get_pokemon_methods : méthodes spécifiques détaillées',
+     '''SELECT hm.name, g.name, l.name, psm.probability FROM pokemon_specific_methods psm
+        JOIN hunt_methods hm ON psm.hunt_method_id = hm.id
+        JOIN games g ON psm.game_id = g.id
+        LEFT JOIN locations l ON psm.location_id = l.id
+        WHERE psm.pokemon_id = ?''', (1,), 'idx_psm_natural_key'),
+    ('/stats : utilisation par méthode',
+     'SELECT COUNT(*) FROM pokemon_specific_methods WHERE hunt_method_id = ?', (1,), 'idx_psm_hunt_method'),
+    ('best_odds : meilleur taux de rencontre pour (Pokemon, jeu)',
+     '''SELECT o.psm_id FROM pokemon_method_odds o
+        WHERE o.pokemon_id = ? AND o.game_id = ?
+        ORDER BY o.encounter_rate DESC LIMIT ?''', (1, 1, 10), 'idx_method_odds_best'),
+    ('/pokemon : méthodes générales par Pokemon',
+     'SELECT COUNT(*) FROM pokemon_general_methods WHERE pokemon_id = ?', (1,), 'sqlite_autoindex_pokemon_general_methods_1'),
+)
+
+# ✅ NOUVEAU : Entrées du calcul de rencontres attendues (odds_model.rank_odds)
+ODDS_CHARM_METHOD = 'Charme Chroma'
+ODDS_MASUDA_METHOD = 'Masuda'
+ODDS_INPUT_FIELDS = (
+    'pokemon_id', 'pokemon', 'number', 'game', 'game_generation', 'method', 'location', 'probability',
+    'encounter_rate', 'has_charm', 'has_masuda', 'is_breeding',
+)
+
+# ✅ NOUVEAU : Compteurs matérialisés (pokemon_summary, hunt_method_usage, stats_snapshot)
+# Formes régionales comptées par /api/stats
+REGIONAL_FORM_FILTER = "name LIKE '%Alola%' OR name LIKE '%Galar%' OR name LIKE '%Hisui%'"
+POPULAR_METHODS_LIMIT = 10
+
+# Colonnes entières de stats_snapshot, dans l'ordre du SELECT de _refresh_stats_snapshot
+STATS_SNAPSHOT_COUNTERS = (
+    'total_pokemon', 'shiny_locked', 'sprites_downloaded', 'total_forms',
+    'total_hunt_methods', 'general_hunt_methods', 'specific_hunt_methods', 'total_games', 'total_locations',
+    'total_general_method_associations', 'total_specific_method_associations', 'total_pokemon_game_associations',
+)
 
 class DatabaseManagerV2:
     def __init__(self, db_path="pokemon_shasse_v2.db"):
         self.db_path = db_path
+        
+        # ✅ NOUVEAU : Caches mémoire clé -> id des dimensions (jeux, méthodes, lieux), thread-safe
+        self._dimension_lock = threading.Lock()
+        self._dimension_ids = {table: {} for table in DIMENSION_TABLES}
+        self.dimension_stats = {table: {'hits': 0, 'misses': 0} for table in DIMENSION_TABLES}
+        
+        # ✅ NOUVEAU : Connexions persistantes (une par thread en lecture, une seule en écriture)
+        self._local = threading.local()
+        self._writer_lock = threading.RLock()
+        self._writer_conn = None
+        
         self.create_tables()
 
-    def create_connection(self):
-        return sqlite3.connect(self.db_path)
+    def create_connection(self, check_same_thread=True):
+        """Ouvre une nouvelle connexion configurée (WAL, synchronous, mmap, cache) - à fermer par l'appelant."""
+        conn = sqlite3.connect(self.db_path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=check_same_thread)
+        for pragma, value in SQLITE_PRAGMAS:
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        return conn
+
+    def get_connection(self):
+        """Connexion de lecture réutilisable, propre au thread courant (ne pas la fermer)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self.create_connection()
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def writer(self):
+        """Connexion d'écriture unique et persistante : une transaction (commit ou rollback) par bloc."""
+        with self._writer_lock:
+            if self._writer_conn is None:
+                self._writer_conn = self.create_connection(check_same_thread=False)
+            if self._writer_conn.in_transaction:
+                # Bloc imbriqué : la transaction englobante fera le commit
+                yield self._writer_conn
+            else:
+                with self._writer_conn:
+                    yield self._writer_conn
+
+    def close(self):
+        """Ferme la connexion d'écriture et la connexion de lecture du thread courant."""
+        with self._writer_lock:
+            if self._writer_conn is not None:
+                self._writer_conn.close()
+                self._writer_conn = None
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
 
     def create_tables(self):
         """Crée toutes les tables avec le nouveau schéma amélioré."""
@@ -25,7 +266,10 @@ class DatabaseManagerV2:
                 is_shiny_lock BOOLEAN DEFAULT 0,
                 high_quality_image TEXT,
                 description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                tab TEXT,  -- ✅ NOUVEAU : 'pokedex', 'regional:<région>' ou 'other'
+                page_hash TEXT,  -- ✅ NOUVEAU : empreinte de la page de détails (re-scraping incrémental)
+                details_hash TEXT  -- ✅ NOUVEAU : empreinte des données extraites
             )
         ''')
         
@@ -102,124 +346,888 @@ class DatabaseManagerV2:
             )
         ''')
         
+        # ✅ NOUVELLE TABLE : Compteurs par Pokemon, tenus à jour à chaque sauvegarde
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS pokemon_summary (
+                pokemon_id INTEGER PRIMARY KEY,
+                general_methods_count INTEGER NOT NULL DEFAULT 0,
+                specific_methods_count INTEGER NOT NULL DEFAULT 0,
+                games_count INTEGER NOT NULL DEFAULT 0,
+                locations_count INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (pokemon_id) REFERENCES pokemon (id)
+            )
+        ''')
+        
+        # ✅ NOUVELLE TABLE : Nombre d'associations (générales + spécifiques) par méthode
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS hunt_method_usage (
+                hunt_method_id INTEGER PRIMARY KEY,
+                usage_count INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY (hunt_method_id) REFERENCES hunt_methods (id)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_hunt_method_usage_count ON hunt_method_usage (usage_count)')
+        
+        # ✅ NOUVELLE TABLE : Statistiques globales (une seule ligne, id = 1)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stats_snapshot (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total_pokemon INTEGER NOT NULL DEFAULT 0,
+                shiny_locked INTEGER NOT NULL DEFAULT 0,
+                sprites_downloaded INTEGER NOT NULL DEFAULT 0,
+                total_forms INTEGER NOT NULL DEFAULT 0,
+                total_hunt_methods INTEGER NOT NULL DEFAULT 0,
+                general_hunt_methods INTEGER NOT NULL DEFAULT 0,
+                specific_hunt_methods INTEGER NOT NULL DEFAULT 0,
+                total_games INTEGER NOT NULL DEFAULT 0,
+                total_locations INTEGER NOT NULL DEFAULT 0,
+                total_general_method_associations INTEGER NOT NULL DEFAULT 0,
+                total_specific_method_associations INTEGER NOT NULL DEFAULT 0,
+                total_pokemon_game_associations INTEGER NOT NULL DEFAULT 0,
+                pokemon_by_generation TEXT NOT NULL DEFAULT '[]',  -- JSON [[génération, nombre], ...]
+                popular_methods TEXT NOT NULL DEFAULT '[]',  -- JSON [[nom, catégorie, utilisations], ...]
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # ✅ NOUVELLE TABLE : Taux numériques (en %) extraits de pokemon_specific_methods.probability
+        # pokemon_id / game_id recopiés pour servir « meilleur taux pour (Pokemon, jeu) » par index
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS pokemon_method_odds (
+                psm_id INTEGER PRIMARY KEY,
+                pokemon_id INTEGER NOT NULL,
+                game_id INTEGER NOT NULL,
+                encounter_rate REAL,
+                tc_rate REAL,
+                capture_rate REAL,
+                flee_rate REAL,
+                FOREIGN KEY (psm_id) REFERENCES pokemon_specific_methods (id),
+                FOREIGN KEY (pokemon_id) REFERENCES pokemon (id),
+                FOREIGN KEY (game_id) REFERENCES games (id)
+            )
+        ''')
+        
+        # ✅ NOUVELLE TABLE : File de scraping persistante, une ligne par (génération, URL de détail)
+        # state : 'pending' (à faire), 'done' (sauvegardé) ou 'failed' (dernière tentative en erreur)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scrape_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                generation INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                pokemon_name TEXT NOT NULL,
+                number INTEGER,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                content_hash TEXT,  -- SHA-1 de la page de détails au dernier succès
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (generation, url)
+            )
+        ''')
+        
+        # ✅ NOUVELLE TABLE : Index de recherche des noms (rowid = pokemon.id)
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS pokemon_search USING fts5(folded_name, tokenize='trigram')")
+        except sqlite3.OperationalError:
+            # SQLite sans FTS5 ou sans tokenizer trigram (< 3.34) : même table, recherche par parcours
+            print("⚠️ FTS5 trigram indisponible, recherche par parcours de table")
+            cursor.execute('CREATE TABLE IF NOT EXISTS pokemon_search (folded_name TEXT)')
+        
+        # ✅ NOUVEAU : Colonnes ajoutées depuis (bases existantes)
+        self.add_missing_columns(cursor)
+        
+        # ✅ NOUVEAU : Index secondaires et contraintes d'unicité (migration des bases existantes)
+        merged = self.create_indexes(cursor)
+        
+        # Pokemon sans onglet (bases existantes) : classification initiale
+        self._classify_pokemon(cursor, only_missing=True)
+        
+        # Jeux enregistrés avec une génération erronée (anciennes règles de détection)
+        self._fix_game_generations(cursor)
+        
+        # Pokemon absents de l'index de recherche (bases existantes)
+        self._sync_search_index(cursor)
+        self.search_uses_fts = 'fts5' in cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'pokemon_search'").fetchone()[0].lower()
+        
+        # Méthodes spécifiques sans taux analysés (bases existantes)
+        self._store_method_odds(cursor)
+        
+        # Base existante sans compteurs matérialisés (ou doublons fusionnés) : calcul initial complet
+        if merged or cursor.execute('SELECT COUNT(*) FROM stats_snapshot').fetchone()[0] == 0:
+            self._refresh_summaries(cursor)
+        
         conn.commit()
         conn.close()
         print("✅ Tables V2 créées avec succès")
 
-    def insert_pokemon(self, name, number, sprite_url, generation, is_shiny_lock=False, high_quality_image=None, description=None):
-        """Insère un nouveau Pokemon."""
-        conn = self.create_connection()
-        cursor = conn.cursor()
+    def add_missing_columns(self, cursor):
+        """Ajoute aux tables existantes les colonnes de SCHEMA_COLUMN_MIGRATIONS absentes."""
+        for table, column, column_type in SCHEMA_COLUMN_MIGRATIONS:
+            columns = {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+            if column not in columns:
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}')
+
+    def create_indexes(self, cursor):
+        """Crée les index du schéma, après fusion des doublons qui bloqueraient un index UNIQUE.
+
+        Retourne le nombre de lignes fusionnées.
+        """
+        for index_name in OBSOLETE_INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS {index_name}')
         
-        cursor.execute('SELECT id FROM pokemon WHERE name = ? AND generation = ?', (name, generation))
-        existing = cursor.fetchone()
+        total_merged = 0
+        existing = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        for index_name, table, key_columns, references in UNIQUE_KEY_MIGRATIONS:
+            if index_name not in existing:
+                merged = self._merge_duplicate_rows(cursor, table, key_columns, references)
+                if merged:
+                    print(f"🔧 {merged} doublon(s) fusionné(s) dans {table} avant création de {index_name}")
+                total_merged += merged
         
-        if existing:
-            conn.close()
-            return existing[0]
+        for statement in SCHEMA_INDEXES:
+            cursor.execute(statement)
+        return total_merged
+
+    def _merge_duplicate_rows(self, cursor, table, key_columns, references):
+        """Fusionne les doublons d'une clé naturelle sur la ligne la plus ancienne (références repointées)."""
+        keys = ', '.join(key_columns)
+        # '=' et non IS : les clés NULL restent distinctes, comme dans un index UNIQUE
+        join_condition = ' AND '.join(f'd.{column} = k.{column}' for column in key_columns)
+        cursor.execute(f'''
+            SELECT d.id, k.keep_id
+            FROM {table} d
+            JOIN (SELECT {keys}, MIN(id) AS keep_id FROM {table} GROUP BY {keys} HAVING COUNT(*) > 1) k
+              ON {join_condition}
+            WHERE d.id != k.keep_id
+        ''')
+        remap = cursor.fetchall()
+        if not remap:
+            return 0
         
-        cursor.execute('''
-            INSERT INTO pokemon (name, number, sprite_url, generation, is_shiny_lock, high_quality_image, description)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (name, number, sprite_url, generation, is_shiny_lock, high_quality_image, description))
+        for ref_table, ref_column in references:
+            # OR IGNORE : une association déjà présente sur la ligne conservée est simplement supprimée
+            cursor.executemany(f'UPDATE OR IGNORE {ref_table} SET {ref_column} = ? WHERE {ref_column} = ?',
+                               [(keep_id, duplicate_id) for duplicate_id, keep_id in remap])
+            cursor.executemany(f'DELETE FROM {ref_table} WHERE {ref_column} = ?',
+                               [(duplicate_id,) for duplicate_id, _ in remap])
+        cursor.executemany(f'DELETE FROM {table} WHERE id = ?', [(duplicate_id,) for duplicate_id, _ in remap])
+        return len(remap)
+
+    def check_query_plans(self):
+        """Vérifie via EXPLAIN QUERY PLAN que les requêtes critiques utilisent l'index attendu."""
+        conn = self.get_connection()
+        results = []
+        for label, sql, params, expected_index in QUERY_PLAN_CHECKS:
+            plan = [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+            results.append({
+                'label': label,
+                'index': expected_index,
+                'ok': any(expected_index in detail for detail in plan),
+                'plan': plan
+            })
+        return results
+
+    def _sync_search_index(self, cursor):
+        """Aligne pokemon_search sur la table pokemon (Pokemon manquants ajoutés, disparus retirés)."""
+        cursor.execute('DELETE FROM pokemon_search WHERE rowid NOT IN (SELECT id FROM pokemon)')
+        missing = cursor.execute(
+            'SELECT id, name FROM pokemon WHERE id NOT IN (SELECT rowid FROM pokemon_search)').fetchall()
+        for pokemon_id, name in missing:
+            self._index_pokemon_name(cursor, pokemon_id, name)
+        return len(missing)
+
+    def _index_pokemon_name(self, cursor, pokemon_id, name):
+        """Ajoute le nom normalisé d'un Pokemon à l'index de recherche."""
+        cursor.execute('INSERT INTO pokemon_search (rowid, folded_name) VALUES (?, ?)',
+                       (pokemon_id, fold_search_text(name)))
+
+    def search_pokemon(self, query, limit=20):
+        """Recherche classée par nom (casse et accents ignorés), ou par numéro exact si la requête est numérique."""
+        conn = self.get_connection()
+        query = query.strip()
         
-        pokemon_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return pokemon_id
+        number = query.lstrip('#')
+        if number.isdigit():
+            return conn.execute('''
+                SELECT id, name, number, generation, sprite_url, is_shiny_lock
+                FROM pokemon
+                WHERE number = ?
+                ORDER BY generation, name
+                LIMIT ?
+            ''', (int(number), limit)).fetchall()
+        
+        folded = fold_search_text(query)
+        if not folded:
+            return []
+        if self.search_uses_fts and len(folded) >= SEARCH_TRIGRAM_MIN_LENGTH:
+            # Phrase FTS5 : le tokenizer trigram trouve la sous-chaîne via l'index
+            match = 's.pokemon_search MATCH :phrase'
+        else:
+            match = 'instr(s.folded_name, :folded) > 0'
+        
+        # Classement : nom exact, puis préfixe, puis position de la correspondance, puis nom le plus court
+        return conn.execute(f'''
+            SELECT p.id, p.name, p.number, p.generation, p.sprite_url, p.is_shiny_lock
+            FROM pokemon_search s
+            JOIN pokemon p ON p.id = s.rowid
+            WHERE {match}
+            ORDER BY s.folded_name = :folded DESC,
+                     instr(s.folded_name, :folded),
+                     length(s.folded_name),
+                     p.name
+            LIMIT :limit
+        ''', {'phrase': '"' + folded.replace('"', '""') + '"', 'folded': folded, 'limit': limit}).fetchall()
 
-    def insert_hunt_method(self, name, description=None, is_general=False, category=None):
-        """Insère une méthode de chasse avec support des méthodes générales."""
-        conn = self.create_connection()
-        cursor = conn.cursor()
+    def backfill_method_odds(self):
+        """Réanalyse la probabilité de toutes les méthodes spécifiques ; retourne le nombre de lignes écrites."""
+        with self.writer() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM pokemon_method_odds')
+            return self._store_method_odds(cursor)
+
+    def _store_method_odds(self, cursor, pokemon_ids=None):
+        """Analyse les méthodes spécifiques sans ligne dans pokemon_method_odds (limitées à pokemon_ids si fourni)."""
+        where = ''
+        params = []
+        if pokemon_ids is None:
+            # Passe complète : on retire aussi les taux de méthodes supprimées (fusion de doublons)
+            cursor.execute('DELETE FROM pokemon_method_odds WHERE psm_id NOT IN (SELECT id FROM pokemon_specific_methods)')
+        else:
+            pokemon_ids = list(dict.fromkeys(pokemon_ids))
+            if not pokemon_ids:
+                return 0
+            where = f'AND psm.pokemon_id IN ({", ".join("?" * len(pokemon_ids))})'
+            params = pokemon_ids
+        rows = cursor.execute(f'''
+            SELECT psm.id, psm.pokemon_id, psm.game_id, psm.probability
+            FROM pokemon_specific_methods psm
+            WHERE NOT EXISTS (SELECT 1 FROM pokemon_method_odds o WHERE o.psm_id = psm.id) {where}
+        ''', params).fetchall()
+        cursor.executemany(f'''
+            INSERT INTO pokemon_method_odds (psm_id, pokemon_id, game_id, {", ".join(ODDS_COLUMNS)})
+            VALUES (?, ?, ?, {", ".join("?" * len(ODDS_COLUMNS))})
+        ''', [(psm_id, pokemon_id, game_id, *parse_probability(probability))
+              for psm_id, pokemon_id, game_id, probability in rows])
+        return len(rows)
+
+    def get_best_odds(self, pokemon_id, game_id, limit=10):
+        """Méthodes/lieux d'un Pokemon dans un jeu, du meilleur taux de rencontre au moins bon."""
+        return self.get_connection().execute(f'''
+            SELECT hm.name, l.name, psm.probability, {", ".join("o." + column for column in ODDS_COLUMNS)}
+            FROM pokemon_method_odds o
+            JOIN pokemon_specific_methods psm ON psm.id = o.psm_id
+            JOIN hunt_methods hm ON hm.id = psm.hunt_method_id
+            LEFT JOIN locations l ON l.id = psm.location_id
+            WHERE o.pokemon_id = ? AND o.game_id = ?
+            ORDER BY o.encounter_rate DESC, o.psm_id
+            LIMIT ?
+        ''', (pokemon_id, game_id, limit)).fetchall()
+
+    def get_odds_inputs(self, pokemon_ids=None, game_id=None):
+        """Lignes (jeu, méthode, lieu) avec taux de rencontre et bonus Charme Chroma / Masuda du Pokemon.
+
+        Filtrées par pokemon_ids et/ou game_id (toute la base si aucun filtre) ; entrée de odds_model.rank_odds.
+        """
+        conn = self.get_connection()
+        bonus_ids = dict(conn.execute(
+            'SELECT name, id FROM hunt_methods WHERE name IN (?, ?)', (ODDS_CHARM_METHOD, ODDS_MASUDA_METHOD)))
+        conditions = []
+        params = [bonus_ids.get(ODDS_CHARM_METHOD), bonus_ids.get(ODDS_MASUDA_METHOD)]
+        if pokemon_ids is not None:
+            conditions.append(f'o.pokemon_id IN ({", ".join("?" * len(pokemon_ids))})')
+            params.extend(pokemon_ids)
+        if game_id is not None:
+            conditions.append('o.game_id = ?')
+            params.append(game_id)
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
         
-        cursor.execute('SELECT id FROM hunt_methods WHERE name = ?', (name,))
-        existing = cursor.fetchone()
+        rows = conn.execute(f'''
+            SELECT o.pokemon_id, p.name, p.number, g.name, g.generation, hm.name, l.name, psm.probability,
+                   o.encounter_rate,
+                   EXISTS (SELECT 1 FROM pokemon_general_methods WHERE pokemon_id = o.pokemon_id AND hunt_method_id = ?),
+                   EXISTS (SELECT 1 FROM pokemon_general_methods WHERE pokemon_id = o.pokemon_id AND hunt_method_id = ?),
+                   hm.category = 'breeding'
+            FROM pokemon_method_odds o
+            JOIN pokemon_specific_methods psm ON psm.id = o.psm_id
+            JOIN pokemon p ON p.id = o.pokemon_id
+            JOIN games g ON g.id = o.game_id
+            JOIN hunt_methods hm ON hm.id = psm.hunt_method_id
+            LEFT JOIN locations l ON l.id = psm.location_id
+            {where}
+            ORDER BY o.psm_id
+        ''', params).fetchall()
+        return [dict(zip(ODDS_INPUT_FIELDS, row)) for row in rows]
+
+    def get_odds_coverage(self):
+        """Nombre de lignes de pokemon_method_odds et nombre de taux renseignés par colonne."""
+        return self.get_connection().execute(
+            f'SELECT COUNT(*), {", ".join(f"COUNT({column})" for column in ODDS_COLUMNS)} FROM pokemon_method_odds'
+        ).fetchone()
+
+    def enqueue_scrape_jobs(self, generation, entries):
+        """(Re)met en attente un job par entrée du portail d'une génération ({'name', 'number', 'url'})."""
+        with self.writer() as conn:
+            conn.executemany('''
+                INSERT INTO scrape_jobs (generation, url, pokemon_name, number) VALUES (?, ?, ?, ?)
+                ON CONFLICT (generation, url) DO UPDATE SET
+                    pokemon_name = excluded.pokemon_name, number = excluded.number,
+                    state = 'pending', attempts = 0, last_error = NULL, updated_at = CURRENT_TIMESTAMP
+            ''', [(generation, entry['url'], entry['name'], entry['number']) for entry in entries])
+            # Les URLs retirées du portail ne sont plus à scraper
+            urls = {entry['url'] for entry in entries}
+            conn.executemany('DELETE FROM scrape_jobs WHERE id = ?', [
+                (job_id,) for job_id, url in conn.execute('SELECT id, url FROM scrape_jobs WHERE generation = ?',
+                                                          (generation,)).fetchall()
+                if url not in urls])
+
+    def get_scrape_jobs(self, generation, states=('pending', 'failed')):
+        """Jobs d'une génération dans les états demandés, dans l'ordre du portail."""
+        placeholders = ', '.join('?' * len(states))
+        rows = self.get_connection().execute(f'''
+            SELECT id, pokemon_name, number, url FROM scrape_jobs
+            WHERE generation = ? AND state IN ({placeholders})
+            ORDER BY id
+        ''', (generation, *states)).fetchall()
+        return [{'job_id': job_id, 'name': name, 'number': number, 'url': url} for job_id, name, number, url in rows]
+
+    def finish_scrape_job(self, job_id, content_hash=None, error=None):
+        """Marque un job 'done' (avec l'empreinte de la page) ou 'failed' (avec l'erreur)."""
+        with self.writer() as conn:
+            conn.execute('''
+                UPDATE scrape_jobs
+                SET state = ?, attempts = attempts + 1, last_error = ?,
+                    content_hash = COALESCE(?, content_hash), updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', ('failed' if error else 'done', error, content_hash, job_id))
+
+    def get_scrape_job_counts(self):
+        """Nombre de jobs par génération et par état."""
+        return self.get_connection().execute(
+            'SELECT generation, state, COUNT(*) FROM scrape_jobs GROUP BY generation, state ORDER BY generation, state'
+        ).fetchall()
+
+    def reclassify_pokemon(self):
+        """Recalcule l'onglet de tous les Pokemon (après modification des règles) ; retourne le nombre modifié."""
+        with self.writer() as conn:
+            return self._classify_pokemon(conn.cursor())
+
+    def _classify_pokemon(self, cursor, only_missing=False):
+        """Écrit pokemon.tab pour les Pokemon dont l'onglet change (ou est absent) ; retourne le nombre modifié."""
+        where = 'WHERE tab IS NULL' if only_missing else ''
+        rows = cursor.execute(f'SELECT id, name, tab FROM pokemon {where}').fetchall()
+        changes = []
+        for pokemon_id, name, tab in rows:
+            new_tab = classify_tab(name)
+            if new_tab != tab:
+                changes.append((new_tab, pokemon_id))
+        cursor.executemany('UPDATE pokemon SET tab = ? WHERE id = ?', changes)
+        return len(changes)
+
+    def _fix_game_generations(self, cursor):
+        """Corrige games.generation d'après detect_game_generation (jeux connus) ; retourne le nombre modifié."""
+        changes = []
+        for game_id, name, generation in cursor.execute('SELECT id, name, generation FROM games').fetchall():
+            detected = detect_game_generation(name)
+            if detected is not None and detected != generation:
+                changes.append((detected, game_id))
+        cursor.executemany('UPDATE games SET generation = ? WHERE id = ?', changes)
+        return len(changes)
+
+    def get_tab_counts(self):
+        """Nombre de Pokemon par onglet."""
+        return self.get_connection().execute(
+            'SELECT tab, COUNT(*) FROM pokemon GROUP BY tab ORDER BY tab').fetchall()
+
+    def rebuild_summaries(self):
+        """Recalcule entièrement pokemon_summary, hunt_method_usage et stats_snapshot."""
+        with self.writer() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM pokemon_summary')
+            cursor.execute('DELETE FROM hunt_method_usage')
+            self._refresh_summaries(cursor)
+        return self.get_stats_snapshot()
+
+    def _refresh_summaries(self, cursor, pokemon_ids=None, method_ids=()):
+        """Met à jour les compteurs matérialisés (tous les Pokemon si pokemon_ids est None)."""
+        self._refresh_pokemon_summary(cursor, pokemon_ids)
+        self._refresh_hunt_method_usage(cursor, pokemon_ids, method_ids)
+        self._refresh_stats_snapshot(cursor)
+
+    def _refresh_pokemon_summary(self, cursor, pokemon_ids=None):
+        """Recalcule les compteurs des Pokemon donnés (sous-requêtes servies par les index pokemon_id)."""
+        where, params = '', ()
+        if pokemon_ids is not None:
+            params = tuple(set(pokemon_ids))
+            where = f"WHERE p.id IN ({', '.join('?' * len(params))})"
+        cursor.execute(f'''
+            INSERT OR REPLACE INTO pokemon_summary
+            (pokemon_id, general_methods_count, specific_methods_count, games_count, locations_count, updated_at)
+            SELECT p.id,
+                   (SELECT COUNT(*) FROM pokemon_general_methods WHERE pokemon_id = p.id),
+                   (SELECT COUNT(*) FROM pokemon_specific_methods WHERE pokemon_id = p.id),
+                   (SELECT COUNT(*) FROM pokemon_games WHERE pokemon_id = p.id),
+                   (SELECT COUNT(DISTINCT location_id) FROM pokemon_specific_methods WHERE pokemon_id = p.id),
+                   CURRENT_TIMESTAMP
+            FROM pokemon p
+            {where}
+        ''', params)
+
+    def _refresh_hunt_method_usage(self, cursor, pokemon_ids=None, method_ids=()):
+        """Recalcule l'utilisation des méthodes liées aux Pokemon donnés et des méthodes method_ids
+        (liens supprimés par une sauvegarde : ces méthodes ne sont plus liées aux Pokemon)."""
+        where, params = '', ()
+        if pokemon_ids is not None:
+            params = tuple(set(pokemon_ids))
+            method_ids = tuple(set(method_ids))
+            placeholders = ', '.join('?' * len(params))
+            where = f'''WHERE hm.id IN (
+                SELECT hunt_method_id FROM pokemon_general_methods WHERE pokemon_id IN ({placeholders})
+                UNION
+                SELECT hunt_method_id FROM pokemon_specific_methods WHERE pokemon_id IN ({placeholders})
+            ) OR hm.id IN ({', '.join('?' * len(method_ids))})'''
+            params = params * 2 + method_ids
+        cursor.execute(f'''
+            INSERT OR REPLACE INTO hunt_method_usage (hunt_method_id, usage_count)
+            SELECT hm.id,
+                   (SELECT COUNT(*) FROM pokemon_general_methods WHERE hunt_method_id = hm.id)
+                   + (SELECT COUNT(*) FROM pokemon_specific_methods WHERE hunt_method_id = hm.id)
+            FROM hunt_methods hm
+            {where}
+        ''', params)
+
+    def _refresh_stats_snapshot(self, cursor):
+        """Recalcule la ligne unique de stats_snapshot (un seul parcours de la table pokemon)."""
+        cursor.execute(f'''
+            SELECT p.total, p.shiny_locked, p.sprites, p.forms,
+                   (SELECT COUNT(*) FROM hunt_methods),
+                   (SELECT COUNT(*) FROM hunt_methods WHERE is_general = 1),
+                   (SELECT COUNT(*) FROM hunt_methods WHERE is_general = 0),
+                   (SELECT COUNT(*) FROM games),
+                   (SELECT COUNT(*) FROM locations),
+                   (SELECT COUNT(*) FROM pokemon_general_methods),
+                   (SELECT COUNT(*) FROM pokemon_specific_methods),
+                   (SELECT COUNT(*) FROM pokemon_games)
+            FROM (
+                SELECT COUNT(*) AS total,
+                       COALESCE(SUM(is_shiny_lock = 1), 0) AS shiny_locked,
+                       COALESCE(SUM(sprite_url IS NOT NULL AND sprite_url != ''), 0) AS sprites,
+                       COALESCE(SUM({REGIONAL_FORM_FILTER}), 0) AS forms
+                FROM pokemon
+            ) p
+        ''')
+        counters = cursor.fetchone()
         
-        if existing:
-            conn.close()
-            return existing[0]
+        by_generation = cursor.execute(
+            'SELECT generation, COUNT(*) FROM pokemon GROUP BY generation ORDER BY generation').fetchall()
+        popular_methods = cursor.execute('''
+            SELECT hm.name, hm.category, u.usage_count
+            FROM hunt_method_usage u
+            JOIN hunt_methods hm ON u.hunt_method_id = hm.id
+            WHERE u.usage_count > 0
+            ORDER BY u.usage_count DESC, hm.name
+            LIMIT ?
+        ''', (POPULAR_METHODS_LIMIT,)).fetchall()
         
-        cursor.execute('''
-            INSERT INTO hunt_methods (name, description, is_general, category) 
-            VALUES (?, ?, ?, ?)
-        ''', (name, description, is_general, category))
+        columns = ', '.join(STATS_SNAPSHOT_COUNTERS)
+        cursor.execute(f'''
+            INSERT OR REPLACE INTO stats_snapshot
+            (id, {columns}, pokemon_by_generation, popular_methods, updated_at)
+            VALUES (1, {', '.join('?' * len(STATS_SNAPSHOT_COUNTERS))}, ?, ?, CURRENT_TIMESTAMP)
+        ''', (*counters, json.dumps(by_generation), json.dumps(popular_methods, ensure_ascii=False)))
+
+    def get_stats_snapshot(self):
+        """Statistiques globales matérialisées (une seule lecture), listes JSON décodées."""
+        conn = self.get_connection()
+        columns = ', '.join(STATS_SNAPSHOT_COUNTERS)
+        row = conn.execute(f'''
+            SELECT {columns}, pokemon_by_generation, popular_methods, updated_at
+            FROM stats_snapshot WHERE id = 1
+        ''').fetchone()
+        if row is None:
+            return None
+        snapshot = dict(zip(STATS_SNAPSHOT_COUNTERS, row))
+        snapshot['pokemon_by_generation'] = json.loads(row[-3])
+        snapshot['popular_methods'] = json.loads(row[-2])
+        snapshot['updated_at'] = row[-1]
+        return snapshot
+
+    def preload_dimensions(self):
+        """Charge en mémoire les IDs de tous les jeux, méthodes et lieux (une requête par table)."""
+        conn = self.get_connection()
+        games = dict(conn.execute('SELECT name, id FROM games'))
+        hunt_methods = dict(conn.execute('SELECT name, id FROM hunt_methods'))
+        # Doublons historiques (name, region) : garder le plus ancien, comme le SELECT de insert_location
+        locations = {(name, region): location_id for name, region, location_id in conn.execute(
+            'SELECT name, region, MIN(id) FROM locations WHERE region IS NOT NULL GROUP BY name, region')}
         
-        method_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self._dimension_lock:
+            self._dimension_ids = {'games': games, 'hunt_methods': hunt_methods, 'locations': locations}
+        return {table: len(ids) for table, ids in self._dimension_ids.items()}
+
+    def _cached_dimension_id(self, table, key):
+        """Cherche un ID de dimension dans le cache mémoire (compte hit/miss)."""
+        with self._dimension_lock:
+            dimension_id = self._dimension_ids[table].get(key)
+            self.dimension_stats[table]['hits' if dimension_id is not None else 'misses'] += 1
+        return dimension_id
+
+    def _remember_dimension_ids(self, table, ids):
+        """Ajoute des IDs déjà committés au cache mémoire."""
+        if ids:
+            with self._dimension_lock:
+                self._dimension_ids[table].update(ids)
+
+    def insert_pokemon(self, name, number, sprite_url, generation, is_shiny_lock=False, high_quality_image=None, description=None):
+        """Insère un nouveau Pokemon."""
+        with self.writer() as conn:
+            # ✅ NOUVEAU : Une seule requête, l'index UNIQUE (name, generation) gère l'existant
+            inserted = conn.execute('''
+                INSERT INTO pokemon (name, number, sprite_url, generation, is_shiny_lock, high_quality_image, description, tab)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (name, generation) DO NOTHING
+                RETURNING id
+            ''', (name, number, sprite_url, generation, is_shiny_lock, high_quality_image, description,
+                  classify_tab(name))).fetchall()
+            if inserted:
+                self._index_pokemon_name(conn.cursor(), inserted[0][0], name)
+                return inserted[0][0]
+            
+            return conn.execute('SELECT id FROM pokemon WHERE name = ? AND generation = ?',
+                                (name, generation)).fetchone()[0]
+
+    def get_pokemon_id(self, name, generation):
+        """Retourne l'ID d'un Pokemon déjà en base (ou None)."""
+        cursor = self.get_connection().cursor()
+
+        cursor.execute('SELECT id FROM pokemon WHERE name = ? AND generation = ?', (name, generation))
+        existing = cursor.fetchone()
+
+        return existing[0] if existing else None
+
+    def get_pokemon_fingerprint(self, name, generation):
+        """✅ NOUVEAU : Retourne (id, page_hash, details_hash, sprite_url, high_quality_image) d'un Pokemon déjà en base (ou None)."""
+        return self.get_connection().execute(
+            'SELECT id, page_hash, details_hash, sprite_url, high_quality_image FROM pokemon '
+            'WHERE name = ? AND generation = ?',
+            (name, generation)).fetchone()
+
+    def update_pokemon_fingerprint(self, pokemon_id, page_hash):
+        """Enregistre l'empreinte d'une page modifiée dont les données extraites sont identiques."""
+        with self.writer() as conn:
+            conn.execute('UPDATE pokemon SET page_hash = ? WHERE id = ?', (page_hash, pokemon_id))
+
+    def update_pokemon_sprite(self, pokemon_id, sprite_url):
+        """Enregistre un sprite obtenu pour un Pokemon dont la page est inchangée (pas de reparsing)."""
+        with self.writer() as conn:
+            conn.execute('UPDATE pokemon SET sprite_url = ? WHERE id = ?', (sprite_url, pokemon_id))
+
+    def insert_hunt_method(self, name, description=None, is_general=False, category=None):
+        """Insère une méthode de chasse avec support des méthodes générales."""
+        cached_id = self._cached_dimension_id('hunt_methods', name)
+        if cached_id is not None:
+            return cached_id
+        
+        with self.writer() as conn:
+            inserted = conn.execute('''
+                INSERT INTO hunt_methods (name, description, is_general, category) 
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (name) DO NOTHING
+                RETURNING id
+            ''', (name, description, is_general, category)).fetchall()
+            if inserted:
+                method_id = inserted[0][0]
+            else:
+                method_id = conn.execute('SELECT id FROM hunt_methods WHERE name = ?', (name,)).fetchone()[0]
+        
+        self._remember_dimension_ids('hunt_methods', {name: method_id})
         return method_id
 
     def insert_game(self, name, generation):
         """Insère un jeu."""
-        conn = self.create_connection()
-        cursor = conn.cursor()
+        cached_id = self._cached_dimension_id('games', name)
+        if cached_id is not None:
+            return cached_id
         
-        cursor.execute('SELECT id FROM games WHERE name = ?', (name,))
-        existing = cursor.fetchone()
+        with self.writer() as conn:
+            inserted = conn.execute('''
+                INSERT INTO games (name, generation) VALUES (?, ?)
+                ON CONFLICT (name) DO NOTHING
+                RETURNING id
+            ''', (name, generation)).fetchall()
+            if inserted:
+                game_id = inserted[0][0]
+            else:
+                game_id = conn.execute('SELECT id FROM games WHERE name = ?', (name,)).fetchone()[0]
         
-        if existing:
-            conn.close()
-            return existing[0]
-        
-        cursor.execute('INSERT INTO games (name, generation) VALUES (?, ?)', (name, generation))
-        game_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        self._remember_dimension_ids('games', {name: game_id})
         return game_id
 
     def insert_location(self, name, region=None, description=None):
         """Insère une localisation."""
-        conn = self.create_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT id FROM locations WHERE name = ? AND region = ?', (name, region))
-        existing = cursor.fetchone()
+        # region = NULL ne correspond jamais en SQL : ces lieux ne passent pas par le cache
+        if region is not None:
+            cached_id = self._cached_dimension_id('locations', (name, region))
+            if cached_id is not None:
+                return cached_id
         
-        if existing:
-            conn.close()
-            return existing[0]
+        with self.writer() as conn:
+            location_id, _ = self._insert_location_returning_id(conn.cursor(), name, region, description)
         
-        cursor.execute('INSERT INTO locations (name, region, description) VALUES (?, ?, ?)', 
-                      (name, region, description))
-        location_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        if region is not None:
+            self._remember_dimension_ids('locations', {(name, region): location_id})
         return location_id
 
     def link_pokemon_general_method(self, pokemon_id, hunt_method_id, conditions=None, notes=None):
         """Lie un Pokemon à une méthode GÉNÉRALE (ex: Masuda)."""
-        conn = self.create_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO pokemon_general_methods 
-            (pokemon_id, hunt_method_id, conditions, notes)
-            VALUES (?, ?, ?, ?)
-        ''', (pokemon_id, hunt_method_id, conditions, notes))
-        
-        conn.commit()
-        conn.close()
+        with self.writer() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO pokemon_general_methods 
+                (pokemon_id, hunt_method_id, conditions, notes)
+                VALUES (?, ?, ?, ?)
+            ''', (pokemon_id, hunt_method_id, conditions, notes))
 
     def link_pokemon_specific_method(self, pokemon_id, hunt_method_id, game_id, location_id=None, 
                                    probability=None, conditions=None, notes=None):
         """Lie un Pokemon à une méthode SPÉCIFIQUE à un jeu/lieu."""
-        conn = self.create_connection()
-        cursor = conn.cursor()
+        with self.writer() as conn:
+            # ✅ NOUVEAU : Index UNIQUE (pokemon, jeu, méthode, lieu) : un lien existant est mis à jour
+            psm_id = conn.execute('''
+                INSERT INTO pokemon_specific_methods 
+                (pokemon_id, hunt_method_id, game_id, location_id, probability, conditions, notes)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (pokemon_id, game_id, hunt_method_id, location_id) DO UPDATE SET
+                    probability = excluded.probability, conditions = excluded.conditions, notes = excluded.notes
+                RETURNING id
+            ''', (pokemon_id, hunt_method_id, game_id, location_id, probability, conditions, notes)).fetchone()[0]
+            conn.execute('DELETE FROM pokemon_method_odds WHERE psm_id = ?', (psm_id,))
+            self._store_method_odds(conn.cursor(), [pokemon_id])
+
+    def save_pokemon_bulk(self, payloads):
+        """Persiste plusieurs Pokemon complets (fiche + jeux + méthodes + lieux) en UNE seule transaction.
+
+        Chaque payload référence les dimensions par clé naturelle :
+          'pokemon': arguments de insert_pokemon
+          'games': [(nom, génération)]
+          'hunt_methods': [(nom, description, is_general, catégorie)]
+          'locations': [(nom, région, description)]
+          'general_links': [(méthode, conditions, notes)]
+          'specific_links': [(méthode, jeu, (lieu, région) ou None, probabilité, conditions, notes)]
+        Un Pokemon déjà en base est mis à jour par différence (voir _save_pokemon_payload).
+        Retourne [(pokemon_id, lignes écrites)] dans l'ordre des payloads.
+        """
+        # IDs de dimension découverts pendant la transaction : mis en cache seulement après le commit
+        pending_ids = {table: {} for table in DIMENSION_TABLES}
+        unlinked_method_ids = set()
+        # ✅ NOUVEAU : Un seul commit (ou rollback complet) pour tout le lot, sur la connexion d'écriture
+        with self.writer() as conn:
+            cursor = conn.cursor()
+            results = [self._save_pokemon_payload(cursor, payload, pending_ids, unlinked_method_ids)
+                       for payload in payloads]
+            # ✅ NOUVEAU : Compteurs matérialisés mis à jour dans la même transaction
+            self._refresh_summaries(cursor, [pokemon_id for pokemon_id, _ in results], unlinked_method_ids)
+            # ✅ NOUVEAU : Taux numériques des nouvelles méthodes spécifiques
+            self._store_method_odds(cursor, [pokemon_id for pokemon_id, _ in results])
         
-        cursor.execute('''
-            INSERT INTO pokemon_specific_methods 
+        for table, ids in pending_ids.items():
+            self._remember_dimension_ids(table, ids)
+        return results
+
+    def save_pokemon_payload(self, payload):
+        """Persiste un Pokemon complet en une seule transaction (voir save_pokemon_bulk)."""
+        return self.save_pokemon_bulk([payload])[0]
+
+    def _save_pokemon_payload(self, cursor, payload, pending_ids, unlinked_method_ids=None):
+        """Écrit un payload sur un curseur déjà en transaction (sans commit).
+
+        ✅ NOUVEAU : Pour un Pokemon déjà en base, seules les différences sont écrites (fiche modifiée,
+        liens ajoutés / mis à jour / supprimés) ; les méthodes dont un lien disparaît sont ajoutées
+        à unlinked_method_ids (compteurs d'utilisation à recalculer).
+        """
+        pokemon = payload['pokemon']
+        rows_written = 0
+
+        cursor.execute(f'''
+            SELECT id, {', '.join(POKEMON_DIFF_FIELDS)} FROM pokemon WHERE name = ? AND generation = ?
+        ''', (pokemon['name'], pokemon['generation']))
+        existing = cursor.fetchone()
+        if existing:
+            pokemon_id = existing[0]
+            # Fiche : champs connus dont la valeur a changé (un champ absent ou None ne l'efface pas)
+            changes = {
+                field: pokemon[field]
+                for field, stored in zip(POKEMON_DIFF_FIELDS, existing[1:])
+                if pokemon.get(field) is not None
+                and (int(pokemon[field]) if field == 'is_shiny_lock' else pokemon[field]) != stored
+            }
+            if changes:
+                cursor.execute(f'''
+                    UPDATE pokemon SET {', '.join(f'{field} = ?' for field in changes)} WHERE id = ?
+                ''', (*changes.values(), pokemon_id))
+                rows_written += 1
+        else:
+            cursor.execute('''
+                INSERT INTO pokemon (name, number, sprite_url, generation, is_shiny_lock, high_quality_image, description, tab,
+                                     page_hash, details_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (pokemon['name'], pokemon.get('number'), pokemon.get('sprite_url'), pokemon['generation'],
+                  pokemon.get('is_shiny_lock', False), pokemon.get('high_quality_image'), pokemon.get('description'),
+                  classify_tab(pokemon['name']), pokemon.get('page_hash'), pokemon.get('details_hash')))
+            pokemon_id = cursor.lastrowid
+            self._index_pokemon_name(cursor, pokemon_id, pokemon['name'])
+            rows_written += 1
+
+        # Dimensions à nom UNIQUE : une lecture des IDs existants, puis insertion en lot des absents
+        game_ids, inserted = self._get_or_create_by_name(
+            cursor, 'games', ('name', 'generation'), payload['games'], pending_ids['games'])
+        rows_written += inserted
+        method_ids, inserted = self._get_or_create_by_name(
+            cursor, 'hunt_methods', ('name', 'description', 'is_general', 'category'), payload['hunt_methods'],
+            pending_ids['hunt_methods'])
+        rows_written += inserted
+
+        # Localisations : cache, sinon insertion avec ON CONFLICT (name, region)
+        location_ids = {}
+        for name, region, description in payload['locations']:
+            key = (name, region)
+            if key in location_ids:
+                continue
+            if region is not None:
+                cached_id = self._cached_dimension_id('locations', key)
+                if cached_id is not None:
+                    location_ids[key] = cached_id
+                    continue
+            location_ids[key], inserted = self._insert_location_returning_id(cursor, name, region, description)
+            rows_written += inserted
+            if region is not None:
+                pending_ids['locations'][key] = location_ids[key]
+
+        # Méthodes générales : une ligne par méthode (la dernière l'emporte, comme INSERT OR REPLACE)
+        general_rows = {method_ids[method]: (conditions, notes) for method, conditions, notes in payload['general_links']}
+        stored_general = {}
+        if existing:
+            cursor.execute('SELECT hunt_method_id, conditions, notes FROM pokemon_general_methods WHERE pokemon_id = ?',
+                           (pokemon_id,))
+            stored_general = {method_id: (conditions, notes) for method_id, conditions, notes in cursor.fetchall()}
+        removed_general = [method_id for method_id in stored_general if method_id not in general_rows]
+        cursor.executemany('DELETE FROM pokemon_general_methods WHERE pokemon_id = ? AND hunt_method_id = ?',
+                           [(pokemon_id, method_id) for method_id in removed_general])
+        rows_written += len(removed_general)
+        changed_general = [(pokemon_id, method_id, *values) for method_id, values in general_rows.items()
+                           if stored_general.get(method_id) != values]
+        cursor.executemany('''
+            INSERT OR REPLACE INTO pokemon_general_methods
+            (pokemon_id, hunt_method_id, conditions, notes)
+            VALUES (?, ?, ?, ?)
+        ''', changed_general)
+        rows_written += len(changed_general)
+
+        # Méthodes spécifiques par clé naturelle (méthode, jeu, lieu) ; la première ligne d'une clé l'emporte.
+        # Les méthodes dont le jeu n'a pas été enregistré ne sont pas liées
+        specific_rows = {}
+        for method, game, location, probability, conditions, notes in payload['specific_links']:
+            if game in game_ids:
+                key = (method_ids[method], game_ids[game], location_ids.get(location) if location else None)
+                specific_rows.setdefault(key, (probability, conditions, notes))
+        stored_specific = {}
+        if existing:
+            cursor.execute('''
+                SELECT id, hunt_method_id, game_id, location_id, probability, conditions, notes
+                FROM pokemon_specific_methods WHERE pokemon_id = ? ORDER BY id
+            ''', (pokemon_id,))
+            for psm_id, method_id, game_id, location_id, *values in cursor.fetchall():
+                stored_specific.setdefault((method_id, game_id, location_id), []).append((psm_id, tuple(values)))
+
+        removed_ids, updates = [], []
+        for key, stored_rows in stored_specific.items():
+            values = specific_rows.get(key)
+            if values is None:
+                removed_ids.extend(psm_id for psm_id, _ in stored_rows)
+                continue
+            # Lignes NULL-lieu en double (hors index UNIQUE) : seule la première est conservée
+            (psm_id, stored_values), *duplicates = stored_rows
+            removed_ids.extend(psm_id for psm_id, _ in duplicates)
+            if stored_values != values:
+                updates.append((*values, psm_id))
+        removed_methods = {key[0] for key in stored_specific if key not in specific_rows}
+
+        cursor.executemany('DELETE FROM pokemon_method_odds WHERE psm_id = ?',
+                           [(psm_id,) for psm_id in removed_ids] + [(update[-1],) for update in updates])
+        cursor.executemany('DELETE FROM pokemon_specific_methods WHERE id = ?', [(psm_id,) for psm_id in removed_ids])
+        cursor.executemany('UPDATE pokemon_specific_methods SET probability = ?, conditions = ?, notes = ? WHERE id = ?',
+                           updates)
+        new_rows = [(pokemon_id, *key, *values) for key, values in specific_rows.items() if key not in stored_specific]
+        cursor.executemany('''
+            INSERT INTO pokemon_specific_methods
             (pokemon_id, hunt_method_id, game_id, location_id, probability, conditions, notes)
             VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (pokemon_id, hunt_method_id, game_id, location_id, probability, conditions, notes))
+        ''', new_rows)
+        rows_written += len(removed_ids) + len(updates) + len(new_rows)
+
+        if unlinked_method_ids is not None:
+            unlinked_method_ids.update(removed_general)
+            unlinked_method_ids.update(removed_methods)
+        return pokemon_id, rows_written
+
+    def _get_or_create_by_name(self, cursor, table, columns, rows, pending_ids):
+        """Retourne ({nom: id}, lignes insérées) pour une dimension à nom UNIQUE, en insérant les absents.
+
+        À nom égal, le premier tuple l'emporte (comme des appels insert_* successifs).
+        Les IDs lus ou créés en base sont ajoutés à pending_ids (mis en cache après commit).
+        """
+        ids = {}
+        uncached = []
+        for name in dict.fromkeys(row[0] for row in rows):
+            cached_id = self._cached_dimension_id(table, name)
+            if cached_id is not None:
+                ids[name] = cached_id
+            else:
+                uncached.append(name)
+        if not uncached:
+            return ids, 0
         
-        conn.commit()
-        conn.close()
+        ids.update(self._ids_by_name(cursor, table, uncached))
+
+        missing = {}
+        for row in rows:
+            if row[0] not in ids and row[0] not in missing:
+                missing[row[0]] = row
+        if missing:
+            placeholders = ', '.join('?' * len(columns))
+            cursor.executemany(f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({placeholders}) '
+                               f'ON CONFLICT (name) DO NOTHING', list(missing.values()))
+            ids.update(self._ids_by_name(cursor, table, list(missing)))
+
+        pending_ids.update((name, ids[name]) for name in uncached)
+        return ids, len(missing)
+
+    def _insert_location_returning_id(self, cursor, name, region, description):
+        """Insère un lieu (ou retrouve l'existant) via l'index UNIQUE (name, region) ; retourne (id, inséré)."""
+        inserted = cursor.execute('''
+            INSERT INTO locations (name, region, description) VALUES (?, ?, ?)
+            ON CONFLICT (name, region) DO NOTHING
+            RETURNING id
+        ''', (name, region, description)).fetchall()
+        if inserted:
+            return inserted[0][0], True
+        return cursor.execute('SELECT id FROM locations WHERE name = ? AND region = ?',
+                              (name, region)).fetchone()[0], False
+
+    def _ids_by_name(self, cursor, table, names):
+        """Retourne {nom: id} pour les noms déjà présents (requêtes IN par paquets de 500)."""
+        ids = {}
+        names = list(dict.fromkeys(names))
+        for start in range(0, len(names), 500):
+            chunk = names[start:start + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            cursor.execute(f'SELECT name, id FROM {table} WHERE name IN ({placeholders})', chunk)
+            ids.update(cursor.fetchall())
+        return ids
 
     def get_pokemon_methods(self, pokemon_id):
         """Récupère toutes les méthodes d'un Pokemon (générales + spécifiques)."""
-        conn = self.create_connection()
-        cursor = conn.cursor()
+        cursor = self.get_connection().cursor()
         
         # Méthodes générales
         cursor.execute('''
@@ -239,16 +1247,70 @@ class DatabaseManagerV2:
             JOIN games g ON psm.game_id = g.id
             LEFT JOIN locations l ON psm.location_id = l.id
             WHERE psm.pokemon_id = ?
+            ORDER BY psm.id
         ''', (pokemon_id,))
         specific_methods = cursor.fetchall()
         
-        conn.close()
         return {
             'general': general_methods,
             'specific': specific_methods
         }
 
 if __name__ == "__main__":
+    import sys
+    
+    # ✅ NOUVEAU : python database_v2.py check-indexes [base.db] -> vérifie les plans de requêtes
+    if len(sys.argv) >= 2 and sys.argv[1] == "check-indexes":
+        db = DatabaseManagerV2(sys.argv[2] if len(sys.argv) >= 3 else "pokemon_shasse_v2.db")
+        results = db.check_query_plans()
+        for result in results:
+            print(f"{'✅' if result['ok'] else '❌'} {result['label']} -> {result['index']}")
+            for detail in result['plan']:
+                print(f"      {detail}")
+        failed = [result for result in results if not result['ok']]
+        print(f"{len(results) - len(failed)}/{len(results)} requêtes utilisent l'index attendu")
+        sys.exit(1 if failed else 0)
+    
+    # ✅ NOUVEAU : python database_v2.py rebuild-summary [base.db] -> recalcule les compteurs matérialisés
+    if len(sys.argv) >= 2 and sys.argv[1] == "rebuild-summary":
+        db = DatabaseManagerV2(sys.argv[2] if len(sys.argv) >= 3 else "pokemon_shasse_v2.db")
+        snapshot = db.rebuild_summaries()
+        print(f"✅ Compteurs recalculés : {snapshot['total_pokemon']} Pokemon, "
+              f"{snapshot['total_specific_method_associations']} méthodes spécifiques, "
+              f"{snapshot['total_general_method_associations']} méthodes générales")
+        sys.exit(0)
+    
+    # ✅ NOUVEAU : python database_v2.py reclassify [base.db] -> recalcule les onglets après changement des règles
+    if len(sys.argv) >= 2 and sys.argv[1] == "reclassify":
+        db = DatabaseManagerV2(sys.argv[2] if len(sys.argv) >= 3 else "pokemon_shasse_v2.db")
+        changed = db.reclassify_pokemon()
+        print(f"✅ {changed} Pokemon reclassé(s)")
+        for tab, count in db.get_tab_counts():
+            print(f"   {tab}: {count}")
+        sys.exit(0)
+    
+    # ✅ NOUVEAU : python database_v2.py backfill-odds [base.db] -> réanalyse les probabilités en taux numériques
+    if len(sys.argv) >= 2 and sys.argv[1] == "backfill-odds":
+        db = DatabaseManagerV2(sys.argv[2] if len(sys.argv) >= 3 else "pokemon_shasse_v2.db")
+        written = db.backfill_method_odds()
+        total, *filled = db.get_odds_coverage()
+        print(f"✅ {written} méthodes spécifiques analysées")
+        for column, count in zip(ODDS_COLUMNS, filled):
+            print(f"   {column}: {count}/{total}")
+        sys.exit(0)
+    
+    # ✅ NOUVEAU : python database_v2.py scrape-jobs [base.db] -> état de la file de scraping
+    if len(sys.argv) >= 2 and sys.argv[1] == "scrape-jobs":
+        db = DatabaseManagerV2(sys.argv[2] if len(sys.argv) >= 3 else "pokemon_shasse_v2.db")
+        counts = {}
+        for generation, state, count in db.get_scrape_job_counts():
+            counts.setdefault(generation, {})[state] = count
+        for generation, states in counts.items():
+            print(f"   Gen {generation}: " + ", ".join(f"{state} {count}" for state, count in sorted(states.items())))
+        if not counts:
+            print("   Aucun job (lancer pokemon_scraper_v2.py all ou gen <n>)")
+        sys.exit(0)
+    
     # Test du nouveau schéma
     db = DatabaseManagerV2()
     print("🧪 Test du nouveau schéma BDD...")
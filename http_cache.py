@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Cache HTTP persistant pour le scraper pokebip
+Stocke le corps des réponses avec leurs en-têtes ETag / Last-Modified pour permettre
+la revalidation conditionnelle (If-None-Match / If-Modified-Since).
+Éviction LRU quand la taille totale dépasse la limite configurée.
+WAL + synchronous=NORMAL (mêmes réglages que database_v2) : pas de fsync par écriture.
+Une lecture n'écrit rien : le dernier accès est noté en mémoire et écrit par lot.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+from database_v2 import SQLITE_PRAGMAS
+
+# Derniers accès gardés en mémoire, écrits par lot (store, flush, close) au-delà de ce nombre d'URL
+ACCESS_FLUSH_THRESHOLD = 256
+
+
+class CacheMissError(requests.exceptions.RequestException):
+    """URL absente du cache alors que le mode hors-ligne (--cache-only) est actif."""
+
+
+class CachedResponse:
+    """Réponse servie depuis le cache (304 ou mode hors-ligne), compatible avec requests.Response."""
+
+    def __init__(self, url, entry, not_modified=True):
+        self.url = url
+        self.status_code = 200
+        self.ok = True
+        self.content = entry['body']
+        self.encoding = entry['encoding']
+        self.headers = {}
+        if entry['etag']:
+            self.headers['ETag'] = entry['etag']
+        if entry['last_modified']:
+            self.headers['Last-Modified'] = entry['last_modified']
+        self.not_modified = not_modified
+        self.from_cache = True
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def raise_for_status(self):
+        return None
+
+
+class HttpCache:
+    """Cache de réponses HTTP sur disque, indexé par URL (SQLite, thread-safe)."""
+
+    def __init__(self, path="cache/http_cache.db", max_size_mb=500):
+        self.path = path
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        for pragma, value in SQLITE_PRAGMAS:
+            self._conn.execute(f'PRAGMA {pragma} = {value}')
+        self._pending_access = {}
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                encoding TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)')
+        self._conn.commit()
+        self.total_size = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, url):
+        """Retourne l'entrée en cache pour une URL (ou None) et note son dernier accès (écrit par lot)."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT body, encoding, etag, last_modified FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._pending_access[url] = time.time()
+            if len(self._pending_access) >= ACCESS_FLUSH_THRESHOLD:
+                self._flush_access_locked()
+                self._conn.commit()
+        body, encoding, etag, last_modified = row
+        return {'body': body, 'encoding': encoding, 'etag': etag, 'last_modified': last_modified}
+
+    @staticmethod
+    def conditional_headers(entry):
+        """En-têtes de revalidation conditionnelle pour une entrée en cache."""
+        headers = {}
+        if entry:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, response):
+        """Enregistre une réponse 200 (corps + validateurs) puis applique l'éviction LRU."""
+        body = response.content
+        encoding = response.encoding or response.apparent_encoding
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        now = time.time()
+
+        with self._lock:
+            previous = self._conn.execute('SELECT size FROM responses WHERE url = ?', (url,)).fetchone()
+            self._conn.execute('''
+                INSERT OR REPLACE INTO responses
+                (url, body, encoding, etag, last_modified, size, fetched_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (url, body, encoding, etag, last_modified, len(body), now, now))
+            self.total_size += len(body) - (previous[0] if previous else 0)
+            self._pending_access.pop(url, None)
+            self._flush_access_locked()
+            self._evict_locked()
+            self._conn.commit()
+
+    def flush(self):
+        """Écrit les derniers accès notés en mémoire."""
+        with self._lock:
+            self._flush_access_locked()
+            self._conn.commit()
+
+    def _flush_access_locked(self):
+        """Reporte les derniers accès en mémoire dans la table (avant éviction, sans commit)."""
+        if self._pending_access:
+            self._conn.executemany('UPDATE responses SET last_access = ? WHERE url = ?',
+                                   [(accessed, url) for url, accessed in self._pending_access.items()])
+            self._pending_access.clear()
+
+    def _evict_locked(self):
+        """Supprime les entrées les moins récemment utilisées jusqu'à repasser sous la limite."""
+        if self.total_size <= self.max_size_bytes:
+            return
+        cursor = self._conn.execute('SELECT url, size FROM responses ORDER BY last_access')
+        to_delete = []
+        for url, size in cursor:
+            if self.total_size <= self.max_size_bytes:
+                break
+            to_delete.append((url,))
+            self.total_size -= size
+        self._conn.executemany('DELETE FROM responses WHERE url = ?', to_delete)
+
+    def close(self):
+        with self._lock:
+            self._flush_access_locked()
+            self._conn.commit()
+            self._conn.close()
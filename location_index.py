@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Index inversé des lieux en mémoire : lieu -> jeu -> [Pokemon, méthode, taux]
+- Précalculé depuis pokemon_specific_methods (+ taux numériques de pokemon_method_odds)
+- Clé = nom de lieu de base normalisé : "Mont Argenté | (1er étage)" et "Mont Argenté (grotte)"
+  sont regroupés sous "mont argente", la zone précise reste dans chaque entrée
+- Lignes stockées en tuples, converties en dictionnaires seulement à la réponse
+"""
+
+import time
+from bisect import bisect_left
+
+from database_v2 import fold_search_text
+
+LOCATION_SUGGESTIONS_LIMIT = 10
+
+# Champs d'une entrée (ordre des tuples stockés)
+LOCATION_ENTRY_FIELDS = ('pokemon_id', 'pokemon', 'number', 'method', 'area', 'probability', 'encounter_rate')
+
+
+def location_base_name(name):
+    """Lieu sans précision de zone : "Tour Pokémon | (5e étage)" -> "Tour Pokémon"."""
+    return name.split(' | ')[0].split(' (')[0].strip()
+
+
+def location_key(name):
+    """Clé de recherche d'un lieu (base normalisée, casse et accents ignorés)."""
+    return fold_search_text(location_base_name(name))
+
+
+class LocationIndex:
+    """Index immuable construit depuis des lignes triées par jeu puis par taux de rencontre décroissant."""
+
+    def __init__(self, rows):
+        # clé -> nom affiché, et clé -> {(génération, jeu): [entrées]}
+        self.names = {}
+        self.games = {}
+        for location, game, generation, *entry in rows:
+            key = location_key(location)
+            if not key:
+                continue
+            self.names.setdefault(key, location_base_name(location))
+            self.games.setdefault(key, {}).setdefault((generation, game), []).append(tuple(entry))
+        self.keys = sorted(self.names)
+
+    def lookup(self, name, game=None):
+        """Pokemon chassables dans un lieu, groupés par jeu ; None si le lieu est inconnu."""
+        key = location_key(name)
+        games = self.games.get(key)
+        if games is None:
+            return None
+        return {
+            'location': self.names[key],
+            'games': [
+                {
+                    'game': game_name,
+                    'generation': generation,
+                    'pokemon': [dict(zip(LOCATION_ENTRY_FIELDS, entry)) for entry in entries],
+                }
+                for (generation, game_name), entries in games.items()
+                if game is None or game_name == game
+            ],
+        }
+
+    def game_names(self, name):
+        """Jeux ayant des Pokemon dans un lieu (ordre de l'index), pour un filtre ?game= inconnu."""
+        return [game_name for _, game_name in self.games.get(location_key(name), {})]
+
+    def suggest(self, name, limit=LOCATION_SUGGESTIONS_LIMIT):
+        """Noms de lieux commençant par name (pour un lieu introuvable)."""
+        key = location_key(name)
+        suggestions = []
+        position = bisect_left(self.keys, key)
+        while position < len(self.keys) and self.keys[position].startswith(key) and len(suggestions) < limit:
+            suggestions.append(self.names[self.keys[position]])
+            position += 1
+        return suggestions
+
+    @classmethod
+    def from_connection(cls, conn):
+        """Construit l'index depuis pokemon_specific_methods."""
+        return cls(conn.execute('''
+            SELECT l.name, g.name, g.generation,
+                   p.id, p.name, p.number, hm.name, l.name, psm.probability, o.encounter_rate
+            FROM pokemon_specific_methods psm
+            JOIN locations l ON l.id = psm.location_id
+            JOIN games g ON g.id = psm.game_id
+            JOIN pokemon p ON p.id = psm.pokemon_id
+            JOIN hunt_methods hm ON hm.id = psm.hunt_method_id
+            LEFT JOIN pokemon_method_odds o ON o.psm_id = psm.id
+            ORDER BY g.generation, g.id, o.encounter_rate DESC, psm.id
+        '''))
+
+
+if __name__ == "__main__":
+    import sys
+
+    from database_v2 import DatabaseManagerV2
+
+    # python location_index.py [base.db] [lieu] -> temps de construction, puis contenu d'un lieu
+    db = DatabaseManagerV2(sys.argv[1] if len(sys.argv) >= 2 else "pokemon_shasse_v2.db")
+    start = time.perf_counter()
+    index = LocationIndex.from_connection(db.get_connection())
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"📊 {len(index.keys)} lieux indexés (construction {build_ms:.0f} ms)")
+
+    if len(sys.argv) >= 3:
+        result = index.lookup(sys.argv[2])
+        if result is None:
+            print(f"❌ Lieu inconnu: {sys.argv[2]} (suggestions: {', '.join(index.suggest(sys.argv[2])) or 'aucune'})")
+            sys.exit(1)
+        for game in result['games']:
+            print(f"🎮 {game['game']} ({game['generation']}G)")
+            for entry in game['pokemon']:
+                print(f"   {entry['pokemon']} - {entry['method']} - {entry['area']} ({entry['probability']})")
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Modèle de probabilités des méthodes spécifiques
+- Analyse le texte libre de pokemon_specific_methods.probability (produit par
+  clean_probability_smart / extract_probability_from_span) en taux numériques :
+  "100% | TC = 10% | Capture : 50.28% / tour | Fuite : 15% / tour"
+  -> rencontre 100, TC 10, capture 50.28, fuite 15 (en %)
+- Stocké dans pokemon_method_odds (voir DatabaseManagerV2) pour trier et filtrer en SQL
+- Nombre de rencontres attendu avant le premier shiny, calculé en une passe vectorisée
+  (NumPy si installé, sinon tableaux array('d')) sur toutes les lignes à classer
+"""
+
+import math
+import re
+from array import array
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Colonnes de pokemon_method_odds, dans l'ordre des tuples retournés par parse_probability
+ODDS_COLUMNS = ('encounter_rate', 'tc_rate', 'capture_rate', 'flee_rate')
+
+PERCENT_PATTERN = r'(\d+(?:[.,]\d+)?)\s*%'
+
+# Taux étiquetés ; le premier pourcentage restant (sans étiquette) est le taux de rencontre
+LABELLED_RATE_PATTERNS = (
+    ('tc_rate', re.compile(r'TC\s*=\s*' + PERCENT_PATTERN, re.IGNORECASE)),
+    ('capture_rate', re.compile(r'Capture\s*:\s*' + PERCENT_PATTERN, re.IGNORECASE)),
+    ('flee_rate', re.compile(r'Fuite\s*:\s*' + PERCENT_PATTERN, re.IGNORECASE)),
+)
+BARE_PERCENT = re.compile(PERCENT_PATTERN)
+
+
+def _percent(raw):
+    """'50,28' ou '50.28' -> 50.28"""
+    return float(raw.replace(',', '.'))
+
+
+def parse_probability(text):
+    """Taux (rencontre, TC, capture, fuite) en % extraits du texte ; None pour un taux absent."""
+    rates = dict.fromkeys(ODDS_COLUMNS)
+    if not text:
+        return tuple(rates.values())
+
+    remaining = text
+    for column, pattern in LABELLED_RATE_PATTERNS:
+        match = pattern.search(remaining)
+        if match:
+            rates[column] = _percent(match.group(1))
+        # Tous les taux étiquetés sont retirés avant de chercher le taux de rencontre
+        remaining = pattern.sub(' ', remaining)
+
+    match = BARE_PERCENT.search(remaining)
+    if match:
+        rates['encounter_rate'] = _percent(match.group(1))
+    return tuple(rates.values())
+
+
+# ✅ NOUVEAU : Taux shiny par génération du jeu (1 tirage = 1 chance sur le dénominateur)
+SHINY_MIN_GENERATION = 2             # Pas de shiny en génération 1
+SHINY_DENOMINATOR_OLD = 8192         # Générations 2 à 5
+SHINY_DENOMINATOR = 4096             # Depuis la génération 6
+SHINY_DENOMINATOR_GENERATION = 6
+CHARM_MIN_GENERATION = 5             # Charme Chroma : +2 tirages
+CHARM_EXTRA_ROLLS = 2
+MASUDA_MIN_GENERATION = 4            # Masuda (œufs seulement) : +4 tirages en 4G, +5 ensuite
+MASUDA_FULL_GENERATION = 5
+MASUDA_EXTRA_ROLLS_GEN4 = 4
+MASUDA_EXTRA_ROLLS = 5
+DEFAULT_SECONDS_PER_ENCOUNTER = 30   # Durée moyenne estimée d'une rencontre / d'un reset
+
+
+def _expected_encounters_numpy(encounter_rates, generations, charm, masuda):
+    """Version NumPy de expected_encounters."""
+    rates = np.array(encounter_rates, dtype=np.float64)  # None -> nan
+    gens = np.asarray(generations, dtype=np.int64)
+    charm = np.asarray(charm, dtype=bool) & (gens >= CHARM_MIN_GENERATION)
+    masuda = np.asarray(masuda, dtype=bool) & (gens >= MASUDA_MIN_GENERATION)
+
+    rolls = (1 + np.where(charm, CHARM_EXTRA_ROLLS, 0)
+             + np.where(masuda, np.where(gens >= MASUDA_FULL_GENERATION, MASUDA_EXTRA_ROLLS, MASUDA_EXTRA_ROLLS_GEN4), 0))
+    denominators = np.where(gens >= SHINY_DENOMINATOR_GENERATION, SHINY_DENOMINATOR, SHINY_DENOMINATOR_OLD)
+    chance = rolls / denominators * rates / 100
+    valid = (gens >= SHINY_MIN_GENERATION) & (chance > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(valid, 1 / chance, np.nan)
+
+
+def _expected_encounters_array(encounter_rates, generations, charm, masuda):
+    """Version sans NumPy de expected_encounters (array('d'), nan si incalculable)."""
+    result = array('d', bytes(8 * len(encounter_rates)))
+    for i, (rate, gen, has_charm, has_masuda) in enumerate(zip(encounter_rates, generations, charm, masuda)):
+        if rate is None or rate <= 0 or gen < SHINY_MIN_GENERATION:
+            result[i] = math.nan
+            continue
+        rolls = 1
+        if has_charm and gen >= CHARM_MIN_GENERATION:
+            rolls += CHARM_EXTRA_ROLLS
+        if has_masuda and gen >= MASUDA_MIN_GENERATION:
+            rolls += MASUDA_EXTRA_ROLLS if gen >= MASUDA_FULL_GENERATION else MASUDA_EXTRA_ROLLS_GEN4
+        denominator = SHINY_DENOMINATOR if gen >= SHINY_DENOMINATOR_GENERATION else SHINY_DENOMINATOR_OLD
+        result[i] = denominator * 100 / (rolls * rate)
+    return result
+
+
+def expected_encounters(encounter_rates, generations, charm, masuda):
+    """Rencontres attendues avant le premier shiny pour chaque ligne (nan si pas de shiny ou taux inconnu).
+
+    encounter_rates : % de rencontre du Pokemon à cet endroit (None accepté)
+    generations : génération du jeu ; charm / masuda : bonus applicables à la ligne
+    """
+    if NUMPY_AVAILABLE:
+        return _expected_encounters_numpy(encounter_rates, generations, charm, masuda)
+    return _expected_encounters_array(encounter_rates, generations, charm, masuda)
+
+
+def _rank_order(expected):
+    """Indices triés par rencontres attendues croissantes (nan en dernier, tri stable)."""
+    if NUMPY_AVAILABLE:
+        return np.argsort(expected, kind='stable').tolist()
+    keys = [math.inf if math.isnan(value) else value for value in expected]
+    return sorted(range(len(keys)), key=keys.__getitem__)
+
+
+def rank_odds(rows, seconds_per_encounter=DEFAULT_SECONDS_PER_ENCOUNTER, use_charm=True, best_per_pokemon=False):
+    """Classe les lignes de DatabaseManagerV2.get_odds_inputs, de la plus rapide à la plus lente.
+
+    Masuda ne s'applique qu'aux lignes de reproduction (catégorie breeding) d'un Pokemon qui l'autorise.
+    best_per_pokemon : ne garde que la meilleure ligne de chaque Pokemon (classement d'un jeu).
+    """
+    if not rows:
+        return []
+    expected = expected_encounters(
+        [row['encounter_rate'] for row in rows],
+        [row['game_generation'] for row in rows],
+        [use_charm and row['has_charm'] for row in rows],
+        [row['has_masuda'] and row['is_breeding'] for row in rows])
+
+    values = expected.tolist()
+    ranked = []
+    seen = set()
+    for i in _rank_order(expected):
+        row = rows[i]
+        if best_per_pokemon:
+            if row['pokemon_id'] in seen:
+                continue
+            seen.add(row['pokemon_id'])
+        encounters = None if math.isnan(values[i]) else values[i]
+        ranked.append({
+            'pokemon': row['pokemon'],
+            'number': row['number'],
+            'game': row['game'],
+            'game_generation': row['game_generation'],
+            'method': row['method'],
+            'location': row['location'],
+            'probability': row['probability'],
+            'encounter_rate': row['encounter_rate'],
+            'expected_encounters': round(encounters, 1) if encounters is not None else None,
+            'expected_hours': round(encounters * seconds_per_encounter / 3600, 2) if encounters is not None else None,
+        })
+    return ranked
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from database_v2 import DatabaseManagerV2
+
+    # ✅ NOUVEAU : python odds_model.py rank [base.db] [jeu] -> classe toute la base (ou un jeu) par rencontres attendues
+    if len(sys.argv) >= 2 and sys.argv[1] == "rank":
+        db = DatabaseManagerV2(sys.argv[2] if len(sys.argv) >= 3 else "pokemon_shasse_v2.db")
+        game_id = None
+        if len(sys.argv) >= 4:
+            game_id = db.get_connection().execute('SELECT id FROM games WHERE name = ?', (sys.argv[3],)).fetchone()
+            if game_id is None:
+                print(f"❌ Jeu inconnu: {sys.argv[3]}")
+                sys.exit(1)
+            game_id = game_id[0]
+
+        start = time.perf_counter()
+        rows = db.get_odds_inputs(game_id=game_id)
+        loaded = time.perf_counter()
+        ranked = rank_odds(rows, best_per_pokemon=game_id is not None)
+        done = time.perf_counter()
+
+        for entry in ranked[:20]:
+            print(f"   {entry['expected_encounters'] or '-':>10} {entry['pokemon']} - {entry['game']} - "
+                  f"{entry['method']} - {entry['location'] or '?'} ({entry['probability']})")
+        print(f"📊 {len(rows)} lignes classées ({'NumPy' if NUMPY_AVAILABLE else 'array'}) : "
+              f"lecture {(loaded - start) * 1000:.1f} ms, calcul {(done - loaded) * 1000:.1f} ms")
+        sys.exit(0)
+
+    print("Usage: python odds_model.py rank [base.db] [jeu]")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Parsing des pages de détails pokebip
+- Backend BeautifulSoup configurable : html.parser (historique) ou lxml (plus rapide, optionnel)
+- Parsing restreint (SoupStrainer) aux seuls sous-arbres utilisés par les extracteurs :
+  les tableaux (section "Méthodes de shasse disponibles" + tableaux Jeu/Méthode) et les images (/home/)
+- Texte de page (shiny lock, fallback par mots-clés) extrait sans construire d'arbre BeautifulSoup
+- Empreintes : page normalisée (sans scripts, styles, commentaires ni variations d'espaces)
+  et données extraites, pour ne pas re-parser / réécrire un Pokemon inchangé
+"""
+
+import hashlib
+import json
+import re
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    etree = None
+    LXML_AVAILABLE = False
+
+
+PARSER_BACKENDS = ('auto', 'html.parser', 'lxml')
+
+# Seuls sous-arbres lus par parse_pokemon_details_v2 et download_high_quality_image
+DETAIL_PAGE_STRAINER = SoupStrainer(['table', 'img'])
+
+# Chaînes ignorées par BeautifulSoup.get_text() (Script / Stylesheet / TemplateString)
+NON_TEXT_ELEMENTS = ('script', 'style', 'template')
+
+# Parties d'une page sans effet sur les extracteurs (jetons, publicités, horodatages...)
+VOLATILE_MARKUP = re.compile(
+    r'<(script|style|template)\b[^>]*>.*?</\1\s*>|<!--.*?-->', re.IGNORECASE | re.DOTALL)
+WHITESPACE = re.compile(r'\s+')
+WHITESPACE_BETWEEN_TAGS = re.compile(r'>\s+<')
+
+
+def resolve_backend(name='auto'):
+    """Retourne le tree builder BeautifulSoup effectif (lxml si disponible pour 'auto')."""
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Backend de parsing inconnu: {name} (choix: {', '.join(PARSER_BACKENDS)})")
+    if name == 'auto':
+        return 'lxml' if LXML_AVAILABLE else 'html.parser'
+    if name == 'lxml' and not LXML_AVAILABLE:
+        print("⚠️ lxml non installé, utilisation de html.parser")
+        return 'html.parser'
+    return name
+
+
+class _PageTextCollector(HTMLParser):
+    """Collecte le texte visible d'une page (équivalent de soup.get_text()) sans construire d'arbre."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in NON_TEXT_ELEMENTS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in NON_TEXT_ELEMENTS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def extract_page_text(html, backend='html.parser'):
+    """Texte complet de la page, sans scripts, styles ni commentaires."""
+    if backend == 'lxml' and LXML_AVAILABLE:
+        parser = etree.HTMLParser(encoding='utf-8', remove_comments=True, remove_pis=True)
+        root = etree.fromstring(html.encode('utf-8'), parser)
+        if root is None:
+            return ''
+        etree.strip_elements(root, *NON_TEXT_ELEMENTS, with_tail=False)
+        return ''.join(root.itertext())
+
+    collector = _PageTextCollector()
+    collector.feed(html)
+    collector.close()
+    return ''.join(collector.parts)
+
+
+def parse_detail_page(html, backend='html.parser', restricted=False):
+    """Parse une page de détails : retourne (soup, texte de page en minuscules).
+
+    En mode restreint, seuls les tableaux et les images sont construits dans l'arbre ;
+    le texte de page est alors extrait séparément, sans arbre BeautifulSoup.
+    """
+    if restricted:
+        soup = BeautifulSoup(html, backend, parse_only=DETAIL_PAGE_STRAINER)
+        return soup, extract_page_text(html, backend).lower()
+
+    soup = BeautifulSoup(html, backend)
+    return soup, soup.get_text().lower()
+
+
+def page_fingerprint(html):
+    """SHA-1 de la page normalisée : identique si seuls scripts, styles, commentaires ou espaces changent."""
+    normalized = WHITESPACE.sub(' ', WHITESPACE_BETWEEN_TAGS.sub('><', VOLATILE_MARKUP.sub('', html))).strip()
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def data_fingerprint(data):
+    """SHA-1 d'une structure JSON (clés triées) : empreinte des données extraites d'une page."""
+    encoded = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
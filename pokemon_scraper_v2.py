@@ -5,10 +5,25 @@ import os
 import re
 import time
 import logging
+import threading
 import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from urllib.parse import urljoin, urlparse
-from database_v2 import DatabaseManagerV2
+from database_v2 import DatabaseManagerV2, detect_game_generation
+from http_cache import HttpCache, CachedResponse, CacheMissError
+from page_parser import data_fingerprint, page_fingerprint, parse_detail_page, resolve_backend
+from rate_limiter import RateLimiter, backoff_delay, parse_retry_after
+from scrape_pipeline import ScrapePipeline, Stage
+
+# URL publique de pokebip (les URLs absolues de ce domaine sont rebasées sur base_url)
+POKEBIP_URL = "https://www.pokebip.com"
+
+# ✅ NOUVEAU : Réessais des erreurs transitoires (statuts HTTP, timeouts, erreurs de connexion)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 4
+REQUEST_TIMEOUT = 10
 
 # ✅ NOUVEAU : Configuration du logging
 def setup_logging():
@@ -51,13 +66,48 @@ def setup_logging():
     return logger
 
 class PokemonScraperV2:
-    def __init__(self):
-        self.base_url = "https://www.pokebip.com"
-        self.db = DatabaseManagerV2("pokemon_shasse_v2.db")
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+    def __init__(self, workers=1, max_requests_per_second=4.0, max_rate=None, host_concurrency=4,
+                 max_retries=MAX_RETRIES, use_cache=True, cache_only=False,
+                 cache_path="cache/http_cache.db", cache_max_mb=500, base_url=POKEBIP_URL,
+                 db_path="pokemon_shasse_v2.db", assets_dir="assets", recorder=None,
+                 parser_backend="auto", restricted_parse=True, skip_unchanged=True, parse_processes=0,
+                 queue_size=None, force_parse=False):
+        self.base_url = base_url.rstrip('/')
+        self.db_path = db_path
+        self.db = DatabaseManagerV2(db_path)
+        self.assets_dir = assets_dir
+        
+        # ✅ NOUVEAU : Enregistreur de corpus optionnel (voir replay_corpus.py)
+        self.recorder = recorder
+        
+        # ✅ NOUVEAU : Backend de parsing (lxml si disponible) et parsing restreint des pages de détails
+        self.parser_backend = resolve_backend(parser_backend)
+        self.restricted_parse = restricted_parse
+        
+        # ✅ NOUVEAU : Empreintes page / données : un Pokemon inchangé n'est ni reparsé ni réécrit
+        self.skip_unchanged = skip_unchanged
+        # ✅ NOUVEAU : Reparsing forcé (commande reparse) : même une page inchangée est reparsée,
+        # l'écriture n'est ignorée que si les données extraites sont identiques
+        self.force_parse = force_parse
+        
+        # ✅ NOUVEAU : Une session HTTP par thread (requests.Session n'est pas thread-safe)
+        self._thread_local = threading.local()
+        
+        # ✅ NOUVEAU : Pool de workers + débit adaptatif par hôte (remplace les pauses fixes)
+        self.workers = max(1, int(workers))
+        # ✅ NOUVEAU : Pipeline (voir process_entries_pipeline) : processus de parsing et taille des files
+        self.parse_processes = max(0, int(parse_processes))
+        self.queue_size = queue_size or 2 * self.workers
+        self.max_requests_per_second = max_requests_per_second
+        self.max_rate = max_rate
+        self.host_concurrency = host_concurrency
+        self.max_retries = max(0, int(max_retries))
+        self.rate_limiters = {}
+        self._stats_lock = threading.Lock()
+        
+        # ✅ NOUVEAU : Cache HTTP persistant avec revalidation conditionnelle
+        self.cache_only = cache_only
+        self.http_cache = HttpCache(cache_path, cache_max_mb) if (use_cache or cache_only) else None
         
         # ✅ NOUVEAU : Initialiser le logging
         self.logger = setup_logging()
@@ -66,22 +116,138 @@ class PokemonScraperV2:
             'success_count': 0,
             'error_count': 0,
             'error_types': {},
+            'requests_count': 0,
+            'retries_count': 0,
+            'bytes_downloaded': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'unchanged_count': 0,
+            'pages_count': 0,
+            'parse_seconds': 0.0,
+            'db_seconds': 0.0,
+            'db_rows': 0,
             'start_time': datetime.now()
         }
         
         # Créer le dossier assets si il n'existe pas
-        os.makedirs("assets", exist_ok=True)
+        os.makedirs(self.assets_dir, exist_ok=True)
         for gen in range(1, 10):
-            os.makedirs(f"assets/gen_{gen}", exist_ok=True)
+            os.makedirs(f"{self.assets_dir}/gen_{gen}", exist_ok=True)
         
         self.logger.info("=== NOUVEAU SCRAPING SESSION DÉMARRÉ ===")
         self.logger.info(f"Base URL: {self.base_url}")
-        self.logger.info(f"Base de données: pokemon_shasse_v2.db")
+        self.logger.info(f"Base de données: {self.db_path}")
+        self.logger.info(f"Workers: {self.workers} | Débit initial: {max_requests_per_second} req/s "
+                         f"(adaptatif, {host_concurrency} requêtes simultanées max par hôte)")
+        self.logger.info(f"Parsing: {self.parser_backend} ({'restreint' if self.restricted_parse else 'complet'})")
+        
+        # ✅ NOUVEAU : Précharger les IDs des jeux / méthodes / lieux (résolution en mémoire ensuite)
+        preloaded = self.db.preload_dimensions()
+        self.logger.info(f"Dimensions préchargées: {preloaded['games']} jeux, "
+                         f"{preloaded['hunt_methods']} méthodes, {preloaded['locations']} lieux")
+        if self.http_cache:
+            mode = "hors-ligne (cache uniquement)" if self.cache_only else "revalidation conditionnelle"
+            self.logger.info(f"Cache HTTP: {cache_path} ({mode}, max {cache_max_mb} Mo)")
+    
+    @property
+    def session(self):
+        """Retourne la session HTTP propre au thread courant."""
+        session = getattr(self._thread_local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            })
+            self._thread_local.session = session
+        return session
+    
+    def rate_limiter_for(self, url):
+        """Limiteur adaptatif de l'hôte de url (créé au premier appel, partagé par tous les threads)."""
+        host = urlparse(url).netloc
+        with self._stats_lock:
+            limiter = self.rate_limiters.get(host)
+            if limiter is None:
+                limiter = self.rate_limiters[host] = RateLimiter(
+                    self.max_requests_per_second, self.max_rate, self.host_concurrency)
+            return limiter
+    
+    def http_get(self, url, timeout=REQUEST_TIMEOUT):
+        """GET HTTP commun (pages, sprites, images HQ) soumis au débit adaptatif de l'hôte.
+        
+        Passe par le cache HTTP : une entrée connue est revalidée avec If-None-Match /
+        If-Modified-Since, et un 304 renvoie le corps en cache avec `not_modified=True`.
+        ✅ NOUVEAU : 429 / 5xx / timeouts / erreurs de connexion réessayés (backoff + jitter,
+        Retry-After respecté) ; la dernière réponse en erreur est retournée telle quelle.
+        """
+        entry = self.http_cache.get(url) if self.http_cache else None
+        
+        if self.cache_only:
+            with self._stats_lock:
+                self.stats['cache_hits' if entry else 'cache_misses'] += 1
+            if entry is None:
+                raise CacheMissError(f"Absent du cache (mode hors-ligne): {url}")
+            return self.record_response(url, CachedResponse(url, entry))
+        
+        limiter = self.rate_limiter_for(url)
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                with limiter.slot():
+                    start = time.perf_counter()
+                    response = self.session.get(url, timeout=timeout, headers=HttpCache.conditional_headers(entry))
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                limiter.on_throttle()
+                if attempt == self.max_retries:
+                    raise
+                self.logger.debug(f"{type(e).__name__} pour {url}, nouvel essai ({attempt + 1}/{self.max_retries})")
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    limiter.on_success(time.perf_counter() - start)
+                    break
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                limiter.on_throttle(retry_after)
+                if attempt == self.max_retries:
+                    break
+                self.logger.debug(f"HTTP {response.status_code} pour {url}, nouvel essai ({attempt + 1}/{self.max_retries})")
+            with self._stats_lock:
+                self.stats['retries_count'] += 1
+            time.sleep(max(backoff_delay(attempt), retry_after or 0))
+        
+        with self._stats_lock:
+            self.stats['requests_count'] += 1
+            self.stats['bytes_downloaded'] += len(response.content)
+            if self.http_cache:
+                self.stats['cache_hits' if response.status_code == 304 and entry else 'cache_misses'] += 1
+        
+        if response.status_code == 304 and entry:
+            self.logger.debug(f"304 Not Modified: {url}")
+            return self.record_response(url, CachedResponse(url, entry))
+        
+        if response.status_code == 200 and self.http_cache:
+            self.http_cache.store(url, response)
+        return self.record_response(url, response)
+    
+    def record_response(self, url, response):
+        """Ajoute une réponse 200 au corpus de rejeu si un enregistreur est actif."""
+        if self.recorder is not None and response.status_code == 200:
+            self.recorder.record(url, response)
+        return response
+    
+    def absolute_url(self, url):
+        """Construit une URL complète, rebasée sur base_url (serveur de rejeu local, etc.)."""
+        if url.startswith('//'):
+            url = 'https:' + url
+        elif url.startswith('/'):
+            url = urljoin(self.base_url, url)
+        if self.base_url != POKEBIP_URL and url.startswith(POKEBIP_URL):
+            url = self.base_url + url[len(POKEBIP_URL):]
+        return url
     
     def log_error(self, error_type: str, pokemon_name: str, generation: int, url: str, exception: Exception, context: str = ""):
         """Log une erreur de manière détaillée."""
-        self.stats['error_count'] += 1
-        self.stats['error_types'][error_type] = self.stats['error_types'].get(error_type, 0) + 1
+        with self._stats_lock:
+            self.stats['error_count'] += 1
+            self.stats['error_types'][error_type] = self.stats['error_types'].get(error_type, 0) + 1
         
         error_msg = f"ERREUR {error_type.upper()}"
         error_msg += f" | Pokemon: {pokemon_name} (Gen {generation})"
@@ -95,7 +261,8 @@ class PokemonScraperV2:
     
     def log_success(self, pokemon_name: str, generation: int, details: dict):
         """Log un succès avec détails."""
-        self.stats['success_count'] += 1
+        with self._stats_lock:
+            self.stats['success_count'] += 1
         
         success_msg = f"SUCCÈS | Pokemon: {pokemon_name} (Gen {generation})"
         success_msg += f" | Sprite: {'✅' if details.get('sprite_downloaded') else '❌'}"
@@ -119,6 +286,49 @@ class PokemonScraperV2:
         self.logger.info(f"Succès: {success} ({success_rate:.1f}%)")
         self.logger.info(f"Erreurs: {errors} ({100-success_rate:.1f}%)")
         
+        # ✅ NOUVEAU : Débit réseau et traitement
+        seconds = duration.total_seconds()
+        if seconds > 0:
+            requests_count = self.stats['requests_count']
+            megabytes = self.stats['bytes_downloaded'] / (1024 * 1024)
+            self.logger.info("=== DÉBIT ===")
+            self.logger.info(f"Workers: {self.workers}")
+            self.logger.info(f"Requêtes HTTP: {requests_count} ({requests_count / seconds:.2f} req/s)"
+                             f" | Réessais: {self.stats['retries_count']}")
+            for host, limiter in self.rate_limiters.items():
+                latency = f"{limiter.latency * 1000:.0f} ms" if limiter.latency is not None else "-"
+                self.logger.info(f"Hôte {host}: débit final {limiter.rate:.2f} req/s | latence {latency} | "
+                                 f"ralentissements {limiter.stats['throttled']} erreurs / {limiter.stats['slowdowns']} latence"
+                                 f" | attente {limiter.stats['waited_seconds']:.1f}s")
+            self.logger.info(f"Pokemon/s: {total / seconds:.2f}")
+            self.logger.info(f"Données: {megabytes:.1f} Mo ({megabytes / seconds:.2f} Mo/s)")
+        
+        pages = self.stats['pages_count']
+        if pages > 0:
+            self.logger.info(f"Pages de détails: {pages} | Parsing: {self.stats['parse_seconds'] * 1000 / pages:.1f} ms/page"
+                             f" | BDD: {self.stats['db_seconds'] * 1000 / pages:.1f} ms/page")
+        
+        db_seconds = self.stats['db_seconds']
+        if db_seconds > 0:
+            rows = self.stats['db_rows']
+            self.logger.info(f"Lignes BDD écrites: {rows} ({rows / db_seconds:.0f} lignes/s)")
+        
+        self.logger.info("=== CACHE DIMENSIONS BDD ===")
+        for table, counts in self.db.dimension_stats.items():
+            lookups = counts['hits'] + counts['misses']
+            hit_rate = (counts['hits'] / lookups * 100) if lookups > 0 else 0
+            self.logger.info(f"{table}: {counts['hits']}/{lookups} hits ({hit_rate:.1f}%)")
+        
+        if self.http_cache:
+            hits = self.stats['cache_hits']
+            lookups = hits + self.stats['cache_misses']
+            hit_rate = (hits / lookups * 100) if lookups > 0 else 0
+            self.logger.info("=== CACHE HTTP ===")
+            self.logger.info(f"Hits (304 / hors-ligne): {hits}/{lookups} ({hit_rate:.1f}%)")
+            self.logger.info(f"Pokemon inchangés (parsing ignoré): {self.stats['unchanged_count']}")
+            self.logger.info(f"Taille du cache: {self.http_cache.total_size / (1024 * 1024):.1f} Mo")
+            self.http_cache.flush()
+        
         if self.stats['error_types']:
             self.logger.info("=== RÉPARTITION DES ERREURS ===")
             for error_type, count in sorted(self.stats['error_types'].items(), key=lambda x: x[1], reverse=True):
@@ -127,12 +337,16 @@ class PokemonScraperV2:
     
     def get_page(self, url):
         """Récupère le contenu d'une page web avec gestion des erreurs et logging."""
+        return self.get_page_with_status(url)[0]
+    
+    def get_page_with_status(self, url):
+        """Comme get_page, mais retourne aussi si la page est inchangée depuis la dernière visite (304)."""
         try:
             self.logger.debug(f"Récupération de l'URL: {url}")
-            response = self.session.get(url, timeout=10)
+            response = self.http_get(url)
             response.raise_for_status()
             self.logger.debug(f"Page récupérée avec succès: {len(response.text)} caractères")
-            return response.text
+            return response.text, getattr(response, 'not_modified', False)
         except requests.exceptions.Timeout as e:
             self.logger.warning(f"Timeout pour {url}: {e}")
             raise
@@ -204,7 +418,7 @@ class PokemonScraperV2:
                 filename = f"XXX_{pokemon_name}.png"
                 
             # Créer le répertoire pour cette génération
-            gen_dir = f"assets/gen_{generation}"
+            gen_dir = f"{self.assets_dir}/gen_{generation}"
             os.makedirs(gen_dir, exist_ok=True)
             
             # Chemin complet du fichier
@@ -217,7 +431,7 @@ class PokemonScraperV2:
             
             # Télécharger le sprite
             self.logger.debug(f"Téléchargement depuis: {sprite_url}")
-            response = self.session.get(sprite_url, timeout=10)
+            response = self.http_get(sprite_url)
             
             if response.status_code == 200:
                 with open(sprite_path, 'wb') as f:
@@ -241,11 +455,11 @@ class PokemonScraperV2:
         try:
             # Construire l'URL basée sur le numéro si disponible
             if pokemon_number:
-                sprite_url = f"https://www.pokebip.com/pages/icones/minichroma/NG/{pokemon_number}.png"
+                sprite_url = f"{self.base_url}/pages/icones/minichroma/NG/{pokemon_number}.png"
             else:
                 # Fallback : essayer avec le nom normalisé
                 normalized_name = self.normalize_pokemon_name_for_url(pokemon_name)
-                sprite_url = f"https://www.pokebip.com/pages/icones/minichroma/NG/{normalized_name}.png"
+                sprite_url = f"{self.base_url}/pages/icones/minichroma/NG/{normalized_name}.png"
             
             return sprite_url
             
@@ -260,7 +474,7 @@ class PokemonScraperV2:
             normalized_name = self.normalize_pokemon_name_for_url(pokemon_name)
             
             # Construire l'URL
-            details_url = f"https://www.pokebip.com/page/jeuxvideo/dossier_shasse/pokedex_shasse/{generation}g/{normalized_name}"
+            details_url = f"{self.base_url}/page/jeuxvideo/dossier_shasse/pokedex_shasse/{generation}g/{normalized_name}"
             
             return details_url
             
@@ -305,8 +519,8 @@ class PokemonScraperV2:
             print(f"    ❌ Erreur normalisation nom: {e}")
             return pokemon_name.lower()
 
-    def download_high_quality_image(self, soup, pokemon_name, generation, pokemon_number):
-        """Télécharge l'image haute qualité d'un Pokemon depuis la page de détails."""
+    def find_high_quality_image(self, soup, pokemon_name):
+        """Retourne le src de l'image haute qualité de la page de détails (ou None), sans téléchargement."""
         try:
             # Chercher spécifiquement les liens avec "/home" dans l'URL (comme dans bulbizarre.html)
             high_quality_candidates = []
@@ -339,18 +553,24 @@ class PokemonScraperV2:
                 return None
             
             # Prendre la première image candidate
-            image_url = high_quality_candidates[0]
+            return high_quality_candidates[0]
             
+        except Exception as e:
+            print(f"    ❌ Erreur recherche image HQ: {e}")
+            return None
+
+    def download_high_quality_image(self, image_src, pokemon_name, generation, pokemon_number):
+        """Télécharge l'image haute qualité d'un Pokemon (src trouvé par find_high_quality_image)."""
+        if not image_src:
+            return None
+        try:
             # Construire l'URL complète
-            if image_url.startswith('//'):
-                image_url = 'https:' + image_url
-            elif image_url.startswith('/'):
-                image_url = urljoin(self.base_url, image_url)
+            image_url = self.absolute_url(image_src)
             
             print(f"    📷 Téléchargement image HQ: {image_url}")
             
             # Télécharger l'image
-            response = self.session.get(image_url, timeout=10)
+            response = self.http_get(image_url)
             response.raise_for_status()
             
             # Déterminer l'extension
@@ -367,7 +587,7 @@ class PokemonScraperV2:
             # CORRECTION : Utiliser "hq" comme suffixe au lieu de "_HQ"
             filename = f"{number_str}_{clean_pokemon_name}_hq{extension}"
             filename = self.sanitize_filename(filename.replace(extension, '')) + extension
-            filepath = os.path.join("assets", f"gen_{generation}", filename)
+            filepath = os.path.join(self.assets_dir, f"gen_{generation}", filename)
             
             # Vérifier si le fichier existe déjà
             if os.path.exists(filepath):
@@ -385,7 +605,7 @@ class PokemonScraperV2:
             print(f"    ❌ Erreur téléchargement image HQ: {e}")
             return None
 
-    def parse_pokemon_details_v2(self, soup, pokemon_name):
+    def parse_pokemon_details_v2(self, soup, pokemon_name, page_text=None):
         """Parse les détails selon la VRAIE structure pokebip : méthodes générales en haut, puis tableaux spécifiques."""
         try:
             details = {
@@ -397,7 +617,7 @@ class PokemonScraperV2:
             print(f"    🔍 PARSING STRUCTURE POKEBIP pour {pokemon_name}...")
             
             # ✅ ÉTAPE 1 : Extraire les méthodes GÉNÉRALES de la section résumé
-            self.extract_general_methods_from_summary(soup, details)
+            self.extract_general_methods_from_summary(soup, details, page_text)
             
             # ✅ ÉTAPE 2 : Extraire les méthodes SPÉCIFIQUES des tableaux de jeux
             self.extract_specific_methods_from_tables(soup, details)
@@ -419,7 +639,7 @@ class PokemonScraperV2:
             print(f"    ❌ Erreur parsing: {e}")
             return {'general_methods': [], 'specific_methods': [], 'games': []}
     
-    def extract_general_methods_from_summary(self, soup, details):
+    def extract_general_methods_from_summary(self, soup, details, page_text=None):
         """Extrait les méthodes générales de la section 'Méthodes de shasse disponibles'."""
         try:
             print(f"    🎯 Recherche section 'Méthodes de shasse disponibles'...")
@@ -457,7 +677,8 @@ class PokemonScraperV2:
             # ✅ FALLBACK : Recherche directe par mots-clés si rien trouvé
             if not details['general_methods']:
                 print(f"    🔍 Fallback: recherche directe par mots-clés...")
-                page_text = soup.get_text().lower()
+                if page_text is None:
+                    page_text = soup.get_text().lower()
                 
                 fallback_methods = [
                     {'name': 'App. M. EV', 'keywords': ['app. m. ev', 'app m ev', 'apparition massive']},
@@ -512,11 +733,11 @@ class PokemonScraperV2:
 
     def is_methods_table(self, table) -> bool:
         """Vérifie si un tableau contient des méthodes de chasse."""
-                        header_row = table.find('tr')
+        header_row = table.find('tr')
         if not header_row:
             return False
         
-                            headers = [th.get_text(strip=True) for th in header_row.find_all(['th', 'td'])]
+        headers = [th.get_text(strip=True) for th in header_row.find_all(['th', 'td'])]
         return (len(headers) >= 3 and 
                 'Jeu' in headers and 
                 'Méthode' in headers)
@@ -524,14 +745,14 @@ class PokemonScraperV2:
     def parse_methods_table_improved(self, table, details):
         """Parse un tableau de méthodes - VERSION CORRIGÉE POUR ÉVITER LES MÉTHODES ARTIFICIELLES."""
         methods = []
-                                rows = table.find_all('tr')[1:]  # Skip header
-                                
+        rows = table.find_all('tr')[1:]  # Skip header
+
         current_game = None
         current_method = None
         
         for row_idx, row in enumerate(rows):
-                                    cols = row.find_all(['th', 'td'])
-                                    
+            cols = row.find_all(['th', 'td'])
+
             # ✅ CORRECTION : Gestion améliorée des rowspan/colspan
             if len(cols) == 1:
                 # Une seule colonne = probablement une continuation (sprites/info supplémentaire)
@@ -539,13 +760,12 @@ class PokemonScraperV2:
                 # ✅ NOUVELLE RÈGLE: Ignorer les cellules qui sont juste des sprites d'autres Pokemon
                 
                 cell_text = cols[0].get_text(strip=True)
-                cell_html = str(cols[0])
                 
                 # ✅ FILTRE STRICT: Ne créer une méthode QUE si il y a un lieu réel
                 if current_game and current_method:
-                    # Chercher les sprites dans cette cellule
-                    sprites = self.extract_pokemon_sprites_from_html(cell_html)
-                    location = self.extract_location_from_context(cell_text, cell_html)
+                    # Chercher les sprites dans cette cellule (directement sur l'arbre déjà parsé)
+                    sprites = self.extract_pokemon_sprites_from_tags(cols[0])
+                    location = self.extract_location_from_context(cell_text, cols[0])
                     
                     # ✅ NOUVELLE VALIDATION: Ne créer une méthode que si on a un VRAI lieu
                     # Pas juste un pourcentage ou des sprites vides
@@ -568,12 +788,12 @@ class PokemonScraperV2:
                             method_category = self.classify_specific_method(current_method)
                             
                             # Ajouter le jeu si nécessaire
-                                            if current_game not in [g['name'] for g in details['games']]:
-                                                generation = self.detect_generation_from_game(current_game)
-                                                details['games'].append({
-                                                    'name': current_game,
-                                                    'generation': generation
-                                                })
+                            if current_game not in [g['name'] for g in details['games']]:
+                                generation = self.detect_generation_from_game(current_game)
+                                details['games'].append({
+                                    'name': current_game,
+                                    'generation': generation
+                                })
                             
                             details['specific_methods'].append({
                                 'method': current_method,
@@ -602,11 +822,11 @@ class PokemonScraperV2:
                             'generation': generation
                         })
                         print(f"              🆕 Jeu ajouté: {method_data['game']} (Gen {generation})")
-                                            
-                                            # Ajouter la méthode spécifique
+
+                    # Ajouter la méthode spécifique
                     method_category = self.classify_specific_method(method_data['method'])
                     
-                                            details['specific_methods'].append({
+                    details['specific_methods'].append({
                         'method': method_data['method'],
                         'game': method_data['game'],
                         'location': method_data['location'],
@@ -653,7 +873,7 @@ class PokemonScraperV2:
                     if content.name == 'span' and content.get('data-original-title'):
                         # Prendre seulement le texte visible du span, pas le tooltip
                         text += content.get_text(strip=True) + ' '
-                                        else:
+                    else:
                         text += content.get_text(strip=True) + ' '
                 else:
                     text += str(content).strip() + ' '
@@ -684,7 +904,6 @@ class PokemonScraperV2:
         
         # ✅ CORRECTION : Utiliser le nettoyage intelligent au lieu de strip brutal
         all_texts = [self.clean_cell_text_smart(col) for col in cols]
-        all_html = [str(col) for col in cols]
         
         result = {'game': '', 'method': '', 'location': '', 'probability': '', 'sprites': []}
         
@@ -695,7 +914,7 @@ class PokemonScraperV2:
             result['method'] = all_texts[1]
             result['location'] = all_texts[2]
             result['probability'] = self.extract_probability_from_span(cols[3])  # ✅ Utiliser la nouvelle fonction
-            result['sprites'] = self.extract_pokemon_sprites_from_html(all_html[2])  # Sprites dans localisation
+            result['sprites'] = self.extract_pokemon_sprites_from_tags(cols[2])  # Sprites dans localisation
             
         elif len(cols) == 3:
             # Cas typique : continuation d'un jeu avec Méthode | Localisation | Pourcentage
@@ -703,20 +922,20 @@ class PokemonScraperV2:
             
             # Détecter si le premier élément est un jeu ou une méthode
             first_text = all_texts[0]
-            first_content_type = self.detect_content_type_simple(first_text, all_html[0])
+            first_content_type = self.detect_content_type_simple(first_text, cols[0])
             
             if first_content_type == 'game':
                 # Jeu | Méthode | Localisation
                 result['game'] = all_texts[0]
                 result['method'] = all_texts[1]
                 result['location'] = all_texts[2]
-                result['sprites'] = self.extract_pokemon_sprites_from_html(all_html[2])
+                result['sprites'] = self.extract_pokemon_sprites_from_tags(cols[2])
             else:
                 # Méthode | Localisation | Pourcentage (continuation)
                 result['method'] = all_texts[0]
                 result['location'] = all_texts[1]
                 result['probability'] = self.extract_probability_from_span(cols[2])  # ✅ Utiliser la nouvelle fonction
-                result['sprites'] = self.extract_pokemon_sprites_from_html(all_html[1])
+                result['sprites'] = self.extract_pokemon_sprites_from_tags(cols[1])
         
         elif len(cols) == 2:
             # Cas : Méthode | Localisation OU Localisation | Pourcentage
@@ -728,7 +947,7 @@ class PokemonScraperV2:
                 # Méthode | Localisation
                 result['method'] = all_texts[0]
                 result['location'] = all_texts[1]
-            result['sprites'] = self.extract_pokemon_sprites_from_html(all_html[0] + all_html[1])
+            result['sprites'] = self.extract_pokemon_sprites_from_tags(cols[0], cols[1])
         
         # ✅ NETTOYAGE FINAL : Vérifier que les éléments ne sont pas vides
         for key in ['game', 'method', 'location', 'probability']:
@@ -808,18 +1027,12 @@ class PokemonScraperV2:
         
         return probability_text
 
-    def extract_location_from_context(self, text: str, html: str) -> str:
-        """Extrait le lieu depuis le contexte (sprites, texte, etc.) - VERSION AMÉLIORÉE."""
+    def extract_location_from_context(self, text: str, cell) -> str:
+        """Extrait le lieu depuis le contexte (sprites, texte, etc.) d'une cellule déjà parsée."""
         # Si il y a des sprites, essayer d'extraire le lieu depuis le contexte
-        if '<img' in html:
-            # Il peut y avoir des infos de lieu dans le text ou les attributs
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # ✅ AMÉLIORATION : Utiliser le nettoyage intelligent
-            text_content = soup.get_text(separator=' | ', strip=True)
-            
-            # Chercher des éléments de texte autour des images
-            for element in soup.find_all(text=True):
+        if cell.find('img') is not None:
+            # ✅ NOUVEAU : Parcourir directement les textes de la cellule, sans re-parser son HTML
+            for element in cell.find_all(string=True):
                 element_text = element.strip()
                 if element_text and not element_text.startswith('Pokémon #'):
                     # Patterns typiques de lieux
@@ -965,7 +1178,7 @@ class PokemonScraperV2:
         
         return True
     
-    def detect_content_type_simple(self, text: str, html: str) -> str:
+    def detect_content_type_simple(self, text: str, cell) -> str:
         """Détecte le type de contenu d'une cellule - VERSION SIMPLIFIÉE."""
         text_lower = text.lower()
         
@@ -998,18 +1211,15 @@ class PokemonScraperV2:
             return 'method'
         
         # Localisation (par défaut pour tout le reste ou si contient des images)
-        if '<img' in html or any(loc in text_lower for loc in ['route', 'zone', 'caverne', 'parc']):
+        if cell.find('img') is not None or any(loc in text_lower for loc in ['route', 'zone', 'caverne', 'parc']):
             return 'location'
         
         return 'unknown'
     
-    def extract_pokemon_sprites_from_html(self, html: str) -> list:
-        """Extrait les noms des Pokemon depuis les sprites dans le HTML - VERSION AMÉLIORÉE."""
-        soup = BeautifulSoup(html, 'html.parser')
-        sprites = soup.find_all('img')
-        
+    def extract_pokemon_sprites_from_tags(self, *cells) -> list:
+        """Extrait les noms des Pokemon depuis les sprites des cellules déjà parsées (sans re-parsing)."""
         pokemon_names = []
-        for sprite in sprites:
+        for sprite in (img for cell in cells for img in cell.find_all('img')):
             alt_text = sprite.get('alt', '')
             # ✅ NOUVEAU : Nettoyer les noms de Pokemon des sprites
             if alt_text and alt_text not in pokemon_names:
@@ -1216,66 +1426,10 @@ class PokemonScraperV2:
         if not game_name:
             return 1
         
-        game_name_lower = game_name.lower()
-        
-        # ✅ CORRECTION : Vérifier les noms COMPLETS d'abord pour éviter les fausses correspondances
-        # Ordre important : noms complets avant noms partiels !
-        generation_map_ordered = [
-            # 3G - Vérifier AVANT les jeux 1G pour éviter "Rouge" vs "Rouge Feu"
-            ('rouge feu', 3), ('vert feuille', 3), ('rubis oméga', 6), ('saphir alpha', 6),
-            ('rubis', 3), ('saphir', 3), ('émeraude', 3),
-            
-            # 1G
-            ('rouge', 1), ('bleu', 1), ('jaune', 1),
-            
-            # 2G
-            ('or', 2), ('argent', 2), ('cristal', 2),
-            
-            # 4G
-            ('diamant étincelant', 8), ('perle scintillante', 8),  # Vérifier avant Diamant/Perle
-            ('diamant ét.', 8), ('perle scint.', 8),  # Versions courtes
-            ('diamant', 4), ('perle', 4), ('platine', 4), 
-            ('heartgold', 4), ('soulsilver', 4),
-            
-            # 5G
-            ('noir 2', 5), ('blanc 2', 5), ('noir', 5), ('blanc', 5),
-            
-            # 6G
-            ('x', 6), ('y', 6),
-            
-            # 7G
-            ('ultra-soleil', 7), ('ultra-lune', 7), ('ultra soleil', 7), ('ultra lune', 7),
-            ('lg: pikachu', 7), ('lg: évoli', 7), ('let\'s go', 7),
-            ('soleil', 7), ('lune', 7),
-            
-            # 8G
-            ('légendes pokémon: arceus', 8), ('légendes pokémon arceus', 8), ('lpa', 8),
-            ('épée', 8), ('bouclier', 8),
-            
-            # 9G
-            ('écarlate', 9), ('violet', 9), ('ev', 9), ('écarlate/violet', 9)
-        ]
-        
-        # Parcourir dans l'ordre pour trouver la correspondance la plus spécifique
-        for game_pattern, generation in generation_map_ordered:
-            if game_pattern in game_name_lower:
-                return generation
-        
-        # ✅ NOUVEAU : Gestion spéciale pour les abréviations courantes
-        abbreviations = {
-            'rf': 3, 'vf': 3,  # Rouge Feu / Vert Feuille
-            'ro': 6, 'sa': 6,  # Rubis Oméga / Saphir Alpha
-            'hg': 4, 'ss': 4,  # HeartGold / SoulSilver
-            'de': 8, 'pe': 8,  # Diamant Étincelant / Perle Scintillante
-            'n2': 5, 'b2': 5,  # Noir 2 / Blanc 2
-            'us': 7, 'ul': 7,  # Ultra-Soleil / Ultra-Lune
-            'lgp': 7, 'lge': 7,  # Let's Go Pikachu/Évoli
-            'ep': 8, 'bo': 8,  # Épée / Bouclier
-            'ec': 9, 'vi': 9   # Écarlate / Violet
-        }
-        
-        if game_name_lower in abbreviations:
-            return abbreviations[game_name_lower]
+        # ✅ CORRECTION : Table partagée avec la BDD (corrige aussi les jeux déjà enregistrés)
+        generation = detect_game_generation(game_name)
+        if generation is not None:
+            return generation
         
         print(f"      ⚠️ Génération inconnue pour le jeu: {game_name}, assigné à Gen 1 par défaut")
         return 1  # Par défaut
@@ -1343,10 +1497,11 @@ class PokemonScraperV2:
             return int(match.group(1))
         return 1  # Par défaut
 
-    def detect_shiny_lock(self, soup, pokemon_name):
+    def detect_shiny_lock(self, soup, pokemon_name, page_text=None):
         """Détecte si un Pokemon est shiny lock."""
         try:
-            page_text = soup.get_text().lower()
+            if page_text is None:
+                page_text = soup.get_text().lower()
             
             # Chercher des mentions explicites de shiny lock
             explicit_shiny_lock = any(phrase in page_text for phrase in [
@@ -1393,89 +1548,56 @@ class PokemonScraperV2:
             print(f"    ⚠️ Erreur détection shiny lock: {e}")
             return False
 
-    def save_pokemon_to_database_v2(self, pokemon_info, sprite_path, details, is_shiny_lock=False):
-        """Sauvegarde un Pokemon avec le nouveau modèle V2 - VERSION AVEC DÉDUPLICATION."""
+    def build_database_payload(self, pokemon_info, sprite_path, details, is_shiny_lock=False):
+        """Construit le payload BDD d'un Pokemon (voir DatabaseManagerV2.save_pokemon_bulk)."""
+        # ✅ DÉDUPLICATION : Méthodes SPÉCIFIQUES sans doublons
+        deduplicated_methods = self.deduplicate_specific_methods(details['specific_methods'])
+        print(f"      🔧 Déduplication: {len(details['specific_methods'])} -> {len(deduplicated_methods)} méthodes")
+        
+        # Méthodes générales d'abord : à nom égal, la première insérée garde sa description
+        hunt_methods = [(m['name'], m['description'], True, m['category']) for m in details['general_methods']]
+        hunt_methods += [(m['method'], f"Méthode: {m['method']}", False, m['category']) for m in deduplicated_methods]
+        
+        return {
+            'pokemon': {
+                'name': pokemon_info['name'],
+                'number': pokemon_info['number'],
+                'sprite_url': sprite_path,
+                'generation': pokemon_info['generation'],
+                'is_shiny_lock': is_shiny_lock,
+                'high_quality_image': pokemon_info.get('high_quality_image')
+            },
+            'games': [(g['name'], g['generation']) for g in details['games']],
+            'hunt_methods': hunt_methods,
+            'locations': [(m['location'], m['game'], f"Lieu dans {m['game']}") for m in deduplicated_methods],
+            'general_links': [(m['name'], m.get('conditions'), None) for m in details['general_methods']],
+            'specific_links': [
+                (m['method'], m['game'], (m['location'], m['game']), m['probability'], None, None)
+                for m in deduplicated_methods
+            ]
+        }
+
+    def save_pokemon_to_database_v2(self, pokemon_info, sprite_path, details, is_shiny_lock=False, fingerprints=None):
+        """Sauvegarde un Pokemon avec le nouveau modèle V2 - UNE transaction par Pokemon."""
         try:
-            # Insérer le Pokemon principal
-            pokemon_id = self.db.insert_pokemon(
-                name=pokemon_info['name'],
-                number=pokemon_info['number'],
-                sprite_url=sprite_path,
-                generation=pokemon_info['generation'],
-                is_shiny_lock=is_shiny_lock,
-                high_quality_image=pokemon_info.get('high_quality_image')
-            )
+            payload = self.build_database_payload(pokemon_info, sprite_path, details, is_shiny_lock)
+            if fingerprints:
+                payload['pokemon']['page_hash'], payload['pokemon']['details_hash'] = fingerprints
             
-            print(f"    💾 Pokemon sauvegardé avec ID: {pokemon_id}")
+            # ✅ NOUVEAU : Fiche, jeux, méthodes et lieux écrits en lot sur une seule connexion
+            pokemon_id, rows_written = self.db.save_pokemon_payload(payload)
+            with self._stats_lock:
+                self.stats['db_rows'] += rows_written
             
-            # Insérer les jeux
-            game_ids = {}
-            for game_data in details['games']:
-                try:
-                    game_id = self.db.insert_game(
-                        name=game_data['name'],
-                        generation=game_data['generation']
-                    )
-                    game_ids[game_data['name']] = game_id
-                    print(f"      🎮 Jeu sauvegardé: {game_data['name']} (Gen {game_data['generation']})")
-                except Exception as e:
-                    print(f"      ⚠️ Erreur sauvegarde jeu {game_data['name']}: {e}")
-            
-            # ✅ NOUVEAU : Sauvegarder les méthodes GÉNÉRALES
-            for method_data in details['general_methods']:
-                try:
-                    method_id = self.db.insert_hunt_method(
-                        name=method_data['name'],
-                        description=method_data['description'],
-                        is_general=True,
-                        category=method_data['category']
-                    )
-                    
-                    # Lier à la table des méthodes générales
-                    self.db.link_pokemon_general_method(
-                        pokemon_id, method_id, 
-                        conditions=method_data.get('conditions')
-                    )
-                    
-                    print(f"      🌍 Méthode générale sauvegardée: {method_data['name']}")
-                except Exception as e:
-                    print(f"      ⚠️ Erreur sauvegarde méthode générale {method_data['name']}: {e}")
-            
-            # ✅ DÉDUPLICATION : Sauvegarder les méthodes SPÉCIFIQUES sans doublons
-            deduplicated_methods = self.deduplicate_specific_methods(details['specific_methods'])
-            print(f"      🔧 Déduplication: {len(details['specific_methods'])} -> {len(deduplicated_methods)} méthodes")
-            
-            for method_data in deduplicated_methods:
-                try:
-                    method_id = self.db.insert_hunt_method(
-                        name=method_data['method'],
-                        description=f"Méthode: {method_data['method']}",
-                        is_general=False,
-                        category=method_data['category']
-                    )
-                    
-                    # Insérer la localisation complète
-                    location_id = self.db.insert_location(
-                        name=method_data['location'],
-                        region=method_data['game'],
-                        description=f"Lieu dans {method_data['game']}"
-                    )
-                    
-                    # Lier à la table des méthodes spécifiques
-                    game_id = game_ids.get(method_data['game'])
-                    if game_id:
-                        self.db.link_pokemon_specific_method(
-                            pokemon_id, method_id, game_id, location_id,
-                            probability=method_data['probability'],
-                            conditions=None
-                        )
-                        
-                        print(f"      🎯 Méthode spécifique sauvegardée: {method_data['method']} dans {method_data['game']}")
-                    
-                except Exception as e:
-                    print(f"      ⚠️ Erreur sauvegarde méthode spécifique {method_data['method']}: {e}")
-            
-            print(f"    ✅ Toutes les données sauvegardées pour {pokemon_info['name']}")
+            print(f"    💾 Pokemon sauvegardé avec ID: {pokemon_id}")
+            for name, generation in payload['games']:
+                print(f"      🎮 Jeu sauvegardé: {name} (Gen {generation})")
+            for name, _, _ in payload['general_links']:
+                print(f"      🌍 Méthode générale sauvegardée: {name}")
+            for method, game, _, _, _, _ in payload['specific_links']:
+                print(f"      🎯 Méthode spécifique sauvegardée: {method} dans {game}")
+            
+            print(f"    ✅ Toutes les données sauvegardées pour {pokemon_info['name']} ({rows_written} lignes)")
             return True
             
         except Exception as e:
@@ -1554,92 +1676,183 @@ class PokemonScraperV2:
         key2 = f"{method2.get('game', '')}|{method2.get('method', '')}|{method2.get('location', '')}"
         return key1 == key2
 
-    def scrape_and_process_pokemon(self, pokemon_name, generation, number=None, real_url=None):
-        """Scrape complètement un Pokemon avec logging complet."""
-        self.stats['total_processed'] += 1
+    def resolve_details_url(self, pokemon_name, generation, real_url=None):
+        """Retourne l'URL complète de la page de détails (URL réelle ou construite en fallback)."""
         details_url = real_url
-        
-        try:
-            self.logger.info(f"[{self.stats['total_processed']}] Début scraping: {pokemon_name} (Gen {generation})")
-            
-            # Étape 1 : Télécharger le sprite
-            sprite_filename = self.download_sprite(pokemon_name, generation, number)
-            sprite_downloaded = sprite_filename is not None
-            
-            # Étape 2 : Utiliser l'URL réelle ou la construire en fallback
-            if not details_url:
+        if not details_url:
             details_url = self.build_pokemon_details_url(pokemon_name, generation)
-                self.logger.warning(f"URL construite en fallback: {details_url}")
-            else:
-                # Construire l'URL complète si nécessaire
-                if details_url.startswith('/'):
-                    details_url = self.base_url + details_url
-                self.logger.debug(f"URL réelle utilisée: {details_url}")
-            
-            # Étape 3 : Récupérer la page de détails
-            html_content = self.get_page(details_url)
-            if not html_content:
-                raise Exception("Impossible de récupérer le contenu HTML")
-            
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Étape 4 : Parser les détails
-            details = self.parse_pokemon_details_v2(soup, pokemon_name)
-            methods_count = len(details['general_methods']) + len(details['specific_methods'])
-            games_count = len(details['games'])
-            
-            self.logger.debug(f"Parsing terminé: {methods_count} méthodes, {games_count} jeux")
-            
-            # Étape 5 : Détecter le shiny lock
-            is_shiny_lock = self.detect_shiny_lock(soup, pokemon_name)
-            
-            # Étape 6 : Télécharger l'image haute qualité
-            high_quality_filename = self.download_high_quality_image(soup, pokemon_name, generation, number)
-            hq_image_downloaded = high_quality_filename is not None
-            
-            # Étape 7 : Préparer les informations du Pokemon
-            pokemon_info = {
-                'name': pokemon_name,
-                'number': number or "XXX",
-                'generation': generation,
-                'sprite_url': sprite_filename,
-                'high_quality_image': high_quality_filename
+            self.logger.warning(f"URL construite en fallback: {details_url}")
+        else:
+            # Construire l'URL complète si nécessaire
+            details_url = self.absolute_url(details_url)
+            self.logger.debug(f"URL réelle utilisée: {details_url}")
+        return details_url
+
+    def parse_detail_page(self, html_content):
+        """Parse une page de détails avec le backend configuré : retourne (soup, texte de page)."""
+        return parse_detail_page(html_content, self.parser_backend, self.restricted_parse)
+
+    def fetch_pokemon_data(self, pokemon_name, generation, number=None, details_url=None):
+        """Partie réseau + parsing d'un Pokemon (sans écriture BDD, exécutable dans un worker)."""
+        fetched = self.fetch_pokemon_page(pokemon_name, generation, number, details_url)
+        if fetched.get('unchanged'):
+            return fetched
+        self.record_parse(fetched, self.parse_page_html(fetched['html'], pokemon_name))
+        return self.download_pokemon_images(fetched)
+
+    def fetch_pokemon_page(self, pokemon_name, generation, number=None, details_url=None):
+        """Étape réseau : sprite + page de détails ; retourne l'état du Pokemon pour les étapes suivantes."""
+        # Étape 1 : Télécharger le sprite
+        sprite_filename = self.download_sprite(pokemon_name, generation, number)
+        
+        # Étape 2 : Récupérer la page de détails
+        html_content, not_modified = self.get_page_with_status(details_url)
+        if not html_content:
+            raise Exception("Impossible de récupérer le contenu HTML")
+        with self._stats_lock:
+            self.stats['pages_count'] += 1
+        # ✅ NOUVEAU : Empreinte de la page normalisée, enregistrée dans le job et sur la fiche
+        content_hash = page_fingerprint(html_content)
+        
+        # ✅ NOUVEAU : Page inchangée (304 ou même empreinte) et déjà en base → ni parsing ni réécriture,
+        # sauf si l'image HQ manque en base (échec précédent) : étages images et écriture rejoués.
+        # Un sprite absent en base (souvent définitif : formes régionales) ne bloque pas ce raccourci,
+        # un sprite obtenu ici est écrit seul.
+        stored = self.db.get_pokemon_fingerprint(pokemon_name, generation) if self.skip_unchanged else None
+        if stored and stored[4] and not self.force_parse and (not_modified or stored[1] == content_hash):
+            return {
+                'unchanged': True,
+                'pokemon_info': {'name': pokemon_name, 'generation': generation},
+                'pokemon_id': stored[0],
+                'new_sprite': sprite_filename if sprite_filename and not stored[3] else None,
+                'content_hash': content_hash,
+                'reason': "Page 304" if not_modified else "Empreinte de page identique"
             }
-            
-            # Étape 8 : Sauvegarder en base de données
-            success = self.save_pokemon_to_database_v2(
-                pokemon_info, 
-                sprite_filename, 
-                details, 
-                is_shiny_lock
-            )
-            
-            if success:
-                # Log du succès avec détails
-                self.log_success(pokemon_name, generation, {
-                    'sprite_downloaded': sprite_downloaded,
-                    'hq_image_downloaded': hq_image_downloaded,
-                    'methods_count': methods_count,
-                    'games_count': games_count,
-                    'is_shiny_lock': is_shiny_lock
-                })
-                return True
-            else:
-                raise Exception("Erreur lors de la sauvegarde en base de données")
-                
-        except requests.exceptions.HTTPError as e:
+        
+        return {
+            'pokemon_info': {'name': pokemon_name, 'number': number, 'generation': generation},
+            'html': html_content,
+            'sprite_filename': sprite_filename,
+            'content_hash': content_hash,
+            'stored_fingerprint': stored
+        }
+
+    def parse_page_html(self, html_content, pokemon_name):
+        """Étape CPU : parsing pur d'une page de détails (aucun état partagé, voir parse_page_in_process)."""
+        parse_start = time.perf_counter()
+        soup, page_text = self.parse_detail_page(html_content)
+        
+        # Étape 3 : Parser les détails
+        details = self.parse_pokemon_details_v2(soup, pokemon_name, page_text)
+        
+        # Étape 4 : Détecter le shiny lock
+        is_shiny_lock = self.detect_shiny_lock(soup, pokemon_name, page_text)
+        
+        return {
+            'details': details,
+            'is_shiny_lock': is_shiny_lock,
+            'high_quality_src': self.find_high_quality_image(soup, pokemon_name),
+            'parse_seconds': time.perf_counter() - parse_start
+        }
+
+    def record_parse(self, fetched, parsed):
+        """Ajoute le résultat de parse_page_html à l'état d'un Pokemon (la page HTML n'est plus gardée)."""
+        with self._stats_lock:
+            self.stats['parse_seconds'] += parsed.pop('parse_seconds')
+        del fetched['html']
+        fetched.update(parsed)
+        return fetched
+
+    def download_pokemon_images(self, fetched):
+        """Étape réseau : image haute qualité, puis empreinte des données extraites."""
+        info = fetched['pokemon_info']
+        
+        # Étape 5 : Télécharger l'image haute qualité
+        high_quality_filename = self.download_high_quality_image(
+            fetched.pop('high_quality_src'), info['name'], info['generation'], info['number'])
+        
+        pokemon_info = {
+            'name': info['name'],
+            'number': info['number'] or "XXX",
+            'generation': info['generation'],
+            'sprite_url': fetched['sprite_filename'],
+            'high_quality_image': high_quality_filename
+        }
+        fetched['pokemon_info'] = pokemon_info
+        # ✅ NOUVEAU : Empreinte des données extraites (page modifiée sans effet sur les données ?)
+        fetched['details_hash'] = data_fingerprint({'pokemon_info': pokemon_info, 'details': fetched['details'],
+                                                    'is_shiny_lock': fetched['is_shiny_lock']})
+        return fetched
+
+    def store_pokemon_data(self, fetched):
+        """Partie BDD d'un Pokemon : toujours appelée depuis le thread écrivain unique."""
+        pokemon_info = fetched['pokemon_info']
+        
+        if fetched.get('unchanged'):
+            new_sprite = fetched.get('new_sprite')
+            if new_sprite:
+                self.db.update_pokemon_sprite(fetched['pokemon_id'], new_sprite)
+            with self._stats_lock:
+                self.stats['db_rows'] += 1 if new_sprite else 0
+                self.stats['success_count'] += 1
+                self.stats['unchanged_count'] += 1
+            self.logger.info(f"INCHANGÉ | Pokemon: {pokemon_info['name']} (Gen {pokemon_info['generation']}) | {fetched['reason']}, parsing ignoré")
+            return True
+        
+        # ✅ NOUVEAU : Page modifiée mais données extraites identiques → seule l'empreinte de page est mise à jour
+        # (sauf si le sprite ou l'image HQ obtenus ici diffèrent de la base)
+        stored = fetched.get('stored_fingerprint')
+        images = (pokemon_info['sprite_url'], pokemon_info['high_quality_image'])
+        if stored and stored[2] == fetched['details_hash'] and tuple(stored[3:5]) == images:
+            self.db.update_pokemon_fingerprint(stored[0], fetched['content_hash'])
+            with self._stats_lock:
+                self.stats['success_count'] += 1
+                self.stats['unchanged_count'] += 1
+            self.logger.info(f"INCHANGÉ | Pokemon: {pokemon_info['name']} (Gen {pokemon_info['generation']}) | Données identiques, écriture ignorée")
+            return True
+        
+        details = fetched['details']
+        methods_count = len(details['general_methods']) + len(details['specific_methods'])
+        games_count = len(details['games'])
+        
+        self.logger.debug(f"Parsing terminé: {methods_count} méthodes, {games_count} jeux")
+        
+        db_start = time.perf_counter()
+        success = self.save_pokemon_to_database_v2(
+            pokemon_info, 
+            fetched['sprite_filename'], 
+            details, 
+            fetched['is_shiny_lock'],
+            fingerprints=(fetched['content_hash'], fetched['details_hash'])
+        )
+        with self._stats_lock:
+            self.stats['db_seconds'] += time.perf_counter() - db_start
+        
+        if not success:
+            raise Exception("Erreur lors de la sauvegarde en base de données")
+        
+        # Log du succès avec détails
+        self.log_success(pokemon_info['name'], pokemon_info['generation'], {
+            'sprite_downloaded': fetched['sprite_filename'] is not None,
+            'hq_image_downloaded': pokemon_info['high_quality_image'] is not None,
+            'methods_count': methods_count,
+            'games_count': games_count,
+            'is_shiny_lock': fetched['is_shiny_lock']
+        })
+        return True
+
+    def handle_scrape_exception(self, e, pokemon_name, generation, details_url):
+        """Classe et log une erreur de scraping d'un Pokemon."""
+        if isinstance(e, requests.exceptions.HTTPError):
             self.log_error("HTTP_ERROR", pokemon_name, generation, details_url or "URL inconnue", e, 
-                         f"Code HTTP: {e.response.status_code if e.response else 'inconnu'}")
-            return False
-        except requests.exceptions.Timeout as e:
+                         f"Code HTTP: {e.response.status_code if e.response is not None else 'inconnu'}")
+        elif isinstance(e, requests.exceptions.Timeout):
             self.log_error("TIMEOUT", pokemon_name, generation, details_url or "URL inconnue", e, 
                          "Délai d'attente dépassé")
-            return False
-        except requests.exceptions.RequestException as e:
+        elif isinstance(e, requests.exceptions.RequestException):
             self.log_error("NETWORK_ERROR", pokemon_name, generation, details_url or "URL inconnue", e, 
                          "Erreur réseau")
-            return False
-        except Exception as e:
+        else:
             # Déterminer le type d'erreur plus précisément
             if "404" in str(e) or "not found" in str(e).lower():
                 error_type = "PAGE_NOT_FOUND"
@@ -1651,43 +1864,49 @@ class PokemonScraperV2:
                 error_type = "UNKNOWN_ERROR"
                 
             self.log_error(error_type, pokemon_name, generation, details_url or "URL inconnue", e)
-            return False
+        return False
 
-    def scrape_generation_complete(self, generation):
-        """Scrape complètement une génération avec logging détaillé."""
-        gen_start_time = datetime.now()
-        self.logger.info(f"=== DÉBUT GÉNÉRATION {generation} ===")
-        
-        # URL de la page de génération
-        generation_url = f"{self.base_url}/page/jeuxvideo/dossier_shasse/pokedex_shasse/portail/{generation}g"
-        self.logger.info(f"URL génération: {generation_url}")
+    def start_pokemon(self, pokemon_name, generation):
+        """Incrémente le compteur de Pokemon traités et log le début du scraping."""
+        with self._stats_lock:
+            self.stats['total_processed'] += 1
+            index = self.stats['total_processed']
+        self.logger.info(f"[{index}] Début scraping: {pokemon_name} (Gen {generation})")
+
+    def finish_job(self, job_id, fetched=None, error=None):
+        """Enregistre le résultat d'un job de la file de scraping (sans effet hors file)."""
+        if job_id is None:
+            return
+        if error is not None:
+            self.db.finish_scrape_job(job_id, error=f"{type(error).__name__}: {error}")
+        else:
+            self.db.finish_scrape_job(job_id, content_hash=fetched.get('content_hash'))
+
+    def scrape_and_process_pokemon(self, pokemon_name, generation, number=None, real_url=None, job_id=None):
+        """Scrape complètement un Pokemon avec logging complet."""
+        self.start_pokemon(pokemon_name, generation)
+        details_url = real_url
         
         try:
-        # Récupérer la page
-        html_content = self.get_page(generation_url)
-        if not html_content:
-                self.logger.error(f"Impossible de récupérer la page génération {generation}")
-            return 0, 0
-        
-        # Parser la page
-        soup = BeautifulSoup(html_content, 'html.parser')
+            details_url = self.resolve_details_url(pokemon_name, generation, real_url)
+            fetched = self.fetch_pokemon_data(pokemon_name, generation, number, details_url)
+            result = self.store_pokemon_data(fetched)
+            self.finish_job(job_id, fetched)
+            return result
+        except Exception as e:
+            self.finish_job(job_id, error=e)
+            return self.handle_scrape_exception(e, pokemon_name, generation, details_url)
+
+    def extract_generation_entries(self, soup):
+        """Extrait (nom, numéro, URL réelle) de chaque lien Pokemon d'une page portail."""
+        entries = []
         
         # Trouver tous les liens Pokemon
         pokemon_links = soup.find_all('a', href=re.compile(r'/page/jeuxvideo/dossier_shasse/pokedex_shasse/\d+g/'))
         
-        if not pokemon_links:
-                self.logger.warning(f"Aucun Pokemon trouvé dans la génération {generation}")
-            return 0, 0
-        
-            self.logger.info(f"🎯 {len(pokemon_links)} Pokemon trouvés dans la génération {generation}")
-            
-            # Traiter chaque Pokemon
-            gen_success = 0
-            gen_errors = 0
-        
-        for i, pokemon_link in enumerate(pokemon_links, 1):
-                # ✅ CORRECTION : Extraire le VRAI lien au lieu de le reconstruire
-                real_url = pokemon_link.get('href')
+        for pokemon_link in pokemon_links:
+            # ✅ CORRECTION : Extraire le VRAI lien au lieu de le reconstruire
+            real_url = pokemon_link.get('href')
             
             # Extract number from link text if available
             text = pokemon_link.get_text().strip()
@@ -1699,41 +1918,199 @@ class PokemonScraperV2:
             # Extract Pokemon name from text (remove number)
             pokemon_name = re.sub(r'#\d+\s*', '', text).strip()
             
-                self.logger.debug(f"[{i}/{len(pokemon_links)}] Processing: {pokemon_name} (#{number})")
-                self.logger.debug(f"URL réelle: {real_url}")
-                
-                # ✅ CORRECTION : Passer l'URL réelle au scraper
-                if self.scrape_and_process_pokemon(pokemon_name, generation, number, real_url):
-                    gen_success += 1
+            entries.append({'name': pokemon_name, 'number': number, 'url': real_url})
+        
+        return entries
+
+    def process_entries_sequential(self, entries, generation):
+        """Traite les Pokemon un par un (mode historique)."""
+        gen_success = 0
+        gen_errors = 0
+        
+        for i, entry in enumerate(entries, 1):
+            self.logger.debug(f"[{i}/{len(entries)}] Processing: {entry['name']} (#{entry['number']})")
+            self.logger.debug(f"URL réelle: {entry['url']}")
+            
+            # ✅ CORRECTION : Passer l'URL réelle au scraper
+            if self.scrape_and_process_pokemon(entry['name'], generation, entry['number'], entry['url'],
+                                               entry.get('job_id')):
+                gen_success += 1
             else:
-                    gen_errors += 1
+                gen_errors += 1
             
-                # Pause entre chaque Pokemon pour éviter la surcharge
-            time.sleep(0.5)
+            # Log périodique des stats
+            if i % 10 == 0:
+                current_rate = (gen_success / i * 100) if i > 0 else 0
+                self.logger.info(f"Progression Gen {generation}: {i}/{len(entries)} ({current_rate:.1f}% succès)")
         
-                # Log périodique des stats
-                if i % 10 == 0:
-                    current_rate = (gen_success / i * 100) if i > 0 else 0
-                    self.logger.info(f"Progression Gen {generation}: {i}/{len(pokemon_links)} ({current_rate:.1f}% succès)")
-            
-            # Statistiques finales de la génération
-            gen_duration = datetime.now() - gen_start_time
-            gen_total = gen_success + gen_errors
-            gen_rate = (gen_success / gen_total * 100) if gen_total > 0 else 0
-            
-            self.logger.info(f"=== FIN GÉNÉRATION {generation} ===")
-            self.logger.info(f"Durée: {gen_duration}")
-            self.logger.info(f"Traités: {gen_total}")
-            self.logger.info(f"Succès: {gen_success} ({gen_rate:.1f}%)")
-            self.logger.info(f"Erreurs: {gen_errors}")
-            
-            return gen_success, gen_errors
+        return gen_success, gen_errors
+
+    def process_entries_pipeline(self, entries, generation):
+        """Traite les Pokemon en pipeline : réseau -> parsing -> image HQ -> écrivain BDD unique.
+        
+        Étages reliés par des files bornées (contre-pression) : le réseau continue pendant le
+        parsing et inversement. Les étages ne touchent jamais SQLite en écriture : seul le thread
+        appelant écrit. Avec parse_processes > 0, le parsing tourne dans un pool de processus.
+        """
+        counts = {'success': 0, 'errors': 0}
+        parse_pool = None
+        if self.parse_processes:
+            # spawn : pas de fork d'un processus multi-thread (verrous de logging / stdout hérités)
+            parse_pool = ProcessPoolExecutor(self.parse_processes, mp_context=multiprocessing.get_context('spawn'))
+        
+        def fetch(entry, _):
+            self.start_pokemon(entry['name'], generation)
+            entry['details_url'] = self.resolve_details_url(entry['name'], generation, entry['url'])
+            return self.fetch_pokemon_page(entry['name'], generation, entry['number'], entry['details_url'])
+        
+        def parse(entry, fetched):
+            if fetched.get('unchanged'):
+                return fetched
+            if parse_pool is not None:
+                parsed = parse_pool.submit(parse_page_in_process, fetched['html'], entry['name'],
+                                           self.parser_backend, self.restricted_parse).result()
+            else:
+                parsed = self.parse_page_html(fetched['html'], entry['name'])
+            return self.record_parse(fetched, parsed)
+        
+        def images(entry, fetched):
+            if fetched.get('unchanged'):
+                return fetched
+            return self.download_pokemon_images(fetched)
+        
+        def write(entry, fetched, error):
+            # ✅ Écrivain unique : la sauvegarde se fait dans ce thread uniquement
+            try:
+                if error is not None:
+                    raise error
+                self.store_pokemon_data(fetched)
+                self.finish_job(entry.get('job_id'), fetched)
+                counts['success'] += 1
+            except Exception as e:
+                self.finish_job(entry.get('job_id'), error=e)
+                self.handle_scrape_exception(e, entry['name'], generation, entry.get('details_url') or entry['url'])
+                counts['errors'] += 1
+            
+            # Log périodique des stats
+            done = counts['success'] + counts['errors']
+            if done % 10 == 0:
+                self.logger.info(f"Progression Gen {generation}: {done}/{len(entries)} "
+                                 f"({counts['success'] / done * 100:.1f}% succès)")
+        
+        pipeline = ScrapePipeline([
+            Stage('fetch', fetch, self.workers),
+            Stage('parse', parse, self.parse_processes or 1),
+            Stage('images', images, self.workers),
+        ], self.queue_size)
+        try:
+            pipeline.run(((entry, None) for entry in entries), write)
+        finally:
+            if parse_pool is not None:
+                parse_pool.shutdown()
+        
+        # ✅ NOUVEAU : Utilisation de chaque étage (l'étage goulot travaille ~100 % du temps)
+        for line in pipeline.report():
+            self.logger.info(line)
+        return counts['success'], counts['errors']
+
+    def scrape_generation_complete(self, generation):
+        """Scrape complètement une génération avec logging détaillé."""
+        gen_start_time = datetime.now()
+        self.logger.info(f"=== DÉBUT GÉNÉRATION {generation} ===")
+        
+        # URL de la page de génération
+        generation_url = f"{self.base_url}/page/jeuxvideo/dossier_shasse/pokedex_shasse/portail/{generation}g"
+        self.logger.info(f"URL génération: {generation_url}")
+        
+        try:
+            # Récupérer la page
+            html_content = self.get_page(generation_url)
+            if not html_content:
+                self.logger.error(f"Impossible de récupérer la page génération {generation}")
+                return 0, 0
+
+            # Parser la page
+            soup = BeautifulSoup(html_content, 'html.parser')
+
+            # Trouver tous les liens Pokemon
+            entries = self.extract_generation_entries(soup)
+
+            if not entries:
+                self.logger.warning(f"Aucun Pokemon trouvé dans la génération {generation}")
+                return 0, 0
+
+            self.logger.info(f"🎯 {len(entries)} Pokemon trouvés dans la génération {generation}")
+
+            # ✅ NOUVEAU : Un job persistant par Pokemon, vidé par les workers (reprise possible via resume)
+            self.db.enqueue_scrape_jobs(generation, entries)
+            return self.process_generation_jobs(generation, self.db.get_scrape_jobs(generation), gen_start_time)
             
         except Exception as e:
             self.log_error("GENERATION_ERROR", f"Generation_{generation}", generation, generation_url, e, 
                          "Erreur lors du scraping de la génération")
             return 0, 1
 
+    def process_generation_jobs(self, generation, jobs, gen_start_time):
+        """Traite les jobs d'une génération et log le bilan ; retourne (succès, erreurs)."""
+        # Traiter chaque Pokemon
+        if self.workers > 1 or self.parse_processes:
+            gen_success, gen_errors = self.process_entries_pipeline(jobs, generation)
+        else:
+            gen_success, gen_errors = self.process_entries_sequential(jobs, generation)
+        
+        # Statistiques finales de la génération
+        gen_duration = datetime.now() - gen_start_time
+        gen_total = gen_success + gen_errors
+        gen_rate = (gen_success / gen_total * 100) if gen_total > 0 else 0
+        
+        self.logger.info(f"=== FIN GÉNÉRATION {generation} ===")
+        self.logger.info(f"Durée: {gen_duration}")
+        self.logger.info(f"Traités: {gen_total}")
+        self.logger.info(f"Succès: {gen_success} ({gen_rate:.1f}%)")
+        self.logger.info(f"Erreurs: {gen_errors}")
+        
+        return gen_success, gen_errors
+
+    def resume_scraping(self, generations=range(1, 10)):
+        """Reprend un scraping interrompu : seuls les jobs en attente ou en échec sont retraités.
+        
+        Une génération sans aucun job (jamais atteinte) est scrapée entièrement depuis son portail.
+        """
+        self.logger.info("🔁 REPRISE DU SCRAPING")
+        queued_generations = {generation for generation, _, _ in self.db.get_scrape_job_counts()}
+        
+        for generation in generations:
+            if generation not in queued_generations:
+                self.logger.info(f"🎯 Génération {generation} jamais scrapée : portail complet")
+                self.scrape_generation_complete(generation)
+                continue
+            
+            jobs = self.db.get_scrape_jobs(generation)
+            if not jobs:
+                self.logger.info(f"✅ Génération {generation} déjà terminée")
+                continue
+            
+            self.logger.info(f"=== REPRISE GÉNÉRATION {generation} : {len(jobs)} job(s) en attente ou en échec ===")
+            self.process_generation_jobs(generation, jobs, datetime.now())
+        
+        return self.report_final_stats()
+
+    def reparse_cached(self, generations=range(1, 10)):
+        """Réapplique le parsing aux pages de détails du cache HTTP (après changement de règles ou de schéma).
+        
+        Pokemon connus par la file de scraping, pages lues dans le cache (à utiliser avec cache_only),
+        parsées dans le pool de processus du pipeline, écrites par différence par l'écrivain unique.
+        """
+        self.logger.info(f"♻️ REPARSING DEPUIS LE CACHE HTTP ({self.parse_processes} processus de parsing)")
+        for generation in generations:
+            jobs = self.db.get_scrape_jobs(generation, states=('pending', 'done', 'failed'))
+            if not jobs:
+                continue
+            self.logger.info(f"=== REPARSING GÉNÉRATION {generation} : {len(jobs)} Pokemon ===")
+            self.process_generation_jobs(generation, jobs, datetime.now())
+        
+        return self.report_final_stats()
+
     def scrape_all_complete(self):
         """Scrape complètement toutes les générations avec logging et statistiques finales."""
         self.logger.info("🚀 DÉMARRAGE DU SCRAPING COMPLET V2")
@@ -1750,15 +2127,15 @@ class PokemonScraperV2:
                 total_success += success
                 total_errors += errors
                 
-                # Pause entre les générations
-                self.logger.info(f"⏸️ Pause avant génération suivante...")
-                time.sleep(2)
-                
             except Exception as e:
                 self.logger.error(f"💥 Erreur génération {generation}: {e}")
                 total_errors += 1
                 continue
         
+        return self.report_final_stats()
+
+    def report_final_stats(self):
+        """Log et affiche le bilan final d'un scraping ; retourne (succès, erreurs)."""
         # Statistiques finales globales
         self.logger.info(f"\n🎉 SCRAPING TERMINÉ !")
         self.logger.info("=" * 50)
@@ -1799,45 +2176,45 @@ class PokemonScraperV2:
         self.logger.info(f"🧪 TEST SIMPLE: {pokemon_name} (Gen {generation})")
         
         try:
-        # Aller chercher dans la page de génération
-        generation_url = f"{self.base_url}/page/jeuxvideo/dossier_shasse/pokedex_shasse/portail/{generation}g"
-        html_content = self.get_page(generation_url)
-        
-        if not html_content:
+            # Aller chercher dans la page de génération
+            generation_url = f"{self.base_url}/page/jeuxvideo/dossier_shasse/pokedex_shasse/portail/{generation}g"
+            html_content = self.get_page(generation_url)
+
+            if not html_content:
                 self.logger.error("Impossible de récupérer la page de génération")
-            return False
-        
-        soup = BeautifulSoup(html_content, 'html.parser')
-        pokemon_links = soup.find_all('a', href=re.compile(r'/page/jeuxvideo/dossier_shasse/pokedex_shasse/\d+g/'))
-        
-        # Chercher le Pokemon
-        for link in pokemon_links:
-            text = link.get_text().strip()
-            if pokemon_name.lower() in text.lower():
+                return False
+
+            soup = BeautifulSoup(html_content, 'html.parser')
+            pokemon_links = soup.find_all('a', href=re.compile(r'/page/jeuxvideo/dossier_shasse/pokedex_shasse/\d+g/'))
+
+            # Chercher le Pokemon
+            for link in pokemon_links:
+                text = link.get_text().strip()
+                if pokemon_name.lower() in text.lower():
                     # ✅ CORRECTION : Extraire l'URL réelle
                     real_url = link.get('href')
-                    
+
                     self.logger.info(f"🎯 Pokemon trouvé: {text}")
                     self.logger.debug(f"URL réelle: {real_url}")
-                    
-                # Extract number from link text if available
-                number = self.extract_pokemon_number_from_text(text)
-                if number is None:
-                    sprite_url = link.find('img') and link.find('img').get('src')
-                    number = self.extract_pokemon_number_from_sprite_url(sprite_url)
-                
-                # Extract Pokemon name from text (remove number)
-                clean_pokemon_name = re.sub(r'#\d+\s*', '', text).strip()
-                
+
+                    # Extract number from link text if available
+                    number = self.extract_pokemon_number_from_text(text)
+                    if number is None:
+                        sprite_url = link.find('img') and link.find('img').get('src')
+                        number = self.extract_pokemon_number_from_sprite_url(sprite_url)
+
+                    # Extract Pokemon name from text (remove number)
+                    clean_pokemon_name = re.sub(r'#\d+\s*', '', text).strip()
+
                     # ✅ CORRECTION : Passer l'URL réelle au scraper
                     result = self.scrape_and_process_pokemon(clean_pokemon_name, generation, number, real_url)
-                    
+
                     # Log final du test
                     if result:
                         self.logger.info(f"✅ Test réussi pour {pokemon_name}")
                     else:
                         self.logger.error(f"❌ Test échoué pour {pokemon_name}")
-                    
+
                     # Afficher les statistiques du test
                     self.log_stats()
                     return result
@@ -1848,33 +2225,132 @@ class PokemonScraperV2:
         except Exception as e:
             generation_url = f"{self.base_url}/page/jeuxvideo/dossier_shasse/pokedex_shasse/portail/{generation}g"
             self.log_error("TEST_ERROR", pokemon_name, generation, generation_url, e, "Erreur lors du test")
-        return False
+            return False
+
+def parse_page_in_process(html_content, pokemon_name, parser_backend, restricted_parse):
+    """Parsing d'une page dans un processus du pool (voir process_entries_pipeline) : dict sérialisable."""
+    global _PARSING_SCRAPER
+    if _PARSING_SCRAPER is None:
+        # Les méthodes de parsing n'utilisent aucun état : ni BDD, ni session HTTP, ni logs à ouvrir
+        _PARSING_SCRAPER = PokemonScraperV2.__new__(PokemonScraperV2)
+    _PARSING_SCRAPER.parser_backend = parser_backend
+    _PARSING_SCRAPER.restricted_parse = restricted_parse
+    return _PARSING_SCRAPER.parse_page_html(html_content, pokemon_name)
+
+_PARSING_SCRAPER = None
+
+def pop_cli_option(args, name, default=None, cast=str):
+    """Retire une option "--nom valeur" de la liste d'arguments et retourne sa valeur."""
+    if name in args:
+        index = args.index(name)
+        if index + 1 >= len(args):
+            raise SystemExit(f"Valeur manquante pour l'option {name}")
+        value = cast(args[index + 1])
+        del args[index:index + 2]
+        return value
+    return default
+
+def pop_cli_flag(args, name):
+    """Retire un drapeau "--nom" de la liste d'arguments et retourne s'il était présent."""
+    if name in args:
+        args.remove(name)
+        return True
+    return False
 
 if __name__ == "__main__":
     import sys
     
-    scraper = PokemonScraperV2()
+    args = sys.argv[1:]
+    workers = pop_cli_option(args, '--workers', 1, int)
+    max_rps = pop_cli_option(args, '--rps', 4.0, float)
+    max_rate = pop_cli_option(args, '--max-rps', None, float)
+    host_concurrency = pop_cli_option(args, '--host-concurrency', 4, int)
+    max_retries = pop_cli_option(args, '--retries', MAX_RETRIES, int)
+    cache_max_mb = pop_cli_option(args, '--cache-max-mb', 500, float)
+    cache_only = pop_cli_flag(args, '--cache-only')
+    use_cache = not pop_cli_flag(args, '--no-cache')
+    base_url = pop_cli_option(args, '--base-url', POKEBIP_URL)
+    db_path = pop_cli_option(args, '--db', "pokemon_shasse_v2.db")
+    record_path = pop_cli_option(args, '--record')
+    parser_backend = pop_cli_option(args, '--parser', "auto")
+    restricted_parse = not pop_cli_flag(args, '--full-parse')
+    skip_unchanged = not pop_cli_flag(args, '--reingest')
+    parse_processes = pop_cli_option(args, '--parse-processes', None, int)
+    queue_size = pop_cli_option(args, '--queue-size', None, int)
+    
+    # ✅ NOUVEAU : reparse = hors-ligne depuis le cache, parsing forcé sur tous les cœurs par défaut
+    reparse = len(args) > 0 and args[0] == "reparse"
+    if parse_processes is None:
+        parse_processes = (os.cpu_count() or 1) if reparse else 0
     
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "all":
-            # Scraping complet de tout
-            scraper.scrape_all_complete()
-        elif sys.argv[1] == "gen" and len(sys.argv) >= 3:
-            # Scraping d'une génération spécifique
-            generation = int(sys.argv[2])
-            scraper.scrape_generation_complete(generation)
-        elif sys.argv[1] == "test" and len(sys.argv) >= 4:
-            # Test sur un Pokemon spécifique
-            pokemon_name = sys.argv[2]
-            generation = int(sys.argv[3])
-            scraper.test_single_pokemon(pokemon_name, generation)
+    recorder = None
+    if record_path:
+        from replay_corpus import CorpusRecorder
+        recorder = CorpusRecorder(record_path)
+    
+    # ✅ CORRECTION : Corpus fermé même après un crash ou Ctrl+C (sinon zip sans répertoire central, illisible)
+    try:
+        scraper = PokemonScraperV2(workers=workers, max_requests_per_second=max_rps, max_rate=max_rate,
+                                   host_concurrency=host_concurrency, max_retries=max_retries,
+                                   use_cache=use_cache, cache_only=cache_only or reparse, cache_max_mb=cache_max_mb,
+                                   base_url=base_url, db_path=db_path, recorder=recorder,
+                                   parser_backend=parser_backend, restricted_parse=restricted_parse,
+                                   skip_unchanged=skip_unchanged, parse_processes=parse_processes,
+                                   queue_size=queue_size, force_parse=reparse)
+    
+        if len(args) > 0:
+            if args[0] == "all":
+                # Scraping complet de tout
+                scraper.scrape_all_complete()
+            elif args[0] == "resume":
+                # ✅ NOUVEAU : Reprise après interruption (jobs en attente ou en échec seulement)
+                generations = [int(args[1])] if len(args) >= 2 else range(1, 10)
+                scraper.resume_scraping(generations)
+            elif args[0] == "reparse":
+                # ✅ NOUVEAU : Réappliquer le parsing à toutes les pages en cache (aucune requête réseau)
+                generations = [int(args[1])] if len(args) >= 2 else range(1, 10)
+                scraper.reparse_cached(generations)
+            elif args[0] == "gen" and len(args) >= 2:
+                # Scraping d'une génération spécifique
+                generation = int(args[1])
+                scraper.scrape_generation_complete(generation)
+                scraper.log_stats()
+            elif args[0] == "test" and len(args) >= 3:
+                # Test sur un Pokemon spécifique
+                pokemon_name = args[1]
+                generation = int(args[2])
+                scraper.test_single_pokemon(pokemon_name, generation)
+            else:
+                print("Usage:")
+                print("  python pokemon_scraper_v2.py all                    # Scrape tout")
+                print("  python pokemon_scraper_v2.py gen <num>              # Scrape génération")
+                print("  python pokemon_scraper_v2.py resume [num]           # Reprend les jobs en attente / en échec")
+                print("  python pokemon_scraper_v2.py reparse [num]          # Reparse les pages en cache (tous les cœurs)")
+                print("  python pokemon_scraper_v2.py test <pokemon> <gen>   # Test un Pokemon")
+                print("Options:")
+                print("  --workers <n>    Threads réseau du pipeline (pages, images) ; 1 = mode séquentiel (défaut: 1)")
+                print("  --parse-processes <n>  Parsing dans un pool de n processus (active le pipeline, défaut: 0,"
+                      " nombre de cœurs pour reparse)")
+                print("  --queue-size <n> Taille des files entre étages du pipeline (défaut: 2x --workers)")
+                print("  --rps <x>        Débit initial par hôte, ajusté selon latence et erreurs (défaut: 4, 0 = sans limite)")
+                print("  --max-rps <x>    Débit maximal atteint par l'ajustement (défaut: 4x --rps)")
+                print("  --host-concurrency <n>  Requêtes simultanées max par hôte (défaut: 4)")
+                print("  --retries <n>    Réessais sur 429 / 5xx / timeout, backoff exponentiel (défaut: 4)")
+                print("  --cache-only     Mode hors-ligne : ne servir que depuis le cache HTTP")
+                print("  --no-cache       Désactiver le cache HTTP persistant")
+                print("  --cache-max-mb <n>  Taille max du cache avant éviction LRU (défaut: 500)")
+                print("  --record <zip>   Enregistrer chaque réponse dans un corpus de rejeu (replay_corpus.py)")
+                print("  --base-url <url> Scraper un autre serveur (ex: serveur de rejeu local)")
+                print("  --db <fichier>   Base SQLite cible (défaut: pokemon_shasse_v2.db)")
+                print("  --parser <nom>   Backend de parsing : auto, lxml ou html.parser (défaut: auto)")
+                print("  --full-parse     Construire l'arbre complet des pages de détails (pas de SoupStrainer)")
+                print("  --reingest       Reparser et réécrire chaque Pokemon même si son empreinte est inchangée")
         else:
-            print("Usage:")
-            print("  python pokemon_scraper_v2.py all                    # Scrape tout")
-            print("  python pokemon_scraper_v2.py gen <num>              # Scrape génération")
-            print("  python pokemon_scraper_v2.py test <pokemon> <gen>   # Test un Pokemon")
-    else:
-        # Par défaut: Test avec Bulbizarre
-        print("Scraper V2 avec nouveau modèle BDD prêt !")
-        print("🧪 Test par défaut avec Bulbizarre...")
-        scraper.test_single_pokemon("bulbizarre", 1) 
\ No newline at end of file
+            # Par défaut: Test avec Bulbizarre
+            print("Scraper V2 avec nouveau modèle BDD prêt !")
+            print("🧪 Test par défaut avec Bulbizarre...")
+            scraper.test_single_pokemon("bulbizarre", 1)
+    finally:
+        if recorder is not None:
+            recorder.close()
+            print(f"🎬 Corpus enregistré: {record_path} ({len(recorder)} URLs)")
\ No newline at end of file
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Limiteur de débit partagé pour le scraper pokebip
+- Seau à jetons par hôte, partagé par les pages, sprites et images HQ de tous les workers
+- Débit adaptatif : hausse de 10 % par réponse rapide, division par deux sur 429 / 5xx /
+  timeout, baisse douce si la latence se dégrade (une baisse par seconde au plus)
+- Budget de requêtes simultanées par hôte, indépendant du nombre de workers
+- Pause globale de l'hôte sur Retry-After, backoff exponentiel avec jitter entre tentatives
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+# Bornes et pas d'adaptation du débit (requêtes/seconde)
+MIN_REQUESTS_PER_SECOND = 0.5
+MAX_RATE_FACTOR = 4             # Plafond par défaut : 4x le débit initial
+RATE_INCREASE_FACTOR = 1.1      # Réponse rapide
+RATE_DECREASE_FACTOR = 0.5      # 429 / 5xx / timeout
+SLOW_DECREASE_FACTOR = 0.9      # Latence dégradée
+DECREASE_COOLDOWN = 1.0         # Les erreurs des requêtes déjà en vol ne redivisent pas le débit (s)
+
+# Latence : moyenne mobile comparée à la meilleure latence observée
+LATENCY_SMOOTHING = 0.2
+LATENCY_DEGRADED_FACTOR = 3
+LATENCY_FLOOR = 0.25            # En dessous, la latence n'est jamais considérée dégradée (s)
+
+# Backoff entre tentatives : base * 2^tentative, plafonné, avec jitter complet
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+RETRY_AFTER_MAX = 120.0
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Délai avant la tentative suivante (attempt = 0 après le premier échec), jitter complet."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def parse_retry_after(value):
+    """En-tête Retry-After (secondes ou date HTTP) -> secondes d'attente plafonnées, ou None."""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), RETRY_AFTER_MAX)
+
+
+class RateLimiter:
+    """Débit adaptatif et concurrence bornée pour UN hôte, partagés entre tous les threads.
+
+    max_requests_per_second = 0 : pas de cadence (seuls Retry-After et la concurrence s'appliquent).
+    """
+
+    def __init__(self, max_requests_per_second=4.0, max_rate=None, max_concurrency=4, burst=2):
+        self.adaptive = bool(max_requests_per_second)
+        self.rate = float(max_requests_per_second or 0)
+        self.max_rate = max_rate or self.rate * MAX_RATE_FACTOR
+        self.min_rate = min(MIN_REQUESTS_PER_SECOND, self.rate)
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = float('-inf')
+        self._latency = None
+        self._best_latency = None
+        self._lock = threading.Lock()
+        self._concurrency = threading.BoundedSemaphore(max(1, int(max_concurrency)))
+        self.stats = {'throttled': 0, 'slowdowns': 0, 'waited_seconds': 0.0}
+
+    def acquire(self):
+        """Bloque jusqu'à ce qu'un jeton soit disponible (et que la pause Retry-After soit finie)."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                delay = self._paused_until - now
+                if delay <= 0 and self.adaptive:
+                    self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+                    self._last_refill = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    delay = (1 - self._tokens) / self.rate
+                elif delay <= 0:
+                    return
+                self.stats['waited_seconds'] += delay
+            time.sleep(delay)
+
+    @contextmanager
+    def slot(self):
+        """Créneau de requête : un jeton + une place dans le budget de concurrence de l'hôte."""
+        with self._concurrency:
+            self.acquire()
+            yield
+
+    def on_success(self, latency):
+        """Réponse exploitable : hausse du débit, sauf si la latence moyenne se dégrade."""
+        with self._lock:
+            self._latency = latency if self._latency is None else (
+                (1 - LATENCY_SMOOTHING) * self._latency + LATENCY_SMOOTHING * latency)
+            self._best_latency = latency if self._best_latency is None else min(self._best_latency, latency)
+            if not self.adaptive:
+                return
+            if self._latency > max(LATENCY_FLOOR, LATENCY_DEGRADED_FACTOR * self._best_latency):
+                now = time.monotonic()
+                if now - self._last_decrease >= DECREASE_COOLDOWN:
+                    self.rate = max(self.min_rate, self.rate * SLOW_DECREASE_FACTOR)
+                    self._last_decrease = now
+                    self.stats['slowdowns'] += 1
+            else:
+                self.rate = min(self.max_rate, self.rate * RATE_INCREASE_FACTOR)
+
+    def on_throttle(self, retry_after=None):
+        """429 / 5xx / timeout : débit divisé par deux et pause de l'hôte si Retry-After est fourni."""
+        with self._lock:
+            self.stats['throttled'] += 1
+            now = time.monotonic()
+            if self.adaptive and now - self._last_decrease >= DECREASE_COOLDOWN:
+                self.rate = max(self.min_rate, self.rate * RATE_DECREASE_FACTOR)
+                self._tokens = min(self._tokens, 0.0)
+                self._last_decrease = now
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+    @property
+    def latency(self):
+        """Latence moyenne mobile observée (s), ou None avant la première réponse."""
+        return self._latency
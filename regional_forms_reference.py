@@ -7,6 +7,10 @@ Les formes régionales sont des variants d'espèces Pokémon adaptés à des ré
 Ils diffèrent des formes normales par leur type, apparence, et parfois leurs évolutions.
 """
 
+import functools
+import re
+import time
+
 # ================================
 # FORMES RÉGIONALES OFFICIELLES
 # ================================
@@ -158,6 +162,71 @@ NORMAL_FORMS = {
     'oricorio_sensu': 'plumeline buyō'
 }
 
+# ================================
+# MOTIFS DE CLASSIFICATION
+# ================================
+
+# ✅ NOUVEAU : Listes de motifs partagées par les fonctions ci-dessous et par FormClassifier
+
+# Patterns RÉELS utilisés dans la base de données
+REGIONAL_SUFFIXES = [
+    '-a',     # Alola (ex: Feunard-A, Miaouss-A)
+    '-g',     # Galar (ex: Canarticho-G, Galopa-G) 
+    '-h',     # Hisui (ex: Arcanin-H, Clamiral-H)
+    '-p',     # Paldea (ex: Axoloto-P, Tauros-P)
+    '-pa',    # Paldea alternatif
+    '-hi',    # Hisui alternatif
+]
+
+# Suffixe -> région, par ordre de priorité
+REGION_SUFFIXES = [
+    ('alola', ['-a']),
+    ('galar', ['-g']),
+    ('hisui', ['-h', '-hi']),
+    ('paldea', ['-p', '-pa']),
+]
+
+REGIONAL_EVOLUTION_NAMES = [
+    'perrserker', 'cursola', "sirfetch'd", 'mr. rime', 'obstagoon', 'runerigus',
+    'wyrdeer', 'kleavor', 'ursaluna', 'basculegion', 'sneasler', 'overqwil',
+    'clodsire'
+]
+
+UNOWN_NAMES = ['zarbi', 'unown']
+UNOWN_OTHER_LETTERS = ['_b', '_c', '_d', '_e', '_f', '_g', '_h']
+
+# Différences de genre avec patterns spécifiques
+GENDER_PATTERNS = [' mâle', ' femelle', ' male', ' female', ' m', ' f']
+
+# Variations géographiques  
+GEOGRAPHIC_PATTERNS = [' ouest', ' est', ' west', ' east']
+
+# Formes saisonnières et variations de couleur
+COLOR_SEASON_PATTERNS = [
+    ' blanc', ' bleu', ' jaune', ' orange', ' rouge', ' vert', ' violet', ' noir',
+    ' white', ' blue', ' yellow', ' orange', ' red', ' green', ' purple', ' black',
+    ' été', ' automne', ' hiver', ' printemps',
+    ' summer', ' autumn', ' winter', ' spring'
+]
+
+# Formes spéciales avec tailles
+SIZE_PATTERNS = [' s', ' m', ' l', ' xl', ' petit', ' grand', ' super']
+
+# Formes Rotom / Oricorio : (espèces, formes)
+ROTOM_BASES = ['motisma', 'rotom']
+ROTOM_FORMES = ['thermique', 'lavage', 'froid', 'hélice', 'tonte', 'heat', 'wash', 'frost', 'fan', 'mow']
+ORICORIO_BASES = ['oricorio', 'plumeline']
+ORICORIO_FORMES = ['baile', 'pom-pom', 'pau', 'sensu', 'flamenco', 'pom', 'hula', 'buyō']
+
+# Formes spéciales diverses
+SPECIAL_KEYWORDS = [
+    'cr.', 'no.', 'dé.', 'sa.', 'blc',  # Lougaroc Cr., Cheniselle Dé., Bargantua Blc
+    'éternel', 'authentique', 'contrefaçon',
+    'temps passé', 'diurne', 'nocturne',
+    'zen', 'transe', 'banc', 'noyau',
+    'floraison', 'bourgeon'
+]
+
 # ================================
 # FONCTIONS UTILITAIRES
 # ================================
@@ -169,47 +238,29 @@ def is_regional_form(pokemon_name):
     # ✅ CORRECTION MAJEURE : Les noms Pokemon n'ont pas de préfixe XXX_
     # Le préfixe XXX_ est dans le sprite filename, pas dans le nom Pokemon !
     # Donc on vérifie directement les suffixes régionaux
-    
-    # Patterns RÉELS utilisés dans la base de données
-    regional_suffixes = [
-        '-a',     # Alola (ex: Feunard-A, Miaouss-A)
-        '-g',     # Galar (ex: Canarticho-G, Galopa-G) 
-        '-h',     # Hisui (ex: Arcanin-H, Clamiral-H)
-        '-p',     # Paldea (ex: Axoloto-P, Tauros-P)
-        '-pa',    # Paldea alternatif
-        '-hi',    # Hisui alternatif
-    ]
-    
-    return any(suffix in name_lower for suffix in regional_suffixes)
+    return any(suffix in name_lower for suffix in REGIONAL_SUFFIXES)
 
 def is_regional_evolution(pokemon_name):
     """Vérifie si c'est une évolution exclusive régionale"""
     name_lower = pokemon_name.lower()
     
-    regional_evos = [
-        'perrserker', 'cursola', "sirfetch'd", 'mr. rime', 'obstagoon', 'runerigus',
-        'wyrdeer', 'kleavor', 'ursaluna', 'basculegion', 'sneasler', 'overqwil',
-        'clodsire'
-    ]
-    
-    return any(evo in name_lower for evo in regional_evos)
+    return any(evo in name_lower for evo in REGIONAL_EVOLUTION_NAMES)
 
 def get_region_from_name(pokemon_name):
     """Retourne la région d'une forme régionale"""
     name_lower = pokemon_name.lower()
     
     # ✅ CORRECTION : Plus besoin de vérifier le préfixe XXX_
-    if '-a' in name_lower:
-        return 'alola'
-    elif '-g' in name_lower:
-        return 'galar'
-    elif '-h' in name_lower or '-hi' in name_lower:
-        return 'hisui'
-    elif '-p' in name_lower or '-pa' in name_lower:
-        return 'paldea'
+    for region, suffixes in REGION_SUFFIXES:
+        if any(suffix in name_lower for suffix in suffixes):
+            return region
     
     return None
 
+def _is_unown_letter_a(name_lower):
+    """Zarbi forme A (seule lettre gardée dans le pokédex principal)"""
+    return '_a' in name_lower and not any(x in name_lower for x in UNOWN_OTHER_LETTERS)
+
 def should_be_in_pokedex_tab(pokemon_name):
     """Détermine si le Pokémon doit rester dans l'onglet pokédex principal"""
     name_lower = pokemon_name.lower()
@@ -223,11 +274,8 @@ def should_be_in_pokedex_tab(pokemon_name):
         return False
     
     # Zarbi forme A reste dans le pokédex principal
-    if ('zarbi' in name_lower or 'unown' in name_lower):
-        if '_a' in name_lower and not any(x in name_lower for x in ['_b', '_c', '_d', '_e', '_f', '_g', '_h']):
-            return True
-        else:
-            return False
+    if any(unown in name_lower for unown in UNOWN_NAMES):
+        return _is_unown_letter_a(name_lower)
     
     # Toutes les autres formes spéciales vont dans "autres formes"
     if should_be_in_other_forms_tab(pokemon_name):
@@ -255,8 +303,8 @@ def should_be_in_other_forms_tab(pokemon_name):
         return False
     
     # Zarbi : toutes les lettres sauf A vont dans "autres formes"
-    if ('zarbi' in name_lower or 'unown' in name_lower):
-        return not ('_a' in name_lower and not any(x in name_lower for x in ['_b', '_c', '_d', '_e', '_f', '_g', '_h']))
+    if any(unown in name_lower for unown in UNOWN_NAMES):
+        return not _is_unown_letter_a(name_lower)
     
     # Sprites avec préfixe XXX_ qui ne sont pas régionaux = autres formes
     if name_lower.startswith('xxx_') and not is_regional_form(pokemon_name):
@@ -265,55 +313,139 @@ def should_be_in_other_forms_tab(pokemon_name):
     # ✅ AJOUT : Détection spécifique des formes alternatives courantes
     
     # Différences de genre avec patterns spécifiques
-    if any(pattern in name_lower for pattern in [' mâle', ' femelle', ' male', ' female', ' m', ' f']):
+    if any(pattern in name_lower for pattern in GENDER_PATTERNS):
         # Sauf si c'est juste une lettre isolée comme dans "Zarbi M"
         if not ('zarbi' in name_lower and len(pokemon_name.split()[-1]) == 1):
             return True
     
     # Variations géographiques  
-    if any(pattern in name_lower for pattern in [' ouest', ' est', ' west', ' east']):
+    if any(pattern in name_lower for pattern in GEOGRAPHIC_PATTERNS):
         return True
     
     # Formes saisonnières et variations de couleur
-    if any(pattern in name_lower for pattern in [
-        ' blanc', ' bleu', ' jaune', ' orange', ' rouge', ' vert', ' violet', ' noir',
-        ' white', ' blue', ' yellow', ' orange', ' red', ' green', ' purple', ' black',
-        ' été', ' automne', ' hiver', ' printemps',
-        ' summer', ' autumn', ' winter', ' spring'
-    ]):
+    if any(pattern in name_lower for pattern in COLOR_SEASON_PATTERNS):
         return True
     
     # Formes spéciales avec tailles
-    if any(pattern in name_lower for pattern in [' s', ' m', ' l', ' xl', ' petit', ' grand', ' super']):
+    if any(pattern in name_lower for pattern in SIZE_PATTERNS):
         # Sauf Zarbi avec une seule lettre
         if not ('zarbi' in name_lower and len(pokemon_name.split()[-1]) == 1):
             return True
     
     # Formes Rotom avec patterns spécifiques
-    if any(base in name_lower for base in ['motisma', 'rotom']):
-        if any(forme in name_lower for forme in ['thermique', 'lavage', 'froid', 'hélice', 'tonte', 'heat', 'wash', 'frost', 'fan', 'mow']):
+    if any(base in name_lower for base in ROTOM_BASES):
+        if any(forme in name_lower for forme in ROTOM_FORMES):
             return True
     
     # Formes Oricorio/Plumeline 
-    if any(base in name_lower for base in ['oricorio', 'plumeline']):
-        if any(forme in name_lower for forme in ['baile', 'pom-pom', 'pau', 'sensu', 'flamenco', 'pom', 'hula', 'buyō']):
+    if any(base in name_lower for base in ORICORIO_BASES):
+        if any(forme in name_lower for forme in ORICORIO_FORMES):
             return True
     
     # Formes spéciales diverses
-    special_keywords = [
-        'cr.', 'no.', 'dé.', 'sa.', 'blc',  # Lougaroc Cr., Cheniselle Dé., Bargantua Blc
-        'éternel', 'authentique', 'contrefaçon',
-        'temps passé', 'diurne', 'nocturne',
-        'zen', 'transe', 'banc', 'noyau',
-        'floraison', 'bourgeon'
-    ]
-    
-    if any(keyword in name_lower for keyword in special_keywords):
+    if any(keyword in name_lower for keyword in SPECIAL_KEYWORDS):
         return True
     
     # ✅ NOUVEAU : Si aucun pattern spécifique détecté, c'est un Pokemon normal
     return False
 
+# ✅ NOUVEAU : Onglet /api/sprites précalculé (colonne pokemon.tab)
+TAB_POKEDEX = 'pokedex'
+TAB_OTHER = 'other'
+TAB_REGIONAL_PREFIX = 'regional:'
+
+def classify_tab_with_rules(pokemon_name):
+    """Onglet calculé avec les fonctions ci-dessus, dans l'ordre des règles de /api/sprites (référence)"""
+    if should_be_in_pokedex_tab(pokemon_name):
+        return TAB_POKEDEX
+    if should_be_in_regional_tab(pokemon_name):
+        return f"{TAB_REGIONAL_PREFIX}{get_region_from_name(pokemon_name)}"
+    if should_be_in_other_forms_tab(pokemon_name):
+        return TAB_OTHER
+    # Aucune règle ne correspond : onglet génération
+    return TAB_POKEDEX
+
+# ================================
+# CLASSIFIEUR COMPILÉ
+# ================================
+
+def _compile_alternation(patterns):
+    """Regex d'alternance sur des sous-chaînes littérales (les plus longues d'abord)"""
+    unique_patterns = sorted(set(patterns), key=len, reverse=True)
+    return re.compile('|'.join(re.escape(pattern) for pattern in unique_patterns))
+
+class FormClassifier:
+    """Classifieur compilé : onglet et région en une passe, résultats mémorisés par nom"""
+    
+    def __init__(self):
+        # Chaque suffixe régional contient un seul '-' : findall retrouve tous les suffixes présents
+        self.regional_suffixes = _compile_alternation(REGIONAL_SUFFIXES)
+        self.unown = _compile_alternation(UNOWN_NAMES)
+        self.unown_other_letters = _compile_alternation(UNOWN_OTHER_LETTERS)
+        # Motifs qui suffisent seuls à classer en "autres formes" (hors Zarbi, traité avant)
+        self.other_forms = _compile_alternation(
+            GENDER_PATTERNS + GEOGRAPHIC_PATTERNS + COLOR_SEASON_PATTERNS + SIZE_PATTERNS + SPECIAL_KEYWORDS)
+        self.rotom_bases = _compile_alternation(ROTOM_BASES)
+        self.rotom_formes = _compile_alternation(ROTOM_FORMES)
+        self.oricorio_bases = _compile_alternation(ORICORIO_BASES)
+        self.oricorio_formes = _compile_alternation(ORICORIO_FORMES)
+        self.classify = functools.lru_cache(maxsize=None)(self.classify_uncached)
+    
+    def classify_uncached(self, pokemon_name):
+        """Retourne (onglet, région ou None) - mêmes résultats que classify_tab_with_rules"""
+        name_lower = pokemon_name.lower()
+        
+        suffixes = set(self.regional_suffixes.findall(name_lower))
+        if suffixes:
+            region = next(region for region, region_suffixes in REGION_SUFFIXES if suffixes.intersection(region_suffixes))
+            return f"{TAB_REGIONAL_PREFIX}{region}", region
+        
+        # Les évolutions régionales exclusives n'ont pas d'onglet dédié : mêmes règles que les autres
+        if self.unown.search(name_lower):
+            letter_a = '_a' in name_lower and not self.unown_other_letters.search(name_lower)
+            return (TAB_POKEDEX if letter_a else TAB_OTHER), None
+        
+        if (name_lower.startswith('xxx_')
+                or self.other_forms.search(name_lower)
+                or (self.rotom_bases.search(name_lower) and self.rotom_formes.search(name_lower))
+                or (self.oricorio_bases.search(name_lower) and self.oricorio_formes.search(name_lower))):
+            return TAB_OTHER, None
+        
+        return TAB_POKEDEX, None
+
+FORM_CLASSIFIER = FormClassifier()
+
+def classify_tab(pokemon_name):
+    """Onglet du Pokémon : 'pokedex', 'regional:<région>' ou 'other' (classifieur compilé)"""
+    return FORM_CLASSIFIER.classify(pokemon_name)[0]
+
+def run_classifier_benchmark(names, repeat=20):
+    """Compare règles d'origine / classifieur compilé / mémorisé sur une liste de noms"""
+    mismatches = []
+    for name in names:
+        expected, (actual, _) = classify_tab_with_rules(name), FORM_CLASSIFIER.classify_uncached(name)
+        if expected != actual:
+            mismatches.append((name, expected, actual))
+    
+    def timed(classify):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for name in names:
+                classify(name)
+        return (time.perf_counter() - start) / repeat * 1000
+    
+    memoised = FormClassifier()
+    for name in names:
+        memoised.classify(name)
+    
+    return {
+        'names': len(names),
+        'mismatches': mismatches,
+        'rules_ms': timed(classify_tab_with_rules),
+        'compiled_ms': timed(FormClassifier().classify_uncached),
+        'memoised_ms': timed(memoised.classify),
+    }
+
 # ================================
 # RÉSUMÉ DES RÈGLES
 # ================================
@@ -343,4 +475,29 @@ RÈGLES DE CLASSIFICATION :
    - Zarbi autres lettres
    - Formes saisonnières/combat supplémentaires
    - Tout ce qui ferait doublon sans être régional
-""" 
\ No newline at end of file
+""" 
+
+if __name__ == "__main__":
+    import sqlite3
+    import sys
+    
+    # ✅ NOUVEAU : python regional_forms_reference.py benchmark [base.db] [répétitions]
+    if len(sys.argv) >= 2 and sys.argv[1] == "benchmark":
+        db_path = sys.argv[2] if len(sys.argv) >= 3 else "pokemon_shasse_v2.db"
+        repeat = int(sys.argv[3]) if len(sys.argv) >= 4 else 20
+        conn = sqlite3.connect(db_path)
+        names = [row[0] for row in conn.execute('SELECT name FROM pokemon ORDER BY id')]
+        conn.close()
+        
+        result = run_classifier_benchmark(names, repeat)
+        print(f"📊 {result['names']} noms, {repeat} passes")
+        print(f"   Règles d'origine     : {result['rules_ms']:.2f} ms/passe")
+        print(f"   Classifieur compilé  : {result['compiled_ms']:.2f} ms/passe "
+              f"(x{result['rules_ms'] / result['compiled_ms']:.1f})")
+        print(f"   Compilé + mémorisé   : {result['memoised_ms']:.2f} ms/passe "
+              f"(x{result['rules_ms'] / result['memoised_ms']:.1f})")
+        for name, expected, actual in result['mismatches']:
+            print(f"❌ {name}: règles={expected} compilé={actual}")
+        if result['mismatches']:
+            sys.exit(1)
+        print("✅ Classifications identiques aux règles d'origine")
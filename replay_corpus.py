@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Corpus de rejeu hors-ligne pour le scraper pokebip
+- CorpusRecorder : enregistre chaque réponse récupérée pendant un scraping dans une archive zip compressée
+- ReplayServer : serveur HTTP local qui sert ce corpus (latence et erreurs injectables)
+- run_benchmark : mesure pages/s, ms de parsing/page et ms BDD/page sur le serveur local
+- run_parse_benchmark : mesure le temps de parsing pur par page de détails du corpus
+  (optionnellement réparti sur un pool de processus, comme la commande reparse du scraper)
+- run_golden_check : vérifie qu'un backend de parsing produit exactement les mêmes détails que
+  la référence (html.parser, arbre complet) sur toutes les pages du corpus
+
+Usage:
+  python pokemon_scraper_v2.py all --record corpus.zip          # Enregistrer un corpus
+  python replay_corpus.py serve corpus.zip [--port 8765] [--latency-ms 50] [--error-rate 0.01] [--retry-after 2]
+  python replay_corpus.py bench corpus.zip [gen <num> | all] [--workers 4] [--latency-ms 0]
+  python replay_corpus.py parse corpus.zip [--repeat 3] [--parser lxml] [--full-parse] [--processes 4]
+  python replay_corpus.py golden corpus.zip [--parser lxml] [--full-parse]
+  python replay_corpus.py list corpus.zip
+"""
+
+import contextlib
+import hashlib
+import io
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+# Pages de détails Pokemon (hors portails /portail/{n}g)
+DETAIL_PAGE_PATTERN = re.compile(r'/page/jeuxvideo/dossier_shasse/pokedex_shasse/(\d+)g/([^/?]+)$')
+
+
+def corpus_key(url):
+    """Clé d'un membre du corpus : chemin + query de l'URL, sans le domaine."""
+    parts = urlsplit(url)
+    key = parts.path or '/'
+    if parts.query:
+        key += '?' + parts.query
+    return key.lstrip('/')
+
+
+class CorpusRecorder:
+    """Enregistre les réponses HTTP dans une archive zip (une entrée par URL, type MIME en commentaire)."""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._zip = zipfile.ZipFile(path, 'a', compression=zipfile.ZIP_DEFLATED)
+        self._recorded = set(self._zip.namelist())
+
+    def record(self, url, response):
+        """Ajoute une réponse au corpus (ignorée si l'URL est déjà présente)."""
+        key = corpus_key(url)
+        with self._lock:
+            if key in self._recorded:
+                return
+            info = zipfile.ZipInfo(key, date_time=time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            content_type = response.headers.get('Content-Type') or ''
+            if not content_type and getattr(response, 'encoding', None):
+                content_type = f"text/html; charset={response.encoding}"
+            info.comment = content_type.encode('utf-8')
+            self._zip.writestr(info, response.content)
+            self._recorded.add(key)
+
+    def __len__(self):
+        return len(self._recorded)
+
+    def close(self):
+        with self._lock:
+            self._zip.close()
+
+
+def load_corpus(path):
+    """Charge un corpus en mémoire : {chemin: (corps, type MIME)}."""
+    pages = {}
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            content_type = info.comment.decode('utf-8') or 'application/octet-stream'
+            pages['/' + info.filename] = (archive.read(info), content_type)
+    return pages
+
+
+def decode_body(body, content_type):
+    """Décode le corps d'une page avec le charset enregistré (utf-8 par défaut)."""
+    match = re.search(r'charset=([\w-]+)', content_type)
+    return body.decode(match.group(1) if match else 'utf-8', errors='replace')
+
+
+def iter_detail_pages(pages):
+    """Itère (génération, slug, html) sur les pages de détails Pokemon d'un corpus chargé."""
+    for path in sorted(pages):
+        match = DETAIL_PAGE_PATTERN.search(path)
+        if match:
+            body, content_type = pages[path]
+            yield int(match.group(1)), match.group(2), decode_body(body, content_type)
+
+
+class ReplayServer:
+    """Serveur HTTP local servant un corpus enregistré, avec latence et erreurs injectables."""
+
+    def __init__(self, corpus_path, host='127.0.0.1', port=0, latency_ms=0, jitter_ms=0,
+                 error_rate=0.0, error_status=503, seed=None, retry_after=None):
+        self.pages = load_corpus(corpus_path)
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        server = self
+
+        class ReplayHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server.random_lock:
+                    delay = server.latency + server.random.uniform(0, server.jitter)
+                    inject_error = server.random.random() < server.error_rate
+                if delay > 0:
+                    time.sleep(delay)
+
+                if inject_error:
+                    self.send_response(server.error_status)
+                    if server.retry_after is not None:
+                        self.send_header('Retry-After', str(server.retry_after))
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                page = server.pages.get(self.path)
+                if page is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                body, content_type = page
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return ReplayHandler
+
+    def start(self):
+        """Démarre le serveur dans un thread de fond."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def run_benchmark(corpus_path, generation=None, workers=1, latency_ms=0, error_rate=0.0, quiet=True):
+    """Rejoue scrape_generation_complete (ou scrape_all_complete si generation=None) contre le corpus.
+
+    La base et les assets sont créés dans un dossier temporaire : le benchmark ne touche
+    ni pokemon_shasse_v2.db ni le dossier assets du projet.
+    """
+    from pokemon_scraper_v2 import PokemonScraperV2
+
+    server = ReplayServer(corpus_path, latency_ms=latency_ms, error_rate=error_rate, seed=0).start()
+    workdir = tempfile.mkdtemp(prefix='pokescrap_bench_')
+    try:
+        scraper = PokemonScraperV2(
+            workers=workers,
+            max_requests_per_second=0,
+            use_cache=False,
+            base_url=server.base_url,
+            db_path=os.path.join(workdir, 'bench.db'),
+            assets_dir=os.path.join(workdir, 'assets')
+        )
+
+        output = io.StringIO() if quiet else sys.stdout
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            if generation is None:
+                scraper.scrape_all_complete()
+            else:
+                scraper.scrape_generation_complete(generation)
+        elapsed = time.perf_counter() - start
+
+        stats = scraper.stats
+        pages = stats['pages_count']
+        return {
+            'target': 'scrape_all_complete' if generation is None else f'scrape_generation_complete({generation})',
+            'workers': workers,
+            'elapsed_seconds': elapsed,
+            'pokemon': stats['total_processed'],
+            'errors': stats['error_count'],
+            'requests': stats['requests_count'],
+            'retries': stats['retries_count'],
+            'pages': pages,
+            'pages_per_second': pages / elapsed if elapsed > 0 else 0,
+            'parse_ms_per_page': stats['parse_seconds'] * 1000 / pages if pages else 0,
+            'db_ms_per_page': stats['db_seconds'] * 1000 / pages if pages else 0,
+            'db_rows_per_second': stats['db_rows'] / stats['db_seconds'] if stats['db_seconds'] else 0
+        }
+    finally:
+        server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def make_parsing_scraper(workdir, parser_backend='auto', restricted_parse=True):
+    """Scraper dédié au parsing hors-ligne (base et assets dans un dossier temporaire)."""
+    from pokemon_scraper_v2 import PokemonScraperV2
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        return PokemonScraperV2(use_cache=False, db_path=os.path.join(workdir, 'parse.db'),
+                                assets_dir=os.path.join(workdir, 'assets'),
+                                parser_backend=parser_backend, restricted_parse=restricted_parse)
+
+
+def parse_page_outputs(scraper, html, slug):
+    """Sorties des extracteurs pour une page : détails, shiny lock et images candidates HQ."""
+    soup, page_text = scraper.parse_detail_page(html)
+    return {
+        'details': scraper.parse_pokemon_details_v2(soup, slug, page_text),
+        'is_shiny_lock': scraper.detect_shiny_lock(soup, slug, page_text),
+        'images': [img.get('src', '') for img in soup.find_all('img')]
+    }
+
+
+def _silence_stdout():
+    """Initialiseur des processus du benchmark : les traces de parsing ne sont pas affichées."""
+    sys.stdout = open(os.devnull, 'w')
+
+
+def run_parse_benchmark(corpus_path, repeat=3, parser_backend='auto', restricted_parse=True, processes=0):
+    """Mesure le parsing seul (parse de la page + parse_pokemon_details_v2 + detect_shiny_lock) par page.
+
+    processes > 0 : pages réparties sur un pool de processus (comme la commande reparse du scraper).
+    """
+    from pokemon_scraper_v2 import parse_page_in_process
+
+    detail_pages = list(iter_detail_pages(load_corpus(corpus_path)))
+    workdir = tempfile.mkdtemp(prefix='pokescrap_parse_')
+    pool = None
+    try:
+        scraper = make_parsing_scraper(workdir, parser_backend, restricted_parse)
+        if processes:
+            pool = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_silence_stdout)
+            # Démarrage des processus hors mesure
+            list(pool.map(abs, range(processes)))
+
+        timings = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(repeat):
+                start = time.perf_counter()
+                if pool is not None:
+                    list(pool.map(parse_page_in_process, [html for _, _, html in detail_pages],
+                                  [slug for _, slug, _ in detail_pages],
+                                  [scraper.parser_backend] * len(detail_pages),
+                                  [scraper.restricted_parse] * len(detail_pages),
+                                  chunksize=max(1, len(detail_pages) // (processes * 4))))
+                else:
+                    for generation, slug, html in detail_pages:
+                        soup, page_text = scraper.parse_detail_page(html)
+                        scraper.parse_pokemon_details_v2(soup, slug, page_text)
+                        scraper.detect_shiny_lock(soup, slug, page_text)
+                timings.append(time.perf_counter() - start)
+
+        best = min(timings) if timings else 0
+        return {
+            'pages': len(detail_pages),
+            'repeat': repeat,
+            'parser': scraper.parser_backend,
+            'restricted': scraper.restricted_parse,
+            'processes': processes,
+            'best_seconds': best,
+            'parse_ms_per_page': best * 1000 / len(detail_pages) if detail_pages else 0
+        }
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_golden_check(corpus_path, parser_backend='auto', restricted_parse=True):
+    """Compare page par page les sorties d'un backend à la référence (html.parser, arbre complet).
+
+    Retourne (nombre de pages, liste des pages divergentes).
+    """
+    detail_pages = list(iter_detail_pages(load_corpus(corpus_path)))
+    workdir = tempfile.mkdtemp(prefix='pokescrap_golden_')
+    try:
+        reference = make_parsing_scraper(workdir, 'html.parser', False)
+        candidate = make_parsing_scraper(workdir, parser_backend, restricted_parse)
+
+        mismatches = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for generation, slug, html in detail_pages:
+                expected = parse_page_outputs(reference, html, slug)
+                actual = parse_page_outputs(candidate, html, slug)
+                if actual != expected:
+                    keys = [key for key in expected if actual[key] != expected[key]]
+                    mismatches.append((f"{generation}g/{slug}", keys))
+        return len(detail_pages), mismatches
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def print_benchmark(result):
+    print(f"📊 BENCHMARK {result['target']} ({result['workers']} worker(s))")
+    print(f"  Durée: {result['elapsed_seconds']:.2f}s")
+    print(f"  Pokemon: {result['pokemon']} | Erreurs: {result['errors']} | Requêtes HTTP: {result['requests']}"
+          f" | Réessais: {result['retries']}")
+    print(f"  Pages/s: {result['pages_per_second']:.2f}")
+    print(f"  Parsing: {result['parse_ms_per_page']:.1f} ms/page")
+    print(f"  BDD: {result['db_ms_per_page']:.1f} ms/page ({result['db_rows_per_second']:.0f} lignes/s)")
+
+
+if __name__ == "__main__":
+    from pokemon_scraper_v2 import pop_cli_flag, pop_cli_option
+
+    args = sys.argv[1:]
+    port = pop_cli_option(args, '--port', 8765, int)
+    latency_ms = pop_cli_option(args, '--latency-ms', 0, float)
+    jitter_ms = pop_cli_option(args, '--jitter-ms', 0, float)
+    error_rate = pop_cli_option(args, '--error-rate', 0.0, float)
+    error_status = pop_cli_option(args, '--error-status', 503, int)
+    retry_after = pop_cli_option(args, '--retry-after', None, float)
+    workers = pop_cli_option(args, '--workers', 1, int)
+    repeat = pop_cli_option(args, '--repeat', 3, int)
+    processes = pop_cli_option(args, '--processes', 0, int)
+    parser_backend = pop_cli_option(args, '--parser', 'auto')
+    restricted_parse = not pop_cli_flag(args, '--full-parse')
+
+    if len(args) >= 2 and args[0] == "serve":
+        server = ReplayServer(args[1], port=port, latency_ms=latency_ms, jitter_ms=jitter_ms,
+                              error_rate=error_rate, error_status=error_status, retry_after=retry_after)
+        print(f"🎬 Corpus {args[1]} servi sur {server.base_url} ({len(server.pages)} URLs)")
+        print(f"   Utiliser: python pokemon_scraper_v2.py all --base-url {server.base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.stop()
+    elif len(args) >= 2 and args[0] == "bench":
+        if len(args) >= 4 and args[2] == "gen":
+            print_benchmark(run_benchmark(args[1], int(args[3]), workers, latency_ms, error_rate))
+        else:
+            print_benchmark(run_benchmark(args[1], None, workers, latency_ms, error_rate))
+    elif len(args) >= 2 and args[0] == "parse":
+        result = run_parse_benchmark(args[1], repeat, parser_backend, restricted_parse, processes)
+        mode = 'restreint' if result['restricted'] else 'complet'
+        print(f"⏱️ PARSING {result['pages']} pages de détails - {result['parser']} {mode} (meilleur de {result['repeat']}"
+              f"{', ' + str(result['processes']) + ' processus' if result['processes'] else ''})")
+        print(f"  Total: {result['best_seconds']:.2f}s")
+        print(f"  Parsing: {result['parse_ms_per_page']:.1f} ms/page")
+    elif len(args) >= 2 and args[0] == "golden":
+        total, mismatches = run_golden_check(args[1], parser_backend, restricted_parse)
+        for page, keys in mismatches:
+            print(f"❌ {page}: {', '.join(keys)} différent(s) de la référence")
+        if mismatches:
+            print(f"❌ {len(mismatches)}/{total} pages divergentes")
+            sys.exit(1)
+        print(f"✅ {total} pages identiques à la référence (html.parser, arbre complet)")
+    elif len(args) >= 2 and args[0] == "list":
+        pages = load_corpus(args[1])
+        for path in sorted(pages):
+            body, content_type = pages[path]
+            print(f"{len(body):>9}  {content_type:<30}  {path}")
+        print(f"{len(pages)} URLs")
+    else:
+        print(__doc__)
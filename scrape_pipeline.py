@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Pipeline à étages pour le scraper pokebip : réseau -> parsing -> images -> écriture BDD
+- Chaque étage a ses propres threads, reliés par des files bornées : un étage en avance
+  se bloque sur la file pleine (contre-pression), la mémoire reste bornée
+- Étage CPU optionnellement délégué à un pool de processus (parsing hors GIL)
+- Le dernier étage (écrivain unique) tourne dans le thread appelant
+- Utilisation par étage : temps de travail, attente d'entrée (étage affamé) et attente de
+  sortie (étage suivant trop lent) -> l'étage goulot est celui qui travaille ~100 % du temps
+"""
+
+import queue
+import threading
+import time
+
+# Fin de flux (une par thread de l'étage suivant)
+_END = object()
+
+# Intervalle de vérification de l'arrêt pendant une attente sur une file (s)
+STOP_POLL_SECONDS = 0.1
+
+
+class Stage:
+    """Étage du pipeline : function(élément, valeur) -> nouvelle valeur, exécutée par workers threads."""
+
+    def __init__(self, name, function, workers=1):
+        self.name = name
+        self.function = function
+        self.workers = max(1, int(workers))
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.input_wait_seconds = 0.0
+        self.output_wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, busy, input_wait, output_wait):
+        """Comptabilise un élément traité par un thread de l'étage."""
+        with self._lock:
+            self.items += 1
+            self.busy_seconds += busy
+            self.input_wait_seconds += input_wait
+            self.output_wait_seconds += output_wait
+
+    def utilisation(self, elapsed):
+        """Parts du temps des threads de l'étage : (travail, attente d'entrée, attente de sortie)."""
+        capacity = elapsed * self.workers
+        if capacity <= 0:
+            return 0.0, 0.0, 0.0
+        return (self.busy_seconds / capacity, self.input_wait_seconds / capacity,
+                self.output_wait_seconds / capacity)
+
+
+class ScrapePipeline:
+    """Fait passer des éléments dans une suite d'étages puis dans sink (thread appelant).
+
+    Un élément en erreur saute les étages restants : sink reçoit (élément, None, exception).
+    """
+
+    def __init__(self, stages, queue_size=8):
+        self.stages = stages
+        self.queue_size = max(1, int(queue_size))
+        self.elapsed = 0.0
+        self.sink_stage = Stage('write', None)
+
+    def run(self, items, sink):
+        """Traite items (valeurs initiales de chaque élément) ; sink(élément, valeur, erreur) écrit le résultat.
+
+        Si sink lève une exception, les étages sont arrêtés et les files vidées avant de la propager.
+        """
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        stop = threading.Event()
+        start = time.perf_counter()
+
+        threads = []
+        for stage, inbox, outbox in zip(self.stages, queues, queues[1:]):
+            stage_threads = [threading.Thread(target=self._stage_loop, args=(stage, inbox, outbox, stop),
+                                              name=f'pipeline-{stage.name}-{i}', daemon=True)
+                             for i in range(stage.workers)]
+            for thread in stage_threads:
+                thread.start()
+            threads.append(stage_threads)
+        feeder = threading.Thread(target=self._feed, args=(items, queues, threads, stop),
+                                  name='pipeline-feed', daemon=True)
+        feeder.start()
+
+        outbox = queues[-1]
+        finished = False
+        try:
+            while True:
+                waited = time.perf_counter()
+                message = outbox.get()
+                input_wait = time.perf_counter() - waited
+                if message is _END:
+                    finished = True
+                    break
+                item, value, error = message
+                work_start = time.perf_counter()
+                sink(item, value, error)
+                self.sink_stage.record(time.perf_counter() - work_start, input_wait, 0.0)
+        finally:
+            if not finished:
+                # Sortie anticipée (exception du sink) : arrêt des étages, files vidées (pages, créneaux HTTP)
+                stop.set()
+                for stage_threads in threads:
+                    for thread in stage_threads:
+                        thread.join()
+                for pending in queues:
+                    self._drain(pending)
+            feeder.join()
+            self.elapsed = time.perf_counter() - start
+        return self.elapsed
+
+    @staticmethod
+    def _put(outbox, message, stop):
+        """Dépose message dans outbox (bloque si pleine) ; False si le pipeline est arrêté entre-temps."""
+        while not stop.is_set():
+            try:
+                outbox.put(message, timeout=STOP_POLL_SECONDS)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    @staticmethod
+    def _get(inbox, stop):
+        """Prochain message de inbox ; _END si le pipeline est arrêté."""
+        while not stop.is_set():
+            try:
+                return inbox.get(timeout=STOP_POLL_SECONDS)
+            except queue.Empty:
+                pass
+        return _END
+
+    @staticmethod
+    def _drain(pending):
+        """Vide une file sans bloquer."""
+        while True:
+            try:
+                pending.get_nowait()
+            except queue.Empty:
+                return
+
+    def _feed(self, items, queues, threads, stop):
+        """Alimente le premier étage, puis ferme chaque étage dès que le précédent a fini."""
+        for item, value in items:
+            if not self._put(queues[0], (item, value, None), stop):
+                return
+        for stage, inbox, stage_threads in zip(self.stages, queues, threads):
+            for _ in stage_threads:
+                if not self._put(inbox, _END, stop):
+                    return
+            for thread in stage_threads:
+                thread.join()
+        self._put(queues[-1], _END, stop)
+
+    @classmethod
+    def _stage_loop(cls, stage, inbox, outbox, stop):
+        """Boucle d'un thread d'étage : lit, traite, transmet (bloque si la file suivante est pleine)."""
+        while True:
+            waited = time.perf_counter()
+            message = cls._get(inbox, stop)
+            input_wait = time.perf_counter() - waited
+            if message is _END:
+                return
+            item, value, error = message
+            work_start = time.perf_counter()
+            if error is None:
+                try:
+                    value = stage.function(item, value)
+                except Exception as e:
+                    value, error = None, e
+            busy = time.perf_counter() - work_start
+
+            waited = time.perf_counter()
+            if not cls._put(outbox, (item, value, error), stop):
+                return
+            stage.record(busy, input_wait, time.perf_counter() - waited)
+
+    def report(self):
+        """Lignes de bilan par étage (utilisation des threads, éléments traités)."""
+        lines = []
+        for stage in [*self.stages, self.sink_stage]:
+            busy, input_wait, output_wait = stage.utilisation(self.elapsed)
+            lines.append(f"Étage {stage.name} ({stage.workers} thread(s)) : {stage.items} éléments | "
+                         f"travail {busy * 100:.0f}% | attente entrée {input_wait * 100:.0f}% | "
+                         f"bloqué en sortie {output_wait * 100:.0f}%")
+        bottleneck = max([*self.stages, self.sink_stage], key=lambda stage: stage.utilisation(self.elapsed)[0])
+        lines.append(f"Goulot probable : {bottleneck.name}")
+        return lines
@@ -1,18 +1,24 @@
-from flask import Flask, render_template, jsonify, request, send_from_directory
+from flask import Flask, Response, make_response, render_template, stream_template, jsonify, request, send_from_directory
 import sqlite3
 import os
 import json
+import base64
+import functools
+import hashlib
+import itertools
+import threading
+import time
+from collections import OrderedDict
 from database_v2 import DatabaseManagerV2
+from autocomplete_index import AutocompleteIndex, AUTOCOMPLETE_DEFAULT_LIMIT, AUTOCOMPLETE_MAX_LIMIT
+from odds_model import rank_odds, DEFAULT_SECONDS_PER_ENCOUNTER
+from location_index import LocationIndex
 
 # Importer le fichier de référence
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from regional_forms_reference import (
-    is_regional_form, is_regional_evolution, 
-    get_region_from_name, should_be_in_pokedex_tab,
-    should_be_in_regional_tab, should_be_in_other_forms_tab
-)
+from regional_forms_reference import TAB_OTHER, TAB_REGIONAL_PREFIX
 
 app = Flask(__name__)
 
@@ -23,42 +29,189 @@ DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pokemon_shas
 # Base de données
 db = DatabaseManagerV2("pokemon_shasse_v2.db")  # ✅ Utiliser la nouvelle base propre
 
+# ✅ NOUVEAU : Cache des réponses complètes (ETag fort + 304), invalidé dès qu'une écriture est commitée
+RESPONSE_CACHE_MAX_ENTRIES = 256
+
+class ResponseCache:
+    """Réponses 200 mémorisées par (route, arguments), valables tant que PRAGMA data_version ne change pas."""
+    
+    def __init__(self, database, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # Connexion dédiée : data_version change dès qu'une AUTRE connexion (scraper, écrivain) a commité
+        self._version_conn = database.create_connection(check_same_thread=False)
+        self._data_version = None
+    
+    def data_version(self):
+        """Jeton de version de la base ; vide le cache si elle a changé depuis le dernier appel."""
+        with self._lock:
+            version = self._version_conn.execute('PRAGMA data_version').fetchone()[0]
+            if version != self._data_version:
+                self._data_version = version
+                self._entries.clear()
+            return version
+    
+    def get(self, key):
+        """Retourne (version courante, entrée en cache ou None)."""
+        version = self.data_version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        return version, entry
+    
+    def store(self, key, version, entry):
+        """Mémorise une entrée calculée pour `version` (ignorée si la base a changé entre-temps)."""
+        with self._lock:
+            if version != self._data_version:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+response_cache = ResponseCache(db)
+
+# ✅ NOUVEAU : Index en mémoire reconstruits quand la base change
+# PRAGMA data_version relu au plus une fois par intervalle : les lectures courantes ne touchent pas SQLite
+INDEX_VERSION_CHECK_INTERVAL = 1.0
+
+class VersionedIndex:
+    """Structure construite par build(conn), reconstruite si PRAGMA data_version a changé."""
+    
+    def __init__(self, build, check_interval=INDEX_VERSION_CHECK_INTERVAL):
+        self.build = build
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._index = None
+        self._version = None
+        self._checked_at = 0.0
+    
+    def _is_fresh(self):
+        return self._index is not None and time.monotonic() - self._checked_at < self.check_interval
+    
+    def get(self):
+        """Index courant (construit au premier appel)."""
+        if self._is_fresh():
+            return self._index
+        with self._lock:
+            if not self._is_fresh():
+                version = response_cache.data_version()
+                if self._index is None or version != self._version:
+                    self._index = self.build(db.get_connection())
+                    self._version = version
+                self._checked_at = time.monotonic()
+            return self._index
+
+def cached_response(view):
+    """Sert la réponse depuis response_cache avec un ETag fort (304 si If-None-Match correspond)."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = (request.path, tuple(sorted(request.args.items(multi=True))))
+        version, entry = response_cache.get(key)
+        if entry is None:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            body = response.get_data()
+            entry = (body, response.mimetype, hashlib.sha1(body).hexdigest())
+            response_cache.store(key, version, entry)
+        
+        body, mimetype, etag = entry
+        response = Response(body, mimetype=mimetype)
+        response.set_etag(etag)
+        # Le navigateur revalide à chaque chargement : 304 sans corps tant que la base n'a pas changé
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    return wrapper
+
+# ✅ NOUVEAU : Pagination par clé (keyset) et sélection de champs pour /pokemon
+POKEMON_LIST_FIELDS = (
+    'id', 'name', 'number', 'generation', 'sprite_url', 'is_shiny_lock', 'high_quality_image',
+    'description', 'created_at', 'general_methods_count', 'specific_methods_count', 'games_count',
+    'total_methods'
+)
+POKEMON_PAGE_DEFAULT = 100
+POKEMON_PAGE_MAX = 500
+
+def parse_pokemon_fields(raw):
+    """Champs demandés via ?fields=a,b,c (None = tous les champs)."""
+    if not raw:
+        return None
+    fields = [field.strip() for field in raw.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in POKEMON_LIST_FIELDS]
+    if unknown:
+        raise ValueError(f"Champs inconnus: {', '.join(unknown)} (choix: {', '.join(POKEMON_LIST_FIELDS)})")
+    return fields or None
+
+def parse_page_limit(raw):
+    """Taille de page via ?limit= (défaut POKEMON_PAGE_DEFAULT, plafonnée à POKEMON_PAGE_MAX)."""
+    if raw is None or raw == '':
+        return POKEMON_PAGE_DEFAULT
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ValueError(f"limit invalide: {raw}")
+    if limit < 1:
+        raise ValueError(f"limit doit être >= 1: {raw}")
+    return min(limit, POKEMON_PAGE_MAX)
+
+def encode_pokemon_cursor(key):
+    """Curseur opaque à partir de la clé de tri (number, name, id) du dernier Pokemon renvoyé."""
+    return base64.urlsafe_b64encode(json.dumps(key, ensure_ascii=False).encode('utf-8')).decode('ascii')
+
+def decode_pokemon_cursor(token):
+    """Clé de tri (number, name, id) contenue dans un curseur, ValueError si le curseur est invalide."""
+    try:
+        number, name, pokemon_id = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError(f"cursor invalide: {token}")
+    if not isinstance(pokemon_id, int) or not isinstance(name, str):
+        raise ValueError(f"cursor invalide: {token}")
+    return number, name, pokemon_id
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @app.route('/pokemon')
 def pokemon_list():
-    """Liste tous les Pokemon avec leurs stats."""
+    """Liste tous les Pokemon avec leurs stats (pagination ?limit=&cursor= et ?fields= optionnels)."""
     try:
-        conn = db.create_connection()
+        fields = parse_pokemon_fields(request.args.get('fields'))
+        paginated = 'limit' in request.args or 'cursor' in request.args
+        limit = parse_page_limit(request.args.get('limit')) if paginated else -1
+        after = decode_pokemon_cursor(request.args.get('cursor')) if request.args.get('cursor') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        conn = db.get_connection()
         cursor = conn.cursor()
         
-        # Récupérer tous les Pokemon avec leurs infos
-        cursor.execute('''
-            SELECT id, name, number, generation, sprite_url, is_shiny_lock, 
-                   high_quality_image, description, created_at
-            FROM pokemon 
-            ORDER BY number, name
-        ''')
+        # ✅ NOUVEAU : Une seule requête, compteurs lus dans pokemon_summary (tenue à jour par le scraper)
+        # (l'index (number, name) donne l'ordre de la page sans tri, le curseur est une clé, pas un OFFSET)
+        cursor.execute(f'''
+            SELECT p.id, p.name, p.number, p.generation, p.sprite_url, p.is_shiny_lock,
+                   p.high_quality_image, p.description, p.created_at,
+                   COALESCE(s.general_methods_count, 0), COALESCE(s.specific_methods_count, 0),
+                   COALESCE(s.games_count, 0)
+            FROM pokemon p
+            LEFT JOIN pokemon_summary s ON s.pokemon_id = p.id
+            {'WHERE (p.number, p.name, p.id) > (?, ?, ?)' if after else ''}
+            ORDER BY p.number, p.name, p.id
+            LIMIT ?
+        ''', (*(after or ()), limit))
         
         pokemons = []
+        last_key = None
         for row in cursor.fetchall():
-            pokemon_id, name, number, generation, sprite_url, is_shiny_lock, high_quality_image, description, created_at = row
-            
-            # Compter les méthodes générales
-            cursor.execute('SELECT COUNT(*) FROM pokemon_general_methods WHERE pokemon_id = ?', (pokemon_id,))
-            general_methods_count = cursor.fetchone()[0]
-            
-            # Compter les méthodes spécifiques
-            cursor.execute('SELECT COUNT(*) FROM pokemon_specific_methods WHERE pokemon_id = ?', (pokemon_id,))
-            specific_methods_count = cursor.fetchone()[0]
+            (pokemon_id, name, number, generation, sprite_url, is_shiny_lock, high_quality_image, description, created_at,
+             general_methods_count, specific_methods_count, games_count) = row
+            last_key = (number, name, pokemon_id)
             
-            # Compter les jeux
-            cursor.execute('SELECT COUNT(*) FROM pokemon_games WHERE pokemon_id = ?', (pokemon_id,))
-            games_count = cursor.fetchone()[0]
-            
-            pokemons.append({
+            pokemon = {
                 'id': pokemon_id,
                 'name': name,
                 'number': number,
@@ -72,10 +225,17 @@ def pokemon_list():
                 'specific_methods_count': specific_methods_count,
                 'games_count': games_count,
                 'total_methods': general_methods_count + specific_methods_count
-            })
+            }
+            if fields:
+                pokemon = {field: pokemon[field] for field in fields}
+            pokemons.append(pokemon)
+        
+        if not paginated:
+            return jsonify(pokemons)
         
-        conn.close()
-        return jsonify(pokemons)
+        # Page pleine : il peut rester des Pokemon après la dernière clé renvoyée
+        next_cursor = encode_pokemon_cursor(last_key) if len(pokemons) == limit else None
+        return jsonify({'pokemon': pokemons, 'next_cursor': next_cursor, 'limit': limit})
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -84,7 +244,7 @@ def pokemon_list():
 def pokemon_detail(pokemon_id):
     """Récupère les détails d'un Pokemon avec méthodes triées par jeux."""
     try:
-        conn = db.create_connection()
+        conn = db.get_connection()
         cursor = conn.cursor()
         
         # Récupérer les infos du Pokemon
@@ -173,99 +333,53 @@ def pokemon_detail(pokemon_id):
             'all_games': all_games
         }
         
-        conn.close()
         return jsonify(pokemon_detail)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/stats')
+@cached_response
 def stats():
     """Statistiques générales de la base de données."""
     try:
-        conn = db.create_connection()
-        cursor = conn.cursor()
-        
-        # Pokemon stats
-        cursor.execute('SELECT COUNT(*) FROM pokemon')
-        total_pokemon = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM pokemon WHERE is_shiny_lock = 1')
-        shiny_locked = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(DISTINCT generation) FROM pokemon')
-        generations = cursor.fetchone()[0]
-        
-        # Methods stats
-        cursor.execute('SELECT COUNT(*) FROM hunt_methods')
-        total_methods = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM hunt_methods WHERE is_general = 1')
-        general_methods = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM hunt_methods WHERE is_general = 0')
-        specific_methods = cursor.fetchone()[0]
-        
-        # Games stats
-        cursor.execute('SELECT COUNT(*) FROM games')
-        total_games = cursor.fetchone()[0]
-        
-        # Locations stats
-        cursor.execute('SELECT COUNT(*) FROM locations')
-        total_locations = cursor.fetchone()[0]
+        # ✅ NOUVEAU : Une seule lecture de stats_snapshot au lieu d'une dizaine de COUNT
+        snapshot = db.get_stats_snapshot()
+        total_pokemon = snapshot['total_pokemon']
+        shiny_locked = snapshot['shiny_locked']
         
         # Pokemon par génération
-        cursor.execute('''
-            SELECT generation, COUNT(*) as count
-            FROM pokemon 
-            GROUP BY generation 
-            ORDER BY generation
-        ''')
-        pokemon_by_generation = [{'generation': row[0], 'count': row[1]} for row in cursor.fetchall()]
+        pokemon_by_generation = [{'generation': generation, 'count': count}
+                                 for generation, count in snapshot['pokemon_by_generation']]
         
         # Méthodes les plus utilisées
-        cursor.execute('''
-            SELECT hm.name, hm.category, COUNT(*) as usage_count
-            FROM (
-                SELECT hunt_method_id FROM pokemon_general_methods
-                UNION ALL
-                SELECT hunt_method_id FROM pokemon_specific_methods
-            ) methods
-            JOIN hunt_methods hm ON methods.hunt_method_id = hm.id
-            GROUP BY hm.name, hm.category
-            ORDER BY usage_count DESC
-            LIMIT 10
-        ''')
         popular_methods = []
-        for row in cursor.fetchall():
-            method_name, category, usage_count = row
+        for method_name, category, usage_count in snapshot['popular_methods']:
             popular_methods.append({
                 'name': method_name,
                 'category': category,
                 'usage_count': usage_count
             })
         
-        conn.close()
-        
         return jsonify({
             'pokemon': {
                 'total': total_pokemon,
                 'shiny_locked': shiny_locked,
                 'shiny_available': total_pokemon - shiny_locked,
-                'generations': generations,
+                'generations': len(pokemon_by_generation),
                 'by_generation': pokemon_by_generation
             },
             'methods': {
-                'total': total_methods,
-                'general': general_methods,
-                'specific': specific_methods,
+                'total': snapshot['total_hunt_methods'],
+                'general': snapshot['general_hunt_methods'],
+                'specific': snapshot['specific_hunt_methods'],
                 'popular': popular_methods
             },
             'games': {
-                'total': total_games
+                'total': snapshot['total_games']
             },
             'locations': {
-                'total': total_locations
+                'total': snapshot['total_locations']
             }
         })
         
@@ -273,10 +387,11 @@ def stats():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/generations')
+@cached_response
 def generations():
     """Liste les générations avec leurs Pokemon."""
     try:
-        conn = db.create_connection()
+        conn = db.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -294,7 +409,6 @@ def generations():
                 'pokemon_count': pokemon_count
             })
         
-        conn.close()
         return jsonify(generations_data)
         
     except Exception as e:
@@ -302,26 +416,16 @@ def generations():
 
 @app.route('/search')
 def search():
-    """Recherche de Pokemon par nom."""
+    """Recherche de Pokemon par nom (casse et accents ignorés) ou par numéro."""
     query = request.args.get('q', '').strip()
     
     if not query:
         return jsonify([])
     
     try:
-        conn = db.create_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, name, number, generation, sprite_url, is_shiny_lock
-            FROM pokemon 
-            WHERE name LIKE ? OR CAST(number AS TEXT) LIKE ?
-            ORDER BY name
-            LIMIT 20
-        ''', (f'%{query}%', f'%{query}%'))
-        
+        # ✅ NOUVEAU : Index plein texte (accents ignorés, résultats classés), numéro exact si numérique
         results = []
-        for row in cursor.fetchall():
+        for row in db.search_pokemon(query, limit=20):
             pokemon_id, name, number, generation, sprite_url, is_shiny_lock = row
             results.append({
                 'id': pokemon_id,
@@ -332,12 +436,28 @@ def search():
                 'is_shiny_lock': bool(is_shiny_lock)
             })
         
-        conn.close()
         return jsonify(results)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# ✅ NOUVEAU : Autocomplétion servie depuis un index en mémoire (aucune requête SQLite par frappe)
+autocomplete_index = VersionedIndex(AutocompleteIndex.from_connection)
+
+@app.route('/api/autocomplete')
+def api_autocomplete():
+    """Complétions de nom (préfixe, début de mot, une faute de frappe tolérée) avec chemin du sprite."""
+    query = request.args.get('q', '')
+    raw_limit = request.args.get('limit', '')
+    try:
+        limit = int(raw_limit) if raw_limit else AUTOCOMPLETE_DEFAULT_LIMIT
+    except ValueError:
+        return jsonify({'error': f"limit invalide: {raw_limit}"}), 400
+    if limit < 1:
+        return jsonify({'error': f"limit doit être >= 1: {raw_limit}"}), 400
+    
+    return jsonify(autocomplete_index.get().complete(query, min(limit, AUTOCOMPLETE_MAX_LIMIT)))
+
 @app.route('/assets/<path:filename>')
 def serve_assets(filename):
     """Sert les fichiers statiques (sprites, images)."""
@@ -348,7 +468,7 @@ def serve_assets(filename):
 def pokemon_detail_page(pokemon_name):
     """Affiche la page détaillée d'un Pokemon avec sprites, jeux et méthodes."""
     try:
-        conn = db.create_connection()
+        conn = db.get_connection()
         cursor = conn.cursor()
         
         # Chercher le Pokemon par nom (cas insensible)
@@ -440,8 +560,6 @@ def pokemon_detail_page(pokemon_name):
                 games_by_gen[gen] = []
             games_by_gen[gen].append(game)
         
-        conn.close()
-        
         # Préparer les données pour le template
         pokemon_info = {
             'id': pokemon_id,
@@ -469,16 +587,19 @@ def pokemon_detail_page(pokemon_name):
 # ✅ NOUVELLES ROUTES API POUR LE FRONT
 
 @app.route('/api/stats')
+@cached_response
 def api_stats():
     """API pour les statistiques (appelée par le JavaScript)."""
     try:
         print("🔍 Tentative de connexion à la base de données...")
-        conn = db.create_connection()
+        conn = db.get_connection()
         cursor = conn.cursor()
         
+        # ✅ NOUVEAU : Compteurs lus dans stats_snapshot (une seule lecture)
+        snapshot = db.get_stats_snapshot()
+        
         # Vérifier que la base contient des données
-        cursor.execute('SELECT COUNT(*) FROM pokemon')
-        total_pokemon = cursor.fetchone()[0]
+        total_pokemon = snapshot['total_pokemon']
         print(f"📊 Total Pokemon trouvés : {total_pokemon}")
         
         if total_pokemon == 0:
@@ -489,23 +610,15 @@ def api_stats():
             }), 200
         
         # Sprites téléchargés
-        cursor.execute('SELECT COUNT(*) FROM pokemon WHERE sprite_url IS NOT NULL AND sprite_url != ""')
-        sprites_downloaded = cursor.fetchone()[0]
+        sprites_downloaded = snapshot['sprites_downloaded']
         
         download_percentage = (sprites_downloaded / total_pokemon * 100) if total_pokemon > 0 else 0
         
         # Formes totales
-        cursor.execute('SELECT COUNT(*) FROM pokemon WHERE name LIKE "%Alola%" OR name LIKE "%Galar%" OR name LIKE "%Hisui%"')
-        total_forms = cursor.fetchone()[0]
+        total_forms = snapshot['total_forms']
         
         # Stats par génération
-        cursor.execute('''
-            SELECT generation, COUNT(*) as count
-            FROM pokemon 
-            GROUP BY generation 
-            ORDER BY generation
-        ''')
-        generation_stats = cursor.fetchall()
+        generation_stats = snapshot['pokemon_by_generation']
         
         # Top formes
         cursor.execute('''
@@ -533,8 +646,6 @@ def api_stats():
                 clean_sprite_path = sprite_path.replace('assets/', '').replace('assets\\', '').replace('\\', '/')
             recent_pokemon.append([name, generation, clean_sprite_path])
         
-        conn.close()
-        
         print("✅ Données récupérées avec succès")
         
         # Retourner dans le format attendu par le JavaScript
@@ -568,18 +679,20 @@ def api_stats():
         }), 500
 
 @app.route('/api/sprites')
+@cached_response
 def api_sprites():
     """API pour les sprites organisés par génération, formes régionales et autres formes."""
     try:
-        conn = db.create_connection()
+        conn = db.get_connection()
         cursor = conn.cursor()
         
         # Récupérer tous les Pokemon avec leurs sprites
+        # ✅ NOUVEAU : Onglet précalculé (pokemon.tab), lu dans l'ordre de l'index (tab, generation, number)
         cursor.execute('''
-            SELECT name, number, generation, sprite_url, is_shiny_lock, created_at
+            SELECT name, number, generation, sprite_url, is_shiny_lock, created_at, tab
             FROM pokemon 
             WHERE sprite_url IS NOT NULL AND sprite_url != ''
-            ORDER BY generation, number
+            ORDER BY tab, generation, number
         ''')
         
         pokemon_data = cursor.fetchall()
@@ -594,9 +707,9 @@ def api_sprites():
         }
         other_forms = {'other': {'name': 'Autres Formes', 'sprites': []}}
         
-        # Classifier chaque Pokemon
+        # Ranger chaque Pokemon dans son onglet
         for pokemon in pokemon_data:
-            name, number, gen, sprite_url, is_shiny_lock, created_at = pokemon
+            name, number, gen, sprite_url, is_shiny_lock, created_at, tab = pokemon
             
             # Nettoyer l'URL du sprite
             clean_sprite_url = None
@@ -612,28 +725,18 @@ def api_sprites():
                 'generation': gen
             }
             
-            # Classifier selon les règles du fichier de référence
-            if should_be_in_pokedex_tab(name):
-                # Va dans l'onglet pokédex principal (génération)
-                if gen not in generations:
-                    generations[gen] = {
-                        'name': f'Génération {gen}',
-                        'sprites': []
-                    }
-                generations[gen]['sprites'].append(pokemon_entry)
-                
-            elif should_be_in_regional_tab(name):
+            if tab.startswith(TAB_REGIONAL_PREFIX):
                 # Va dans un onglet forme régionale
-                region = get_region_from_name(name)
-                if region and region in regional_forms:
+                region = tab[len(TAB_REGIONAL_PREFIX):]
+                if region in regional_forms:
                     regional_forms[region]['sprites'].append(pokemon_entry)
                     
-            elif should_be_in_other_forms_tab(name):
+            elif tab == TAB_OTHER:
                 # Va dans l'onglet autres formes
                 other_forms['other']['sprites'].append(pokemon_entry)
                 
             else:
-                # Fallback : va dans l'onglet génération si aucune règle ne correspond
+                # Va dans l'onglet pokédex principal (génération)
                 if gen not in generations:
                     generations[gen] = {
                         'name': f'Génération {gen}',
@@ -645,8 +748,6 @@ def api_sprites():
         filtered_regional_forms = {k: v for k, v in regional_forms.items() if v['sprites']}
         filtered_other_forms = {k: v for k, v in other_forms.items() if v['sprites']}
         
-        conn.close()
-        
         return jsonify({
             'generations': generations,
             'regional_forms': filtered_regional_forms,
@@ -663,7 +764,7 @@ def api_sprites():
 def api_pokemon_details(pokemon_name, generation):
     """API pour les détails d'un Pokemon (appelée par le JavaScript)."""
     try:
-        conn = db.create_connection()
+        conn = db.get_connection()
         cursor = conn.cursor()
         
         # Récupérer le Pokemon
@@ -685,20 +786,24 @@ def api_pokemon_details(pokemon_name, generation):
         
         # Récupérer les jeux
         cursor.execute('''
-            SELECT DISTINCT g.name, g.generation
+            SELECT g.name, g.generation
             FROM games g
             JOIN pokemon_specific_methods psm ON g.id = psm.game_id
             WHERE psm.pokemon_id = ?
+            GROUP BY g.id
+            ORDER BY MIN(psm.id)
         ''', (pokemon_id,))
         
         games = cursor.fetchall()
         
         # Récupérer les localisations
         cursor.execute('''
-            SELECT DISTINCT l.name, l.region
+            SELECT l.name, l.region
             FROM locations l
             JOIN pokemon_specific_methods psm ON l.id = psm.location_id
             WHERE psm.pokemon_id = ?
+            GROUP BY l.id
+            ORDER BY MIN(psm.id)
         ''', (pokemon_id,))
         
         locations = cursor.fetchall()
@@ -726,7 +831,7 @@ def api_pokemon_details(pokemon_name, generation):
 def api_missing_pokemon(generation):
     """API pour les Pokemon manquants d'une génération."""
     try:
-        conn = db.create_connection()
+        conn = db.get_connection()
         cursor = conn.cursor()
         
         # Récupérer tous les Pokemon de cette génération
@@ -761,6 +866,94 @@ def api_missing_pokemon(generation):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# ✅ NOUVEAU : Rencontres et temps attendus avant le premier shiny (calcul vectorisé, voir odds_model)
+def parse_odds_options(args):
+    """Options du calcul : ?charm=0 ignore le Charme Chroma, ?seconds= durée d'une rencontre."""
+    raw_seconds = args.get('seconds', '')
+    try:
+        seconds = float(raw_seconds) if raw_seconds else DEFAULT_SECONDS_PER_ENCOUNTER
+    except ValueError:
+        raise ValueError(f"seconds invalide: {raw_seconds}")
+    if not 0 < seconds < float('inf'):
+        raise ValueError(f"seconds doit être > 0: {raw_seconds}")
+    return {
+        'seconds_per_encounter': seconds,
+        'use_charm': args.get('charm', '1') != '0',
+    }
+
+def find_game_id(conn, game_name):
+    """ID d'un jeu par nom exact (None si inconnu)."""
+    row = conn.execute('SELECT id FROM games WHERE name = ?', (game_name,)).fetchone()
+    return row[0] if row else None
+
+@app.route('/api/odds/<pokemon_name>')
+@cached_response
+def api_odds(pokemon_name):
+    """Rencontres attendues pour chaque (jeu, méthode, lieu) d'un Pokemon, de la plus rapide à la plus lente."""
+    try:
+        options = parse_odds_options(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        conn = db.get_connection()
+        pokemon_ids = [row[0] for row in conn.execute(
+            'SELECT id FROM pokemon WHERE LOWER(name) = LOWER(?)', (pokemon_name,))]
+        if not pokemon_ids:
+            return jsonify({'error': 'Pokemon non trouvé'}), 404
+        
+        game_id = None
+        if request.args.get('game'):
+            game_id = find_game_id(conn, request.args['game'])
+            if game_id is None:
+                return jsonify({'error': 'Jeu non trouvé'}), 404
+        
+        return jsonify({
+            'pokemon': pokemon_name,
+            'odds': rank_odds(db.get_odds_inputs(pokemon_ids, game_id), **options)
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/odds/game/<game_name>')
+@cached_response
+def api_odds_game(game_name):
+    """Classement des Pokemon d'un jeu par rencontres attendues (meilleure méthode de chacun)."""
+    try:
+        options = parse_odds_options(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        game_id = find_game_id(db.get_connection(), game_name)
+        if game_id is None:
+            return jsonify({'error': 'Jeu non trouvé'}), 404
+        
+        return jsonify({
+            'game': game_name,
+            'ranking': rank_odds(db.get_odds_inputs(game_id=game_id), best_per_pokemon=True, **options)
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ✅ NOUVEAU : « Que chasser ici ? » : index inversé lieu -> jeu -> Pokemon, en mémoire
+location_index = VersionedIndex(LocationIndex.from_connection)
+
+@app.route('/api/location/<location_name>')
+def api_location(location_name):
+    """Pokemon chassables dans un lieu (toutes zones), par jeu puis taux de rencontre décroissant (?game= optionnel)."""
+    index = location_index.get()
+    game = request.args.get('game') or None
+    result = index.lookup(location_name, game)
+    if result is None:
+        return jsonify({'error': 'Lieu non trouvé', 'suggestions': index.suggest(location_name)}), 404
+    # Jeu inconnu pour ce lieu (faute de frappe ?) : 404 avec les jeux valides plutôt qu'une liste vide
+    if game is not None and not result['games']:
+        return jsonify({'error': 'Jeu non trouvé pour ce lieu', 'games': index.game_names(location_name)}), 404
+    return jsonify(result)
+
 @app.route('/debug/database')
 def debug_database():
     """Route de diagnostic pour vérifier l'état de la base de données."""
@@ -779,7 +972,7 @@ def debug_database():
         tables_info = []
         
         try:
-            conn = db.create_connection()
+            conn = db.get_connection()
             cursor = conn.cursor()
             connection_info['status'] = 'success'
             
@@ -797,8 +990,6 @@ def debug_database():
                     'count': count
                 })
             
-            conn.close()
-            
         except Exception as e:
             connection_info['error'] = str(e)
         
@@ -811,173 +1002,172 @@ def debug_database():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# ✅ NOUVEAU : /debug en requêtes ensemblistes (une par relation, même ordre que les Pokemon)
+# Les lignes de chaque relation arrivent groupées par Pokemon : une seule passe, mémoire constante
+DEBUG_POKEMON_ORDER = 'p.generation, p.number, p.name, p.id'
+
+DEBUG_RELATION_QUERIES = {
+    'general_methods': f'''
+        SELECT pgm.pokemon_id, hm.name, hm.description, hm.category, pgm.conditions, pgm.notes
+        FROM pokemon_general_methods pgm
+        JOIN pokemon p ON pgm.pokemon_id = p.id
+        JOIN hunt_methods hm ON pgm.hunt_method_id = hm.id
+        ORDER BY {DEBUG_POKEMON_ORDER}, pgm.hunt_method_id
+    ''',
+    'specific_methods': f'''
+        SELECT psm.pokemon_id, hm.name, hm.description, g.name, l.name,
+               psm.probability, psm.conditions, psm.notes
+        FROM pokemon_specific_methods psm
+        JOIN pokemon p ON psm.pokemon_id = p.id
+        JOIN hunt_methods hm ON psm.hunt_method_id = hm.id
+        JOIN games g ON psm.game_id = g.id
+        LEFT JOIN locations l ON psm.location_id = l.id
+        ORDER BY {DEBUG_POKEMON_ORDER}, psm.id
+    ''',
+    'games': f'''
+        SELECT pg.pokemon_id, g.name, g.generation, pg.availability
+        FROM pokemon_games pg
+        JOIN pokemon p ON pg.pokemon_id = p.id
+        JOIN games g ON pg.game_id = g.id
+        ORDER BY {DEBUG_POKEMON_ORDER}, g.generation, g.name
+    ''',
+    'locations': f'''
+        SELECT psm.pokemon_id, l.name, l.region, l.description
+        FROM pokemon_specific_methods psm
+        JOIN pokemon p ON psm.pokemon_id = p.id
+        JOIN locations l ON psm.location_id = l.id
+        GROUP BY psm.pokemon_id, l.id
+        ORDER BY {DEBUG_POKEMON_ORDER}, l.name, MIN(psm.id)
+    ''',
+}
+
+DEBUG_RELATION_FIELDS = {
+    'general_methods': ('name', 'description', 'category', 'conditions', 'notes'),
+    'specific_methods': ('name', 'description', 'game', 'location', 'probability', 'conditions', 'notes'),
+    'games': ('name', 'generation', 'availability'),
+    'locations': ('name', 'region', 'description'),
+}
+
+def rows_grouped_by_pokemon(rows, fields):
+    """Retourne take(pokemon_id) -> liste de dicts, en consommant des lignes déjà triées par Pokemon."""
+    groups = itertools.groupby(rows, key=lambda row: row[0])
+    pending = next(groups, None)
+    
+    def take(pokemon_id):
+        nonlocal pending
+        if pending is None or pending[0] != pokemon_id:
+            return []
+        items = [dict(zip(fields, row[1:])) for row in pending[1]]
+        pending = next(groups, None)
+        return items
+    
+    return take
+
+def get_debug_statistics():
+    """Compteurs globaux affichés en tête de /debug (lus dans stats_snapshot)."""
+    snapshot = db.get_stats_snapshot()
+    return {
+        key: snapshot[key]
+        for key in ('total_pokemon', 'total_games', 'total_hunt_methods', 'total_locations',
+                    'total_general_method_associations', 'total_specific_method_associations',
+                    'total_pokemon_game_associations')
+    }
+
+def iter_debug_pokemon(conn):
+    """Génère chaque Pokemon avec toutes ses valeurs associées (5 requêtes au total)."""
+    relations = {
+        relation: rows_grouped_by_pokemon(conn.execute(query), DEBUG_RELATION_FIELDS[relation])
+        for relation, query in DEBUG_RELATION_QUERIES.items()
+    }
+    
+    pokemon_rows = conn.execute(f'''
+        SELECT id, name, number, generation, sprite_url, is_shiny_lock, 
+               high_quality_image, description, created_at
+        FROM pokemon p
+        ORDER BY {DEBUG_POKEMON_ORDER}
+    ''')
+    for row in pokemon_rows:
+        pokemon_id, name, number, generation, sprite_url, is_shiny_lock, high_quality_image, description, created_at = row
+        general_methods = relations['general_methods'](pokemon_id)
+        specific_methods = relations['specific_methods'](pokemon_id)
+        games = relations['games'](pokemon_id)
+        locations = relations['locations'](pokemon_id)
+        
+        yield {
+            'id': pokemon_id,
+            'name': name,
+            'number': number,
+            'generation': generation,
+            'sprite_url': sprite_url,
+            'is_shiny_lock': bool(is_shiny_lock),
+            'high_quality_image': high_quality_image,
+            'description': description,
+            'created_at': created_at,
+            'general_methods': general_methods,
+            'specific_methods': specific_methods,
+            'games': games,
+            'locations': locations,
+            'total_general_methods': len(general_methods),
+            'total_specific_methods': len(specific_methods),
+            'total_games': len(games),
+            'total_locations': len(locations)
+        }
+
+def buffered_chunks(chunks, size=64 * 1024):
+    """Regroupe les petits morceaux d'un flux (rendu Jinja) en blocs d'environ `size` caractères."""
+    buffer, buffered = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield ''.join(buffer)
+            buffer, buffered = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+def compact_json_dumps(obj):
+    """Sérialisation JSON identique à jsonify (clés triées, séparateurs compacts)."""
+    return app.json.dumps(obj, separators=(',', ':'))
+
+def stream_debug_json(statistics, pokemon_iter):
+    """Même document que jsonify({'statistics', 'pokemon'}), émis Pokemon par Pokemon."""
+    dumps = compact_json_dumps
+    yield '{"pokemon":['
+    for index, pokemon in enumerate(pokemon_iter):
+        yield (',' if index else '') + dumps(pokemon)
+    yield '],"statistics":' + dumps(statistics) + '}\n'
+
+def stream_debug_ndjson(statistics, pokemon_iter):
+    """NDJSON : une première ligne {"statistics": ...}, puis un Pokemon par ligne."""
+    dumps = compact_json_dumps
+    yield dumps({'statistics': statistics}) + '\n'
+    for pokemon in pokemon_iter:
+        yield dumps(pokemon) + '\n'
+
 @app.route('/debug')
 def debug():
     """Page de debug qui affiche tous les Pokemon avec toutes leurs valeurs associées."""
     try:
-        # Vérifier si on veut le format JSON
+        # Vérifier si on veut le format JSON (ou NDJSON)
         format_type = request.args.get('format', 'html')
         
-        conn = db.create_connection()
-        cursor = conn.cursor()
-        
-        # Récupérer tous les Pokemon avec toutes leurs informations
-        cursor.execute('''
-            SELECT id, name, number, generation, sprite_url, is_shiny_lock, 
-                   high_quality_image, description, created_at
-            FROM pokemon 
-            ORDER BY generation, number, name
-        ''')
-        
-        pokemon_data = []
-        for row in cursor.fetchall():
-            pokemon_id, name, number, generation, sprite_url, is_shiny_lock, high_quality_image, description, created_at = row
-            
-            # Récupérer les méthodes générales
-            cursor.execute('''
-                SELECT hm.name, hm.description, hm.category, pgm.conditions, pgm.notes
-                FROM pokemon_general_methods pgm
-                JOIN hunt_methods hm ON pgm.hunt_method_id = hm.id
-                WHERE pgm.pokemon_id = ?
-            ''', (pokemon_id,))
-            general_methods = []
-            for method_row in cursor.fetchall():
-                method_name, method_description, category, conditions, notes = method_row
-                general_methods.append({
-                    'name': method_name,
-                    'description': method_description,
-                    'category': category,
-                    'conditions': conditions,
-                    'notes': notes
-                })
-            
-            # Récupérer les méthodes spécifiques
-            cursor.execute('''
-                SELECT hm.name, hm.description, g.name as game, l.name as location, 
-                       psm.probability, psm.conditions, psm.notes
-                FROM pokemon_specific_methods psm
-                JOIN hunt_methods hm ON psm.hunt_method_id = hm.id
-                JOIN games g ON psm.game_id = g.id
-                LEFT JOIN locations l ON psm.location_id = l.id
-                WHERE psm.pokemon_id = ?
-            ''', (pokemon_id,))
-            specific_methods = []
-            for method_row in cursor.fetchall():
-                method_name, method_description, game, location, probability, conditions, notes = method_row
-                specific_methods.append({
-                    'name': method_name,
-                    'description': method_description,
-                    'game': game,
-                    'location': location,
-                    'probability': probability,
-                    'conditions': conditions,
-                    'notes': notes
-                })
-            
-            # Récupérer tous les jeux associés
-            cursor.execute('''
-                SELECT g.name, g.generation, pg.availability
-                FROM pokemon_games pg
-                JOIN games g ON pg.game_id = g.id
-                WHERE pg.pokemon_id = ?
-                ORDER BY g.generation, g.name
-            ''', (pokemon_id,))
-            games = []
-            for game_row in cursor.fetchall():
-                game_name, game_generation, availability = game_row
-                games.append({
-                    'name': game_name,
-                    'generation': game_generation,
-                    'availability': availability
-                })
-            
-            # Récupérer toutes les localisations associées (via les méthodes spécifiques)
-            cursor.execute('''
-                SELECT DISTINCT l.name, l.region, l.description
-                FROM pokemon_specific_methods psm
-                JOIN locations l ON psm.location_id = l.id
-                WHERE psm.pokemon_id = ?
-                ORDER BY l.name
-            ''', (pokemon_id,))
-            locations = []
-            for location_row in cursor.fetchall():
-                location_name, region, location_description = location_row
-                locations.append({
-                    'name': location_name,
-                    'region': region,
-                    'description': location_description
-                })
-            
-            # Assembler toutes les données
-            pokemon_data.append({
-                'id': pokemon_id,
-                'name': name,
-                'number': number,
-                'generation': generation,
-                'sprite_url': sprite_url,
-                'is_shiny_lock': bool(is_shiny_lock),
-                'high_quality_image': high_quality_image,
-                'description': description,
-                'created_at': created_at,
-                'general_methods': general_methods,
-                'specific_methods': specific_methods,
-                'games': games,
-                'locations': locations,
-                'total_general_methods': len(general_methods),
-                'total_specific_methods': len(specific_methods),
-                'total_games': len(games),
-                'total_locations': len(locations)
-            })
-        
-        # Statistiques générales
-        cursor.execute('SELECT COUNT(*) FROM pokemon')
-        total_pokemon = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM games')
-        total_games = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM hunt_methods')
-        total_methods = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM locations')
-        total_locations = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM pokemon_general_methods')
-        total_general_associations = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM pokemon_specific_methods')
-        total_specific_associations = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM pokemon_games')
-        total_pokemon_games = cursor.fetchone()[0]
-        
-        conn.close()
-        
-        # Préparer les données
-        debug_data = {
-            'statistics': {
-                'total_pokemon': total_pokemon,
-                'total_games': total_games,
-                'total_hunt_methods': total_methods,
-                'total_locations': total_locations,
-                'total_general_method_associations': total_general_associations,
-                'total_specific_method_associations': total_specific_associations,
-                'total_pokemon_game_associations': total_pokemon_games
-            },
-            'pokemon': pokemon_data
-        }
+        conn = db.get_connection()
+        statistics = get_debug_statistics()
+        pokemon_data = iter_debug_pokemon(conn)
         
-        # Retourner selon le format demandé
+        # ✅ NOUVEAU : Réponses en flux, rien n'est accumulé en mémoire
         if format_type == 'json':
-            return jsonify(debug_data)
+            return Response(stream_debug_json(statistics, pokemon_data), mimetype='application/json')
+        elif format_type == 'ndjson':
+            return Response(stream_debug_ndjson(statistics, pokemon_data), mimetype='application/x-ndjson')
         else:
             # Retourner le template HTML
-            return render_template('debug.html', 
-                                 statistics=debug_data['statistics'],
-                                 pokemon_data=pokemon_data)
+            return Response(buffered_chunks(stream_template('debug.html',
+                                                            statistics=statistics,
+                                                            pokemon_data=pokemon_data)))
         
     except Exception as e:
-        if request.args.get('format') == 'json':
+        if request.args.get('format') in ('json', 'ndjson'):
             return jsonify({'error': str(e)}), 500
         else:
             return render_template('error.html', error=str(e)), 500
@@ -985,4 +1175,6 @@ def debug():
 if __name__ == '__main__':
     print("🌟 Démarrage du serveur Pokemon Dashboard...")
     print("📊 Accédez au dashboard sur: http://localhost:5000")
+    print(f"🔤 Index d'autocomplétion: {len(autocomplete_index.get().entries)} Pokemon")
+    print(f"🗺️ Index des lieux: {len(location_index.get().keys)} lieux")
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file